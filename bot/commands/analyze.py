@@ -90,12 +90,18 @@ class AnalyzeCommand(BotCommand):
             
             if result.get("success"):
                 task_id = result.get("task_id", "")
+                if result.get("cached"):
+                    title, footer = "♻️ **已有最近的分析结果**", "分析结果将直接推送。"
+                elif result.get("coalesced"):
+                    title, footer = "♻️ **相同的分析任务正在进行**", "已合并请求，分析完成后将自动推送结果。"
+                else:
+                    title, footer = "✅ **分析任务已提交**", "分析完成后将自动推送结果。"
                 return BotResponse.markdown_response(
-                    f"✅ **分析任务已提交**\n\n"
+                    f"{title}\n\n"
                     f"• 股票代码: `{code}`\n"
                     f"• 报告类型: {ReportType.from_str(report_type).display_name}\n"
                     f"• 任务 ID: `{task_id[:20]}...`\n\n"
-                    f"分析完成后将自动推送结果。"
+                    f"{footer}"
                 )
             else:
                 error = result.get("error", "未知错误")
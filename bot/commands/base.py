@@ -95,6 +95,15 @@ class BotCommand(ABC):
         """
         return False
     
+    @property
+    def rate_cost(self) -> int:
+        """
+        频率限制计费权重
+        
+        默认 1，触发批量分析等重量级任务的命令可设置更大的值
+        """
+        return 1
+    
     @abstractmethod
     def execute(self, message: BotMessage, args: List[str]) -> BotResponse:
         """
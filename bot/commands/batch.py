@@ -5,18 +5,102 @@
 ===================================
 
 批量分析自选股列表中的所有股票。
+
+由机器人会话触发时，每只股票完成后把结论增量回复到来源会话（按时间间隔合并，避免刷屏），
+全部完成后回复一条汇总，完整日报仍推送到已配置的通知渠道。
 """
 
 import logging
 import threading
-from typing import List
+import time
+from typing import List, Optional, TYPE_CHECKING
 
 from bot.commands.base import BotCommand
 from bot.models import BotMessage, BotResponse
+from src.job_scheduler import get_job_scheduler
+
+if TYPE_CHECKING:
+    from src.analyzer import AnalysisResult
 
 logger = logging.getLogger(__name__)
 
 
+class BatchProgressReporter:
+    """
+    批量分析进度回复
+
+    作为 pipeline.run 的 on_stock_done 回调：第一只股票完成后立即回复，
+    之后距上次回复至少 interval 秒才合并发送一次，finish() 发送剩余结论与汇总。
+    """
+
+    def __init__(self, message: BotMessage, total: int, interval: float = 30):
+        from src.notification import NotificationService
+
+        self.total = total
+        self.interval = interval
+        self._notifier = NotificationService(source_message=message)
+        self._lock = threading.Lock()
+        self._pending: List[str] = []
+        self._results: List['AnalysisResult'] = []
+        self._done = 0
+        self._failed = 0
+        self._last_sent = 0.0
+
+    def __call__(self, code: str, result: Optional['AnalysisResult']) -> None:
+        with self._lock:
+            self._done += 1
+            if result is None:
+                self._failed += 1
+                self._pending.append(f"⚠️ {code}: 分析失败")
+            else:
+                self._results.append(result)
+                self._pending.append(
+                    f"{result.get_emoji()} **{result.name}({result.code})**: "
+                    f"{result.operation_advice} | 评分 {result.sentiment_score}"
+                )
+            if time.time() - self._last_sent < self.interval:
+                return
+            text = self._take_pending()
+
+        self._send(text)
+
+    def finish(self, report_pushed: bool = True) -> None:
+        """
+        发送剩余结论与汇总
+
+        Args:
+            report_pushed: 完整日报是否已推送到通知渠道
+        """
+        with self._lock:
+            lines = [self._take_pending()] if self._pending else []
+            counts = {}
+            for result in self._results:
+                counts[result.operation_advice] = counts.get(result.operation_advice, 0) + 1
+            summary = "，".join(f"{advice} {count} 只" for advice, count in counts.items())
+            lines.append(
+                f"✅ **批量分析完成**: 成功 {len(self._results)}/{self.total} 只"
+                + (f"（{summary}）" if summary else "")
+            )
+            if report_pushed:
+                lines[-1] += "\n\n完整日报已推送到通知渠道。"
+
+        self._send("\n\n".join(lines))
+
+    def _take_pending(self) -> str:
+        """取出待发送的结论（调用方持有锁）"""
+        text = f"📊 **批量分析进度 {self._done}/{self.total}**\n\n" + "\n".join(self._pending)
+        self._pending = []
+        self._last_sent = time.time()
+        return text
+
+    def _send(self, text: str) -> None:
+        try:
+            if not self._notifier.send_to_context(text):
+                logger.warning("[BatchCommand] 进度回复发送失败")
+        except Exception as e:
+            logger.warning(f"[BatchCommand] 进度回复发送异常: {e}")
+
+
 class BatchCommand(BotCommand):
     """
     批量分析命令
@@ -49,6 +133,11 @@ class BatchCommand(BotCommand):
         """批量分析需要管理员权限（防止滥用）"""
         return False  # 可以根据需要设为 True
     
+    @property
+    def rate_cost(self) -> int:
+        """批量分析按 5 次请求计费"""
+        return 5
+    
     def execute(self, message: BotMessage, args: List[str]) -> BotResponse:
         """执行批量分析命令"""
         from src.config import get_config
@@ -77,9 +166,13 @@ class BatchCommand(BotCommand):
         if limit:
             stock_list = stock_list[:limit]
         
+        # 准入控制：任务队列已满或该用户已有过多任务时直接拒绝
+        if not get_job_scheduler().can_admit(user=message.user_id):
+            return BotResponse.error_response("系统繁忙，任务队列已满，请稍后再试")
+        
         logger.info(f"[BatchCommand] 开始批量分析 {len(stock_list)} 只股票")
         
-        # 在后台线程中执行分析
+        # 后台线程只负责编排，单只股票的分析在任务调度器中以批量优先级执行
         thread = threading.Thread(
             target=self._run_batch_analysis,
             args=(stock_list, message),
@@ -87,32 +180,56 @@ class BatchCommand(BotCommand):
         )
         thread.start()
         
+        progress_tip = (
+            "每只股票完成后将在此回复结论，全部完成后推送汇总报告。"
+            if self._progress_enabled(message) else "分析完成后将自动推送汇总报告。"
+        )
         return BotResponse.markdown_response(
             f"✅ **批量分析任务已启动**\n\n"
             f"• 分析数量: {len(stock_list)} 只\n"
             f"• 股票列表: {', '.join(stock_list[:5])}"
             f"{'...' if len(stock_list) > 5 else ''}\n\n"
-            f"分析完成后将自动推送汇总报告。"
+            f"{progress_tip}"
         )
     
+    @staticmethod
+    def _progress_enabled(message: BotMessage) -> bool:
+        """进度回复需要开启配置且消息来自可回复的会话"""
+        from src.config import get_config
+        from src.notification import NotificationService
+        
+        if get_config().bot_progress_interval < 0:
+            return False
+        return NotificationService(source_message=message).has_context_channel()
+    
     def _run_batch_analysis(self, stock_list: List[str], message: BotMessage) -> None:
         """后台执行批量分析"""
         try:
             from src.config import get_config
             from main import StockAnalysisPipeline
+            from src.core.services import get_service_container
             
             config = get_config()
             
-            # 创建分析管道
-            pipeline = StockAnalysisPipeline(config=config)
+            # 创建分析管道（复用共享的数据源、AI 分析器和搜索服务）
+            pipeline = StockAnalysisPipeline(config=config, services=get_service_container())
+            
+            reporter = None
+            if self._progress_enabled(message):
+                reporter = BatchProgressReporter(message, len(stock_list), config.bot_progress_interval)
             
             # 执行分析（会自动推送汇总报告）
             results = pipeline.run(
                 stock_codes=stock_list,
                 dry_run=False,
-                send_notification=True
+                send_notification=True,
+                job_user=message.user_id,
+                on_stock_done=reporter
             )
             
+            if reporter is not None:
+                reporter.finish(report_pushed=bool(results) and pipeline.notifier.is_available())
+            
             logger.info(f"[BatchCommand] 批量分析完成，成功 {len(results)} 只")
             
         except Exception as e:
@@ -8,11 +8,11 @@
 """
 
 import logging
-import threading
 from typing import List
 
 from bot.commands.base import BotCommand
 from bot.models import BotMessage, BotResponse
+from src.job_scheduler import JobPriority, JobRejected, get_job_scheduler
 
 logger = logging.getLogger(__name__)
 
@@ -47,17 +47,25 @@ class MarketCommand(BotCommand):
     def usage(self) -> str:
         return "/market"
 
+    @property
+    def rate_cost(self) -> int:
+        """大盘复盘按 3 次请求计费"""
+        return 3
+
     def execute(self, message: BotMessage, args: List[str]) -> BotResponse:
         """执行大盘复盘命令"""
         logger.info(f"[MarketCommand] 开始大盘复盘分析")
 
-        # 在后台线程中执行复盘（避免阻塞）
-        thread = threading.Thread(
-            target=self._run_market_review,
-            args=(message,),
-            daemon=True
-        )
-        thread.start()
+        # 提交到任务调度器执行（大盘复盘优先级最低，队列已满时直接拒绝）
+        try:
+            get_job_scheduler().submit(
+                self._run_market_review, message,
+                priority=JobPriority.MARKET,
+                user=message.user_id,
+                name="market_review"
+            )
+        except JobRejected as e:
+            return BotResponse.error_response(f"系统繁忙，请稍后再试（{e}）")
 
         return BotResponse.markdown_response(
             "✅ **大盘复盘任务已启动**\n\n"
@@ -75,25 +83,20 @@ class MarketCommand(BotCommand):
             from src.config import get_config
             from src.notification import NotificationService
             from src.market_analyzer import MarketAnalyzer
-            from src.search_service import SearchService
-            from src.analyzer import GeminiAnalyzer
+            from src.core.services import get_service_container
 
             config = get_config()
+            services = get_service_container()
+            # 通知服务绑定触发消息，按请求创建；搜索服务和 AI 分析器复用共享实例
             notifier = NotificationService(source_message=message)
 
-            # 初始化搜索服务
             search_service = None
             if config.bocha_api_keys or config.tavily_api_keys or config.serpapi_keys:
-                search_service = SearchService(
-                    bocha_keys=config.bocha_api_keys,
-                    tavily_keys=config.tavily_api_keys,
-                    serpapi_keys=config.serpapi_keys
-                )
+                search_service = services.search_service
 
-            # 初始化 AI 分析器
             analyzer = None
             if config.gemini_api_key or config.openai_api_key:
-                analyzer = GeminiAnalyzer()
+                analyzer = services.analyzer
 
             # 执行复盘
             market_analyzer = MarketAnalyzer(
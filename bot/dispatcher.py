@@ -8,8 +8,8 @@
 """
 
 import logging
+import threading
 import time
-from collections import defaultdict
 from typing import Dict, List, Optional, Type, Callable
 
 from bot.models import BotMessage, BotResponse
@@ -18,11 +18,22 @@ from bot.commands.base import BotCommand
 logger = logging.getLogger(__name__)
 
 
+class _WindowState:
+    """单个用户的固定窗口计数（当前窗口 + 上一窗口）"""
+    __slots__ = ('index', 'current', 'previous')
+
+    def __init__(self, index: int):
+        self.index = index
+        self.current = 0
+        self.previous = 0
+
+
 class RateLimiter:
     """
     简单的频率限制器
     
-    基于滑动窗口算法，限制每个用户的请求频率。
+    基于滑动窗口计数器算法（按上一窗口计数的剩余比例加权估算），
+    每个用户只保存两个计数，检查为 O(1)；每隔一个窗口清理一次空闲用户。
     """
     
     def __init__(self, max_requests: int = 10, window_seconds: int = 60):
@@ -32,48 +43,70 @@ class RateLimiter:
             window_seconds: 窗口时间（秒）
         """
         self.max_requests = max_requests
-        self.window_seconds = window_seconds
-        self._requests: Dict[str, List[float]] = defaultdict(list)
+        self.window_seconds = max(1, window_seconds)
+        self._states: Dict[str, _WindowState] = {}
+        self._lock = threading.Lock()
+        self._last_sweep = int(time.time() // self.window_seconds)
     
-    def is_allowed(self, user_id: str) -> bool:
+    def is_allowed(self, user_id: str, cost: int = 1) -> bool:
         """
         检查用户是否允许请求
         
         Args:
             user_id: 用户标识
+            cost: 本次请求消耗的配额（重量级命令可大于 1，上限为 max_requests）
             
         Returns:
             是否允许
         """
+        cost = min(max(1, cost), self.max_requests)
         now = time.time()
-        window_start = now - self.window_seconds
         
-        # 清理过期记录
-        self._requests[user_id] = [
-            t for t in self._requests[user_id] 
-            if t > window_start
-        ]
-        
-        # 检查是否超限
-        if len(self._requests[user_id]) >= self.max_requests:
-            return False
-        
-        # 记录本次请求
-        self._requests[user_id].append(now)
-        return True
+        with self._lock:
+            index = self._sweep(now)
+            state = self._states.get(user_id)
+            if state is None:
+                state = self._states[user_id] = _WindowState(index)
+            
+            # 检查是否超限
+            if self._estimate(state, now, index) + cost > self.max_requests:
+                return False
+            
+            # 记录本次请求
+            state.current += cost
+            return True
     
     def get_remaining(self, user_id: str) -> int:
         """获取剩余可用请求数"""
         now = time.time()
-        window_start = now - self.window_seconds
         
-        # 清理过期记录
-        self._requests[user_id] = [
-            t for t in self._requests[user_id] 
-            if t > window_start
-        ]
-        
-        return max(0, self.max_requests - len(self._requests[user_id]))
+        with self._lock:
+            state = self._states.get(user_id)
+            if state is None:
+                return self.max_requests
+            used = self._estimate(state, now, int(now // self.window_seconds))
+            return max(0, int(self.max_requests - used))
+    
+    def _estimate(self, state: _WindowState, now: float, index: int) -> float:
+        """滑动窗口内的估算请求数（调用方持有锁）"""
+        if index != state.index:
+            state.previous = state.current if index == state.index + 1 else 0
+            state.current = 0
+            state.index = index
+        elapsed = (now % self.window_seconds) / self.window_seconds
+        return state.previous * (1 - elapsed) + state.current
+    
+    def _sweep(self, now: float) -> int:
+        """每个窗口清理一次两个窗口内没有请求的用户（调用方持有锁），返回当前窗口序号"""
+        index = int(now // self.window_seconds)
+        if index > self._last_sweep:
+            self._last_sweep = index
+            idle = [user for user, state in self._states.items() if state.index < index - 1]
+            for user in idle:
+                del self._states[user]
+            if idle:
+                logger.debug(f"[RateLimiter] 清理空闲用户 {len(idle)} 个，当前 {len(self._states)} 个")
+        return index
 
 
 class CommandDispatcher:
@@ -237,16 +270,18 @@ class CommandDispatcher:
         Returns:
             响应对象
         """
-        # 1. 检查频率限制
-        if not self._rate_limiter.is_allowed(message.user_id):
+        # 1. 解析命令和参数
+        cmd_name, args = message.get_command_and_args(self.command_prefix)
+        command = self.get_command(cmd_name) if cmd_name is not None else None
+        
+        # 2. 检查频率限制（按命令权重计费）
+        cost = command.rate_cost if command is not None else 1
+        if not self._rate_limiter.is_allowed(message.user_id, cost):
             remaining_time = self._rate_limiter.window_seconds
             return BotResponse.error_response(
                 f"请求过于频繁，请 {remaining_time} 秒后再试"
             )
         
-        # 2. 解析命令和参数
-        cmd_name, args = message.get_command_and_args(self.command_prefix)
-        
         if cmd_name is None:
             # 不是命令，检查是否 @了机器人
             if message.mentioned:
@@ -259,9 +294,7 @@ class CommandDispatcher:
         
         logger.info(f"[Dispatcher] 收到命令: {cmd_name}, 参数: {args}, 用户: {message.user_name}")
         
-        # 3. 查找命令处理器
-        command = self.get_command(cmd_name)
-        
+        # 3. 检查命令是否存在
         if command is None:
             return BotResponse.error_response(
                 f"未知命令: {cmd_name}\n"
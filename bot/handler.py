@@ -5,13 +5,23 @@ Bot Webhook 处理器
 ===================================
 
 处理各平台的 Webhook 回调，分发到命令处理器。
+
+快速确认：
+- 验证签名、解析消息后立即返回 200，命令在后台线程池中执行，结果通过平台会话主动回复
+  （平台不支持主动回复时仍同步执行，结果放在 Webhook 响应中）
+- 按事件 ID 去重：飞书/钉钉在未及时确认时会重试推送，重复事件直接确认而不再执行
 """
 
+import hashlib
 import json
 import logging
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
 from typing import Dict, Any, Optional, TYPE_CHECKING
 
-from bot.models import WebhookResponse
+from bot.models import BotMessage, WebhookResponse
 from bot.dispatcher import get_dispatcher
 from bot.platforms import ALL_PLATFORMS
 
@@ -23,6 +33,90 @@ logger = logging.getLogger(__name__)
 # 平台实例缓存
 _platform_instances: Dict[str, 'BotPlatform'] = {}
 
+# 后台执行命令的线程数（命令本身只做参数校验和任务提交，分析在任务调度器中执行）
+WEBHOOK_WORKERS = 4
+
+# 去重记录上限
+MAX_SEEN_EVENTS = 10000
+
+
+class EventDeduplicator:
+    """
+    Webhook 事件去重
+
+    记录最近 ttl 秒内处理过的事件 ID（有上限，按时间淘汰）。
+    """
+
+    def __init__(self, ttl_seconds: float = 600, max_events: int = MAX_SEEN_EVENTS):
+        self.ttl_seconds = ttl_seconds
+        self.max_events = max_events
+        self._seen: 'OrderedDict[str, float]' = OrderedDict()
+        self._lock = threading.Lock()
+
+    def check_and_mark(self, event_id: str) -> bool:
+        """
+        记录事件
+
+        Returns:
+            True 表示首次出现（需要处理），False 表示重复事件
+        """
+        now = time.time()
+        with self._lock:
+            # 按插入顺序淘汰过期记录
+            while self._seen:
+                seen_at = next(iter(self._seen.values()))
+                if now - seen_at < self.ttl_seconds and len(self._seen) < self.max_events:
+                    break
+                self._seen.popitem(last=False)
+
+            if event_id in self._seen:
+                return False
+            self._seen[event_id] = now
+            return True
+
+
+_deduplicator: Optional[EventDeduplicator] = None
+_executor: Optional[ThreadPoolExecutor] = None
+_init_lock = threading.Lock()
+
+
+def _get_deduplicator(ttl_seconds: float) -> EventDeduplicator:
+    global _deduplicator
+
+    if _deduplicator is None:
+        with _init_lock:
+            if _deduplicator is None:
+                _deduplicator = EventDeduplicator(ttl_seconds)
+    return _deduplicator
+
+
+def _get_executor() -> ThreadPoolExecutor:
+    global _executor
+
+    if _executor is None:
+        with _init_lock:
+            if _executor is None:
+                _executor = ThreadPoolExecutor(max_workers=WEBHOOK_WORKERS, thread_name_prefix="bot-webhook")
+    return _executor
+
+
+def _event_id(message: BotMessage, body: bytes) -> str:
+    """事件 ID：平台消息 ID，缺失时使用请求体摘要"""
+    if message.message_id:
+        return f"{message.platform}:{message.message_id}"
+    return f"{message.platform}:sha1:{hashlib.sha1(body).hexdigest()}"
+
+
+def _process_message_async(platform: 'BotPlatform', message: BotMessage) -> None:
+    """后台执行命令并主动回复"""
+    try:
+        response = get_dispatcher().dispatch(message)
+        if response.text and not platform.send_async_response(response, message):
+            logger.error(f"[BotHandler] 回复发送失败: platform={message.platform}, msg={message.message_id}")
+    except Exception as e:
+        logger.error(f"[BotHandler] 后台处理消息失败: {e}")
+        logger.exception(e)
+
 
 def get_platform(platform_name: str) -> Optional['BotPlatform']:
     """
@@ -106,6 +200,19 @@ def handle_webhook(
     
     logger.info(f"[BotHandler] 解析到消息: user={message.user_name}, content={message.content[:50]}")
     
+    # 平台重试推送的重复事件直接确认
+    dedup_seconds = getattr(config, 'bot_webhook_dedup_seconds', 600)
+    if dedup_seconds > 0:
+        event_id = _event_id(message, body)
+        if not _get_deduplicator(dedup_seconds).check_and_mark(event_id):
+            logger.info(f"[BotHandler] 重复事件，已忽略: {event_id}")
+            return WebhookResponse.success()
+    
+    # 快速确认：命令在后台执行，结果通过会话主动回复
+    if getattr(config, 'bot_webhook_async', True) and platform.can_reply_async(message):
+        _get_executor().submit(_process_message_async, platform, message)
+        return WebhookResponse.success()
+    
     # 分发到命令处理器
     dispatcher = get_dispatcher()
     response = dispatcher.dispatch(message)
@@ -101,6 +101,28 @@ class BotPlatform(ABC):
         """
         pass
     
+    def can_reply_async(self, message: BotMessage) -> bool:
+        """
+        是否支持在 Webhook 返回之后主动回复该消息
+
+        支持时，处理器先确认 Webhook 再异步执行命令，结果通过 send_async_response 推送。
+        子类可重写此方法。
+        """
+        return False
+
+    def send_async_response(self, response: BotResponse, message: BotMessage) -> bool:
+        """
+        主动发送命令响应（Webhook 已提前确认的场景）
+
+        Args:
+            response: 统一响应对象
+            message: 原始消息对象
+
+        Returns:
+            是否发送成功
+        """
+        return False
+
     def handle_challenge(self, data: Dict[str, Any]) -> Optional[WebhookResponse]:
         """
         处理平台验证请求
@@ -240,6 +240,16 @@ class DingtalkPlatform(BotPlatform):
         
         return WebhookResponse.success(body)
     
+    def can_reply_async(self, message: BotMessage) -> bool:
+        """带 sessionWebhook 的消息可以在 Webhook 返回后再回复"""
+        return bool(message.raw_data.get('_session_webhook'))
+
+    def send_async_response(self, response: BotResponse, message: BotMessage) -> bool:
+        """通过 sessionWebhook 推送命令响应"""
+        return self.send_by_session_webhook(
+            message.raw_data.get('_session_webhook', ''), response, message
+        )
+
     def send_by_session_webhook(
         self, 
         session_webhook: str, 
@@ -263,7 +273,7 @@ class DingtalkPlatform(BotPlatform):
             logger.warning("[DingTalk] 没有可用的 sessionWebhook")
             return False
         
-        import requests
+        from src.http_client import get_http_session
         
         try:
             # 构建消息
@@ -291,7 +301,7 @@ class DingtalkPlatform(BotPlatform):
                 }
             
             # 发送请求
-            resp = requests.post(
+            resp = get_http_session().post(
                 session_webhook,
                 json=payload,
                 timeout=10
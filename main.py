@@ -33,6 +33,7 @@ if os.getenv("GITHUB_ACTIONS") != "true":
 import argparse
 import logging
 import sys
+import threading
 import time
 from datetime import datetime, timezone, timedelta
 from logging.handlers import RotatingFileHandler
@@ -42,7 +43,10 @@ from src.feishu_doc import FeishuDocManager
 
 from src.config import get_config, Config
 from src.notification import NotificationService
+from src.notification_outbox import get_notification_outbox
 from src.core.pipeline import StockAnalysisPipeline
+from src.core.services import get_service_container
+from src.job_scheduler import JobPriority, get_job_scheduler
 from src.core.market_review import run_market_review
 from src.search_service import SearchService
 from src.analyzer import GeminiAnalyzer
@@ -246,11 +250,17 @@ def run_full_analysis(
         market_report = ""
         if config.market_review_enabled and not args.no_market_review:
             # 只调用一次，并获取结果
-            review_result = run_market_review(
+            # 在任务调度器中以大盘复盘优先级执行，与 WebUI/机器人任务共用工作线程
+            review_result = get_job_scheduler().submit(
+                run_market_review,
                 notifier=pipeline.notifier,
                 analyzer=pipeline.analyzer,
-                search_service=pipeline.search_service
-            )
+                search_service=pipeline.search_service,
+                priority=JobPriority.MARKET,
+                user="schedule",
+                name="market_review",
+                block=True
+            ).result()
             # 如果有结果，赋值给 market_report 用于后续飞书文档生成
             if review_result:
                 market_report = review_result
@@ -349,6 +359,10 @@ def run_full_analysis(
         except Exception as e:
             logger.error(f"飞书文档生成失败: {e}")
         
+        # 等待推送队列投递完成（单次运行模式下进程随后退出）
+        if config.notification_outbox_enabled and not args.no_notify and not args.dry_run:
+            get_notification_outbox().flush(timeout=config.notification_channel_timeout)
+        
     except Exception as e:
         logger.exception(f"分析流程执行失败: {e}")
 
@@ -407,6 +421,10 @@ def main() -> int:
     logger.info(f"运行时间: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
     logger.info("=" * 60)
     
+    # 命令行 --workers 同时作为任务调度器的工作线程数（未单独配置 JOB_WORKERS 时）
+    if args.workers and not config.job_workers:
+        config.job_workers = args.workers
+    
     # 验证配置
     warnings = config.validate()
     for warning in warnings:
@@ -427,6 +445,10 @@ def main() -> int:
             from webui import run_server_in_thread
             run_server_in_thread(host=config.webui_host, port=config.webui_port)
             start_bot_stream_clients(config)
+            # 后台预热共享组件，首个 WebUI/机器人请求无需再初始化数据源和模型
+            threading.Thread(
+                target=get_service_container().warm_up, name="service-warmup", daemon=True
+            ).start()
         except Exception as e:
             logger.error(f"启动 WebUI 失败: {e}")
     
@@ -460,8 +482,8 @@ def main() -> int:
                     serpapi_keys=config.serpapi_keys
                 )
             
-            if config.gemini_api_key:
-                analyzer = GeminiAnalyzer(api_key=config.gemini_api_key)
+            if config.gemini_api_keys or config.openai_api_keys:
+                analyzer = GeminiAnalyzer()
             
             run_market_review(notifier, analyzer, search_service)
             return 0
@@ -12,9 +12,10 @@ A股自选股智能分析系统 - AI分析层
 
 import json
 import logging
+import threading
 import time
 from dataclasses import dataclass
-from typing import Optional, Dict, Any, List
+from typing import Optional, Dict, Any, List, Tuple, Callable
 
 from tenacity import (
     retry,
@@ -25,6 +26,10 @@ from tenacity import (
 )
 
 from src.config import get_config
+from src.llm_dispatcher import get_llm_dispatcher, estimate_tokens
+from src.llm_pool import LLMEndpoint, LLMEndpointPool
+from src.prompt_cache import GeminiContextCache, extract_usage, get_prompt_cache_stats
+from src.llm_stream import StreamingJSONParser
 
 logger = logging.getLogger(__name__)
 
@@ -419,172 +424,201 @@ class GeminiAnalyzer:
 3. **精确狙击点**：必须给出具体价格，不说模糊的话
 4. **检查清单可视化**：用 ✅⚠️❌ 明确显示每项检查结果
 5. **风险优先级**：舆情中的风险点要醒目标出"""
+    
+    # 分析任务要求（单股与批量提示词共用）
+    ANALYSIS_CHECKLIST = """### 重点关注（必须明确回答）：
+1. ❓ 是否满足 MA5>MA10>MA20 多头排列？
+2. ❓ 当前乖离率是否在安全范围内（<5%）？—— 超过5%必须标注"严禁追高"
+3. ❓ 量能是否配合（缩量回调/放量突破）？
+4. ❓ 筹码结构是否健康？
+5. ❓ 消息面有无重大利空？（减持、处罚、业绩变脸等）
+
+### 决策仪表盘要求：
+- **核心结论**：一句话说清该买/该卖/该等
+- **持仓分类建议**：空仓者怎么做 vs 持仓者怎么做
+- **具体狙击点位**：买入价、止损价、目标价（精确到分）
+- **检查清单**：每项用 ✅/⚠️/❌ 标记
+"""
+    
+    # 单股提示词的稳定前缀（所有股票相同，利于服务端前缀缓存）
+    SINGLE_TASK_PREFIX = f"""# 决策仪表盘分析请求
+
+## ✅ 分析任务
+
+请为下方股票生成【决策仪表盘】，严格按照 JSON 格式输出。
+
+{ANALYSIS_CHECKLIST}
+---
+
+"""
+    
+    # 批量提示词的稳定前缀
+    BATCH_TASK_PREFIX = f"""# 决策仪表盘批量分析请求
+
+## ✅ 批量分析任务
+
+请分别为下方每只股票生成【决策仪表盘】，每只股票独立分析，禁止混用其他股票的数据。
+
+{ANALYSIS_CHECKLIST}
+### 批量输出格式（必须严格遵守）：
+只输出一个 JSON 对象，不要输出其他内容：
+```json
+{{"results": [{{"stock_code": "股票代码", ...该股票完整的决策仪表盘 JSON 字段...}}, ...]}}
+```
+- results 必须包含下方全部股票，顺序与下文一致
+- 每个元素必须包含 stock_code 字段
+- 每个元素的其余字段与单股决策仪表盘 JSON 格式完全相同
+
+---
+"""
+    
+    # 批量模式下每只股票预留的输出 token 数
+    BATCH_OUTPUT_TOKENS_PER_STOCK = 6144
 
     def __init__(self, api_key: Optional[str] = None):
         """
         初始化 AI 分析器
         
-        优先级：Gemini > OpenAI 兼容 API
+        构建 (provider, key, model) 端点池，优先级：
+        Gemini 主模型 > Gemini 备选模型 > OpenAI 兼容 API
+        同一优先级内的多个 Key 负载均衡，某层全部熔断/限流时才降级到下一层
         
         Args:
-            api_key: Gemini API Key（可选，默认从配置读取）
+            api_key: Gemini API Key（可选，默认从配置读取，支持 GEMINI_API_KEYS 多 Key）
         """
         config = get_config()
-        self._api_key = api_key or config.gemini_api_key
-        self._model = None
-        self._current_model_name = None  # 当前使用的模型名称
-        self._using_fallback = False  # 是否正在使用备选模型
-        self._use_openai = False  # 是否使用 OpenAI 兼容 API
-        self._openai_client = None  # OpenAI 客户端
-        
-        # 检查 Gemini API Key 是否有效（过滤占位符）
-        gemini_key_valid = self._api_key and not self._api_key.startswith('your_') and len(self._api_key) > 10
-        
-        # 优先尝试初始化 Gemini
-        if gemini_key_valid:
-            try:
-                self._init_model()
-            except Exception as e:
-                logger.warning(f"Gemini 初始化失败: {e}，尝试 OpenAI 兼容 API")
-                self._init_openai_fallback()
-        else:
-            # Gemini Key 未配置，尝试 OpenAI
-            logger.info("Gemini API Key 未配置，尝试使用 OpenAI 兼容 API")
-            self._init_openai_fallback()
+        self._pool = LLMEndpointPool.from_config(config, gemini_keys=[api_key] if api_key else None)
+        self._client_lock = threading.Lock()
+        self._cache_stats = get_prompt_cache_stats()
         
-        # 两者都未配置
-        if not self._model and not self._openai_client:
+        # Gemini 显式上下文缓存：SYSTEM_PROMPT 只上传一次（仅单 Gemini Key 时可用）
+        self._context_cache: Optional[GeminiContextCache] = None
+        self._bound_caches: Dict[str, Any] = {}  # 端点名 -> 该端点模型绑定的 CachedContent（None 表示未使用缓存）
+        if config.llm_context_cache:
+            if len(self._gemini_keys()) == 1:
+                self._context_cache = GeminiContextCache(
+                    self.SYSTEM_PROMPT,
+                    ttl_seconds=config.llm_context_cache_ttl,
+                    stats=self._cache_stats,
+                )
+            elif self._gemini_keys():
+                logger.info("[提示词缓存] 多 Gemini Key 模式不使用显式上下文缓存，依赖服务端隐式前缀缓存")
+        
+        if self._pool.is_available:
+            logger.info(f"LLM 端点池初始化完成: {self._pool.describe()}")
+        else:
             logger.warning("未配置任何 AI API Key，AI 分析功能将不可用")
     
-    def _init_openai_fallback(self) -> None:
+    def _gemini_keys(self) -> set:
+        """端点池中的 Gemini Key 集合"""
+        return {ep.api_key for ep in self._pool.endpoints if ep.provider == 'gemini'}
+    
+    def _get_client(self, endpoint: LLMEndpoint) -> Any:
         """
-        初始化 OpenAI 兼容 API 作为备选
+        获取端点对应的 SDK 客户端（懒加载，每个端点只创建一次）
         
-        支持所有 OpenAI 格式的 API，包括：
-        - OpenAI 官方
-        - DeepSeek
-        - 通义千问
-        - Moonshot 等
-        """
-        config = get_config()
+        - Gemini：GenerativeModel（绑定该端点自己的 Key）
+        - OpenAI：OpenAI 客户端（支持自定义 base_url）
         
-        # 检查 OpenAI API Key 是否有效（过滤占位符）
-        openai_key_valid = (
-            config.openai_api_key and 
-            not config.openai_api_key.startswith('your_') and 
-            len(config.openai_api_key) > 10
-        )
+        Raises:
+            ImportError: 对应 SDK 未安装
+        """
+        if endpoint.client is not None and self._client_is_fresh(endpoint):
+            return endpoint.client
         
-        if not openai_key_valid:
-            logger.debug("OpenAI 兼容 API 未配置或配置无效")
-            return
+        # 创建显式缓存是网络请求，在客户端锁外完成，不阻塞其他端点
+        cached_content = None
+        if endpoint.provider == 'gemini' and self._context_cache is not None:
+            cached_content = self._get_context_cache(endpoint)
         
-        # 分离 import 和客户端创建，以便提供更准确的错误信息
-        try:
-            from openai import OpenAI
-        except ImportError:
-            logger.error("未安装 openai 库，请运行: pip install openai")
-            return
-        
-        try:
-            # base_url 可选，不填则使用 OpenAI 官方默认地址
-            client_kwargs = {"api_key": config.openai_api_key}
-            if config.openai_base_url and config.openai_base_url.startswith('http'):
-                client_kwargs["base_url"] = config.openai_base_url
+        with self._client_lock:
+            if endpoint.client is not None and self._client_is_fresh(endpoint):
+                return endpoint.client
             
-            self._openai_client = OpenAI(**client_kwargs)
-            self._current_model_name = config.openai_model
-            self._use_openai = True
-            logger.info(f"OpenAI 兼容 API 初始化成功 (base_url: {config.openai_base_url}, model: {config.openai_model})")
-        except ImportError as e:
-            # 依赖缺失（如 socksio）
-            if 'socksio' in str(e).lower() or 'socks' in str(e).lower():
-                logger.error(f"OpenAI 客户端需要 SOCKS 代理支持，请运行: pip install httpx[socks] 或 pip install socksio")
-            else:
-                logger.error(f"OpenAI 依赖缺失: {e}")
-        except Exception as e:
-            error_msg = str(e).lower()
-            if 'socks' in error_msg or 'socksio' in error_msg or 'proxy' in error_msg:
-                logger.error(f"OpenAI 代理配置错误: {e}，如使用 SOCKS 代理请运行: pip install httpx[socks]")
+            if endpoint.provider == 'gemini':
+                endpoint.client = self._create_gemini_model(endpoint, cached_content)
+                logger.info(f"Gemini 模型初始化成功 (端点: {endpoint.label})")
             else:
-                logger.error(f"OpenAI 兼容 API 初始化失败: {e}")
+                endpoint.client = self._create_openai_client(endpoint)
+                logger.info(f"OpenAI 兼容 API 初始化成功 (base_url: {endpoint.base_url}, model: {endpoint.model})")
+            
+            return endpoint.client
     
-    def _init_model(self) -> None:
+    def _client_is_fresh(self, endpoint: LLMEndpoint) -> bool:
         """
-        初始化 Gemini 模型
+        端点绑定的上下文缓存是否仍有效（缓存过期后需要重建模型）
         
-        配置：
-        - 使用 gemini-3-flash-preview 或 gemini-2.5-flash 模型
-        - 不启用 Google Search（使用外部 Tavily/SerpAPI 搜索）
+        未使用缓存的模型在缓存可以重新创建（退避结束）后也需要重建
         """
-        try:
-            import google.generativeai as genai
-            
-            # 配置 API Key
-            genai.configure(api_key=self._api_key)
-            
-            # 从配置获取模型名称
-            config = get_config()
-            model_name = config.gemini_model
-            fallback_model = config.gemini_model_fallback
-            
-            # 不再使用 Google Search Grounding（已知有兼容性问题）
-            # 改为使用外部搜索服务（Tavily/SerpAPI）预先获取新闻
-            
-            # 尝试初始化主模型
-            try:
-                self._model = genai.GenerativeModel(
-                    model_name=model_name,
-                    system_instruction=self.SYSTEM_PROMPT,
-                )
-                self._current_model_name = model_name
-                self._using_fallback = False
-                logger.info(f"Gemini 模型初始化成功 (模型: {model_name})")
-            except Exception as model_error:
-                # 尝试备选模型
-                logger.warning(f"主模型 {model_name} 初始化失败: {model_error}，尝试备选模型 {fallback_model}")
-                self._model = genai.GenerativeModel(
-                    model_name=fallback_model,
-                    system_instruction=self.SYSTEM_PROMPT,
-                )
-                self._current_model_name = fallback_model
-                self._using_fallback = True
-                logger.info(f"Gemini 备选模型初始化成功 (模型: {fallback_model})")
-            
-        except Exception as e:
-            logger.error(f"Gemini 模型初始化失败: {e}")
-            self._model = None
+        if endpoint.name not in self._bound_caches or self._context_cache is None:
+            return True
+        return self._context_cache.is_fresh(endpoint.model, self._bound_caches[endpoint.name])
     
-    def _switch_to_fallback_model(self) -> bool:
-        """
-        切换到备选模型
+    def _get_context_cache(self, endpoint: LLMEndpoint) -> Optional[Any]:
+        """获取端点模型的显式上下文缓存（不可用时返回 None）"""
+        import google.generativeai as genai
         
-        Returns:
-            是否成功切换
-        """
+        # 显式缓存使用 SDK 全局配置的 Key，需先完成配置
+        genai.configure(api_key=endpoint.api_key)
+        return self._context_cache.get(endpoint.model)
+    
+    def _create_gemini_model(self, endpoint: LLMEndpoint, cached_content: Optional[Any] = None) -> Any:
+        """创建绑定指定 Key 的 Gemini 模型（有可用的上下文缓存时基于缓存创建）"""
+        import google.generativeai as genai
+        
+        if self._context_cache is not None:
+            # 记录绑定结果（None 表示本次未使用缓存），供 _client_is_fresh 判断是否需要重建
+            self._bound_caches[endpoint.name] = cached_content
+            if cached_content is not None:
+                return genai.GenerativeModel.from_cached_content(cached_content=cached_content)
+        
+        # 不再使用 Google Search Grounding（已知有兼容性问题）
+        # 改为使用外部搜索服务（Tavily/SerpAPI）预先获取新闻
+        model = genai.GenerativeModel(
+            model_name=endpoint.model,
+            system_instruction=self.SYSTEM_PROMPT,
+        )
+        
+        if len(self._gemini_keys()) <= 1:
+            # 单 Key：沿用 SDK 的全局配置
+            genai.configure(api_key=endpoint.api_key)
+        else:
+            # 多 Key：genai.configure 是进程级全局配置，为每个模型绑定独立的客户端
+            from google.ai import generativelanguage as glm
+            model._client = glm.GenerativeServiceClient(client_options={"api_key": endpoint.api_key})
+        
+        return model
+    
+    def _create_openai_client(self, endpoint: LLMEndpoint) -> Any:
+        """创建 OpenAI 兼容客户端"""
         try:
-            import google.generativeai as genai
-            config = get_config()
-            fallback_model = config.gemini_model_fallback
-            
-            logger.warning(f"[LLM] 切换到备选模型: {fallback_model}")
-            self._model = genai.GenerativeModel(
-                model_name=fallback_model,
-                system_instruction=self.SYSTEM_PROMPT,
-            )
-            self._current_model_name = fallback_model
-            self._using_fallback = True
-            logger.info(f"[LLM] 备选模型 {fallback_model} 初始化成功")
-            return True
-        except Exception as e:
-            logger.error(f"[LLM] 切换备选模型失败: {e}")
-            return False
+            from openai import OpenAI
+        except ImportError:
+            raise ImportError("未安装 openai 库，请运行: pip install openai")
+        
+        # base_url 可选，不填则使用 OpenAI 官方默认地址
+        client_kwargs = {"api_key": endpoint.api_key}
+        if endpoint.base_url:
+            client_kwargs["base_url"] = endpoint.base_url
+        
+        try:
+            return OpenAI(**client_kwargs)
+        except ImportError as e:
+            # 依赖缺失（如 socksio）
+            if 'socks' in str(e).lower():
+                raise ImportError(f"OpenAI 客户端需要 SOCKS 代理支持，请运行: pip install httpx[socks] ({e})")
+            raise
     
     def is_available(self) -> bool:
         """检查分析器是否可用"""
-        return self._model is not None or self._openai_client is not None
+        return self._pool.is_available
     
-    def generate_content(self, prompt: str, temperature: float = 0.7) -> Optional[str]:
+    def generate_content(
+        self,
+        prompt: str,
+        temperature: float = 0.7,
+        max_output_tokens: int = 4096
+    ) -> Optional[str]:
         """
         通用内容生成接口（供外部模块调用）
         
@@ -593,6 +627,7 @@ class GeminiAnalyzer:
         Args:
             prompt: 提示词
             temperature: 温度参数（默认0.7）
+            max_output_tokens: 最大输出 token 数（默认4096）
             
         Returns:
             生成的文本内容，失败返回 None
@@ -604,7 +639,7 @@ class GeminiAnalyzer:
         try:
             generation_config = {
                 "temperature": temperature,
-                "max_output_tokens": 4096,
+                "max_output_tokens": max_output_tokens,
             }
             
             response_text = self._call_api_with_retry(prompt, generation_config)
@@ -614,147 +649,169 @@ class GeminiAnalyzer:
             logger.error(f"生成内容失败: {e}")
             return None
     
-    def _call_openai_api(self, prompt: str, generation_config: dict) -> str:
+    def _call_endpoint(
+        self,
+        endpoint: LLMEndpoint,
+        prompt: str,
+        generation_config: dict,
+        stream_parser: Optional[StreamingJSONParser] = None
+    ) -> str:
         """
-        调用 OpenAI 兼容 API
+        调用单个端点（不含重试）
         
         Args:
+            endpoint: LLM 端点
             prompt: 提示词
             generation_config: 生成配置
+            stream_parser: 流式解析器（传入时以流式方式调用，边接收边解析）
             
         Returns:
             响应文本
         """
-        config = get_config()
-        max_retries = config.gemini_max_retries
-        base_delay = config.gemini_retry_delay
+        client = self._get_client(endpoint)
         
-        for attempt in range(max_retries):
+        if endpoint.provider == 'gemini':
             try:
-                if attempt > 0:
-                    delay = base_delay * (2 ** (attempt - 1))
-                    delay = min(delay, 60)
-                    logger.info(f"[OpenAI] 第 {attempt + 1} 次重试，等待 {delay:.1f} 秒...")
-                    time.sleep(delay)
-                
-                config = get_config()
-                response = self._openai_client.chat.completions.create(
-                    model=self._current_model_name,
-                    messages=[
-                        {"role": "system", "content": self.SYSTEM_PROMPT},
-                        {"role": "user", "content": prompt}
-                    ],
-                    temperature=generation_config.get('temperature', config.openai_temperature),
-                    max_tokens=generation_config.get('max_output_tokens', 8192),
+                response = client.generate_content(
+                    prompt,
+                    generation_config=generation_config,
+                    stream=stream_parser is not None,
+                    request_options={"timeout": 120}
                 )
-                
-                if response and response.choices and response.choices[0].message.content:
-                    return response.choices[0].message.content
+                if stream_parser is not None:
+                    for chunk in response:
+                        try:
+                            stream_parser.feed(chunk.text)
+                        except ValueError:
+                            # 仅包含结束原因等元数据的分片没有 text
+                            continue
+                    text = stream_parser.text
                 else:
-                    raise ValueError("OpenAI API 返回空响应")
-                    
+                    text = response.text if response else ''
             except Exception as e:
-                error_str = str(e)
-                is_rate_limit = '429' in error_str or 'rate' in error_str.lower() or 'quota' in error_str.lower()
-                
-                if is_rate_limit:
-                    logger.warning(f"[OpenAI] API 限流，第 {attempt + 1}/{max_retries} 次尝试: {error_str[:100]}")
-                else:
-                    logger.warning(f"[OpenAI] API 调用失败，第 {attempt + 1}/{max_retries} 次尝试: {error_str[:100]}")
-                
-                if attempt == max_retries - 1:
-                    raise
+                # 服务端缓存提前失效：丢弃该缓存，下次请求重新创建
+                if self._bound_caches.get(endpoint.name) is not None and 'cache' in str(e).lower():
+                    self._context_cache.invalidate(endpoint.model)
+                    self._bound_caches.pop(endpoint.name, None)
+                    endpoint.client = None
+                raise
+            self._cache_stats.record(endpoint.provider, *extract_usage(endpoint.provider, response))
+            if text:
+                return text
+            raise ValueError("Gemini 返回空响应")
         
-        raise Exception("OpenAI API 调用失败，已达最大重试次数")
+        config = get_config()
+        request = {
+            "model": endpoint.model,
+            "messages": [
+                {"role": "system", "content": self.SYSTEM_PROMPT},
+                {"role": "user", "content": prompt}
+            ],
+            "temperature": generation_config.get('temperature', config.openai_temperature),
+            "max_tokens": generation_config.get('max_output_tokens', 8192),
+        }
+        
+        if stream_parser is None:
+            response = client.chat.completions.create(**request)
+            self._cache_stats.record(endpoint.provider, *extract_usage(endpoint.provider, response))
+            if response and response.choices and response.choices[0].message.content:
+                return response.choices[0].message.content
+            raise ValueError("OpenAI API 返回空响应")
+        
+        usage_chunk = None
+        for chunk in client.chat.completions.create(stream=True, **request):
+            if getattr(chunk, 'usage', None):
+                # 部分服务商在最后一个分片中返回 usage
+                usage_chunk = chunk
+            if chunk.choices and chunk.choices[0].delta and chunk.choices[0].delta.content:
+                stream_parser.feed(chunk.choices[0].delta.content)
+        if usage_chunk is not None:
+            self._cache_stats.record(endpoint.provider, *extract_usage(endpoint.provider, usage_chunk))
+        if stream_parser.text:
+            return stream_parser.text
+        raise ValueError("OpenAI API 返回空响应")
     
-    def _call_api_with_retry(self, prompt: str, generation_config: dict) -> str:
+    def _call_api_with_retry(
+        self,
+        prompt: str,
+        generation_config: dict,
+        stream_parser: Optional[StreamingJSONParser] = None
+    ) -> str:
         """
-        调用 AI API，带有重试和模型切换机制
+        调用 AI API，带有重试和端点切换机制
         
-        优先级：Gemini > Gemini 备选模型 > OpenAI 兼容 API
-        
-        处理 429 限流错误：
-        1. 先指数退避重试
-        2. 多次失败后切换到备选模型
-        3. Gemini 完全失败后尝试 OpenAI
+        每次尝试都从端点池重新选择端点（不再整实例粘滞在某个模型上）：
+        1. 429 限流：上报调度器，该端点进入共享冷却，下次尝试自动换到其他 Key/模型
+        2. 其他错误：本次调用内跳过该端点；所有端点都失败过一轮后指数退避再重试
+        3. 连续失败的端点由端点池熔断，冷却后自动恢复
         
         Args:
             prompt: 提示词
             generation_config: 生成配置
+            stream_parser: 流式解析器（可选，每次重试前重置）
             
         Returns:
             响应文本
         """
-        # 如果已经在使用 OpenAI 模式，直接调用 OpenAI
-        if self._use_openai:
-            return self._call_openai_api(prompt, generation_config)
-        
         config = get_config()
-        max_retries = config.gemini_max_retries
+        max_attempts = config.gemini_max_retries + len(self._pool) - 1
         base_delay = config.gemini_retry_delay
+        dispatcher = get_llm_dispatcher()
+        estimated_tokens = estimate_tokens(self.SYSTEM_PROMPT) + estimate_tokens(prompt)
         
         last_error = None
-        tried_fallback = getattr(self, '_using_fallback', False)
+        failed_endpoints: set = set()
+        backoff_round = 0
         
-        for attempt in range(max_retries):
+        for attempt in range(max_attempts):
+            endpoint = self._pool.acquire(exclude=failed_endpoints)
+            if endpoint is None:
+                break
+            
+            rate_limited = False
+            if stream_parser is not None:
+                stream_parser.reset()
             try:
-                # 请求前增加延时（防止请求过快触发限流）
+                with dispatcher.slot(endpoint.budget_key, estimated_tokens):
+                    response_text = self._call_endpoint(endpoint, prompt, generation_config, stream_parser)
+                
+                self._pool.release(endpoint, success=True)
+                dispatcher.report_success(endpoint.budget_key)
                 if attempt > 0:
-                    delay = base_delay * (2 ** (attempt - 1))  # 指数退避: 5, 10, 20, 40...
-                    delay = min(delay, 60)  # 最大60秒
-                    logger.info(f"[Gemini] 第 {attempt + 1} 次重试，等待 {delay:.1f} 秒...")
-                    time.sleep(delay)
+                    logger.info(f"[LLM] 第 {attempt + 1} 次尝试成功 (端点: {endpoint.label})")
+                return response_text
                 
-                response = self._model.generate_content(
-                    prompt,
-                    generation_config=generation_config,
-                    request_options={"timeout": 120}
-                )
+            except ImportError as e:
+                # SDK 未安装：该端点永久不可用
+                last_error = e
+                self._pool.release(endpoint, success=False)
+                self._pool.disable(endpoint, str(e))
+                continue
                 
-                if response and response.text:
-                    return response.text
-                else:
-                    raise ValueError("Gemini 返回空响应")
-                    
             except Exception as e:
                 last_error = e
                 error_str = str(e)
                 
                 # 检查是否是 429 限流错误
-                is_rate_limit = '429' in error_str or 'quota' in error_str.lower() or 'rate' in error_str.lower()
+                rate_limited = '429' in error_str or 'quota' in error_str.lower() or 'rate' in error_str.lower()
+                self._pool.release(endpoint, success=False, rate_limited=rate_limited)
                 
-                if is_rate_limit:
-                    logger.warning(f"[Gemini] API 限流 (429)，第 {attempt + 1}/{max_retries} 次尝试: {error_str[:100]}")
-                    
-                    # 如果已经重试了一半次数且还没切换过备选模型，尝试切换
-                    if attempt >= max_retries // 2 and not tried_fallback:
-                        if self._switch_to_fallback_model():
-                            tried_fallback = True
-                            logger.info("[Gemini] 已切换到备选模型，继续重试")
-                        else:
-                            logger.warning("[Gemini] 切换备选模型失败，继续使用当前模型重试")
-                else:
-                    # 非限流错误，记录并继续重试
-                    logger.warning(f"[Gemini] API 调用失败，第 {attempt + 1}/{max_retries} 次尝试: {error_str[:100]}")
-        
-        # Gemini 所有重试都失败，尝试 OpenAI 兼容 API
-        if self._openai_client:
-            logger.warning("[Gemini] 所有重试失败，切换到 OpenAI 兼容 API")
-            try:
-                return self._call_openai_api(prompt, generation_config)
-            except Exception as openai_error:
-                logger.error(f"[OpenAI] 备选 API 也失败: {openai_error}")
-                raise last_error or openai_error
-        elif config.openai_api_key and config.openai_base_url:
-            # 尝试懒加载初始化 OpenAI
-            logger.warning("[Gemini] 所有重试失败，尝试初始化 OpenAI 兼容 API")
-            self._init_openai_fallback()
-            if self._openai_client:
-                try:
-                    return self._call_openai_api(prompt, generation_config)
-                except Exception as openai_error:
-                    logger.error(f"[OpenAI] 备选 API 也失败: {openai_error}")
-                    raise last_error or openai_error
+                if rate_limited:
+                    logger.warning(f"[LLM] {endpoint.label} 限流 (429)，第 {attempt + 1}/{max_attempts} 次尝试: {error_str[:100]}")
+                    # 由调度器统一冷却，端点池下次会优先选择其他端点
+                    dispatcher.report_rate_limit(endpoint.budget_key)
+                    continue
+                
+                logger.warning(f"[LLM] {endpoint.label} 调用失败，第 {attempt + 1}/{max_attempts} 次尝试: {error_str[:100]}")
+                failed_endpoints.add(endpoint.name)
+            
+            # 所有可用端点都失败过一轮：指数退避后重新尝试
+            if len(failed_endpoints) >= self._pool.usable_count() and attempt < max_attempts - 1:
+                delay = min(base_delay * (2 ** backoff_round), 60)  # 指数退避: 5, 10, 20, 40...
+                backoff_round += 1
+                logger.info(f"[LLM] 所有端点均失败，等待 {delay:.1f} 秒后重试...")
+                time.sleep(delay)
+                failed_endpoints.clear()
         
         # 所有方式都失败
         raise last_error or Exception("所有 AI API 调用失败，已达最大重试次数")
@@ -762,7 +819,8 @@ class GeminiAnalyzer:
     def analyze(
         self, 
         context: Dict[str, Any],
-        news_context: Optional[str] = None
+        news_context: Optional[str] = None,
+        on_conclusion: Optional[Callable[[AnalysisResult], None]] = None
     ) -> AnalysisResult:
         """
         分析单只股票
@@ -776,28 +834,17 @@ class GeminiAnalyzer:
         Args:
             context: 从 storage.get_analysis_context() 获取的上下文数据
             news_context: 预先搜索的新闻内容（可选）
+            on_conclusion: 核心结论回调（可选）。传入且 LLM_STREAMING 开启时以流式方式调用，
+                核心结论一生成就回调一个只含核心字段的 AnalysisResult（在独立线程中执行）
             
         Returns:
             AnalysisResult 对象
         """
         code = context.get('code', 'Unknown')
-        config = get_config()
         
-        # 请求前增加延时（防止连续请求触发限流）
-        request_delay = config.gemini_request_delay
-        if request_delay > 0:
-            logger.debug(f"[LLM] 请求前等待 {request_delay:.1f} 秒...")
-            time.sleep(request_delay)
+        # 请求节奏（GEMINI_REQUEST_DELAY / RPM / TPM）由全局 LLM 调度器统一控制
         
-        # 优先从上下文获取股票名称（由 main.py 传入）
-        name = context.get('stock_name')
-        if not name or name.startswith('股票'):
-            # 备选：从 realtime 中获取
-            if 'realtime' in context and context['realtime'].get('name'):
-                name = context['realtime']['name']
-            else:
-                # 最后从映射表获取
-                name = STOCK_NAME_MAP.get(code, f'股票{code}')
+        name = self._resolve_stock_name(context)
         
         # 如果模型不可用，返回默认结果
         if not self.is_available():
@@ -818,20 +865,15 @@ class GeminiAnalyzer:
             # 格式化输入（包含技术面数据和新闻）
             prompt = self._format_prompt(context, name, news_context)
             
-            # 获取模型名称
-            model_name = getattr(self, '_current_model_name', None)
-            if not model_name:
-                model_name = getattr(self._model, '_model_name', 'unknown')
-                if hasattr(self._model, 'model_name'):
-                    model_name = self._model.model_name
-            
             logger.info(f"========== AI 分析 {name}({code}) ==========")
-            logger.info(f"[LLM配置] 模型: {model_name}")
+            logger.info(f"[LLM配置] 端点池: {self._pool.describe()}")
             logger.info(f"[LLM配置] Prompt 长度: {len(prompt)} 字符")
             logger.info(f"[LLM配置] 是否包含新闻: {'是' if news_context else '否'}")
             
             # 记录完整 prompt 到日志（INFO级别记录摘要，DEBUG记录完整）
-            prompt_preview = prompt[:500] + "..." if len(prompt) > 500 else prompt
+            # 跳过所有股票相同的稳定前缀，只预览股票数据部分
+            stock_part = prompt[len(self.SINGLE_TASK_PREFIX):]
+            prompt_preview = stock_part[:500] + "..." if len(stock_part) > 500 else stock_part
             logger.info(f"[LLM Prompt 预览]\n{prompt_preview}")
             logger.debug(f"=== 完整 Prompt ({len(prompt)}字符) ===\n{prompt}\n=== End Prompt ===")
 
@@ -842,15 +884,23 @@ class GeminiAnalyzer:
                 "max_output_tokens": 8192,
             }
 
-            logger.info(f"[LLM调用] 开始调用 Gemini API (temperature={generation_config['temperature']}, max_tokens={generation_config['max_output_tokens']})...")
+            # 交互场景使用流式响应，核心结论生成后立即回调
+            stream_parser = None
+            if on_conclusion is not None and config.llm_streaming:
+                stream_parser = self._create_conclusion_parser(code, name, on_conclusion)
+            
+            logger.info(
+                f"[LLM调用] 开始调用 LLM API (temperature={generation_config['temperature']}, "
+                f"max_tokens={generation_config['max_output_tokens']}, 流式: {'是' if stream_parser else '否'})..."
+            )
             
             # 使用带重试的 API 调用
             start_time = time.time()
-            response_text = self._call_api_with_retry(prompt, generation_config)
+            response_text = self._call_api_with_retry(prompt, generation_config, stream_parser=stream_parser)
             elapsed = time.time() - start_time
             
             # 记录响应信息
-            logger.info(f"[LLM返回] Gemini API 响应成功, 耗时 {elapsed:.2f}s, 响应长度 {len(response_text)} 字符")
+            logger.info(f"[LLM返回] LLM API 响应成功, 耗时 {elapsed:.2f}s, 响应长度 {len(response_text)} 字符")
             
             # 记录响应预览（INFO级别）和完整响应（DEBUG级别）
             response_preview = response_text[:300] + "..." if len(response_text) > 300 else response_text
@@ -881,6 +931,58 @@ class GeminiAnalyzer:
                 error_message=str(e),
             )
     
+    def _create_conclusion_parser(
+        self,
+        code: str,
+        name: str,
+        on_conclusion: Callable[[AnalysisResult], None]
+    ) -> StreamingJSONParser:
+        """
+        创建流式解析器：dashboard.core_conclusion.one_sentence 一生成就回调
+        
+        JSON 中评分、趋势、操作建议排在核心结论之前，回调时这些字段也已就绪。
+        回调只触发一次（重试重新解析时不重复），并在独立线程中执行，不阻塞流式接收。
+        """
+        notified = threading.Event()
+        
+        def on_field(path: str, value: Any) -> None:
+            if path != 'dashboard.core_conclusion.one_sentence' or notified.is_set():
+                return
+            notified.set()
+            
+            fields = parser.fields
+            score = fields.get('sentiment_score')
+            partial = AnalysisResult(
+                code=code,
+                name=name,
+                sentiment_score=int(score) if isinstance(score, (int, float)) else 50,
+                trend_prediction=str(fields.get('trend_prediction', '震荡')),
+                operation_advice=str(fields.get('operation_advice', '持有')),
+                confidence_level=str(fields.get('confidence_level', '中')),
+                dashboard={'core_conclusion': {'one_sentence': str(value)}},
+                analysis_summary=str(value),
+            )
+            logger.info(f"[LLM流式] {name}({code}) 核心结论已生成: {value}")
+            threading.Thread(target=on_conclusion, args=(partial,), daemon=True).start()
+        
+        parser = StreamingJSONParser(on_field=on_field)
+        return parser
+    
+    def _resolve_stock_name(self, context: Dict[str, Any]) -> str:
+        """解析股票名称：上下文 > 实时行情 > 映射表"""
+        code = context.get('code', 'Unknown')
+        
+        # 优先从上下文获取股票名称（由 main.py 传入）
+        name = context.get('stock_name')
+        if not name or name.startswith('股票'):
+            # 备选：从 realtime 中获取
+            if 'realtime' in context and context['realtime'].get('name'):
+                name = context['realtime']['name']
+            else:
+                # 最后从映射表获取
+                name = STOCK_NAME_MAP.get(code, f'股票{code}')
+        return name
+    
     def _format_prompt(
         self, 
         context: Dict[str, Any], 
@@ -898,18 +1000,48 @@ class GeminiAnalyzer:
             news_context: 预先搜索的新闻内容
         """
         code = context.get('code', 'Unknown')
+        stock_name = self._prompt_stock_name(context, name)
         
-        # 优先使用上下文中的股票名称（从 realtime_quote 获取）
+        # 稳定前缀：任务说明与分析要求对所有股票完全相同，放在最前面以命中服务端前缀缓存
+        prompt = self.SINGLE_TASK_PREFIX
+        prompt += self._format_stock_data(context, name, news_context)
+        
+        # 变化部分放在末尾
+        prompt += f"""
+---
+
+请输出 **{stock_name}({code})** 完整的 JSON 格式决策仪表盘。"""
+        
+        return prompt
+    
+    def _prompt_stock_name(self, context: Dict[str, Any], name: str) -> str:
+        """提示词中使用的股票名称（优先使用上下文中的名称）"""
+        code = context.get('code', 'Unknown')
         stock_name = context.get('stock_name', name)
         if not stock_name or stock_name == f'股票{code}':
             stock_name = STOCK_NAME_MAP.get(code, f'股票{code}')
+        return stock_name
+    
+    def _format_stock_data(
+        self,
+        context: Dict[str, Any],
+        name: str,
+        news_context: Optional[str] = None
+    ) -> str:
+        """
+        格式化单只股票的数据部分（技术面 + 实时行情 + 筹码 + 趋势 + 舆情）
+        
+        单股提示词与批量提示词共用
+        """
+        code = context.get('code', 'Unknown')
+        
+        # 优先使用上下文中的股票名称（从 realtime_quote 获取）
+        stock_name = self._prompt_stock_name(context, name)
             
         today = context.get('today', {})
         
         # ========== 构建决策仪表盘格式的输入 ==========
-        prompt = f"""# 决策仪表盘分析请求
-
-## 📊 股票基础信息
+        prompt = f"""## 📊 股票基础信息
 | 项目 | 数据 |
 |------|------|
 | 股票代码 | **{code}** |
@@ -1037,28 +1169,32 @@ class GeminiAnalyzer:
 在回答技术面问题（如均线、乖离率）时，请直接说明“数据缺失，无法判断”，**严禁编造数据**。
 """
         
-        # 明确的输出要求
+        return prompt
+    
+    def _format_batch_prompt(self, entries: List[Tuple[Dict[str, Any], str, Optional[str]]]) -> str:
+        """
+        格式化多股票批量分析提示词
+        
+        多只股票共享一次 SYSTEM_PROMPT 与任务说明，要求模型输出
+        {"results": [...]} 结构，每个元素是一只股票的完整决策仪表盘 JSON
+        
+        Args:
+            entries: [(上下文, 股票名称, 新闻内容), ...]
+        """
+        codes = [ctx.get('code', 'Unknown') for ctx, _, _ in entries]
+        total = len(entries)
+        
+        # 稳定前缀在前，各股票数据在后
+        prompt = self.BATCH_TASK_PREFIX
+        for i, (context, name, news_context) in enumerate(entries, 1):
+            stock_name = self._prompt_stock_name(context, name)
+            prompt += f"\n\n# 股票 {i}/{total}：{stock_name}({context.get('code', 'Unknown')})\n\n"
+            prompt += self._format_stock_data(context, name, news_context)
+        
         prompt += f"""
 ---
 
-## ✅ 分析任务
-
-请为 **{stock_name}({code})** 生成【决策仪表盘】，严格按照 JSON 格式输出。
-
-### 重点关注（必须明确回答）：
-1. ❓ 是否满足 MA5>MA10>MA20 多头排列？
-2. ❓ 当前乖离率是否在安全范围内（<5%）？—— 超过5%必须标注"严禁追高"
-3. ❓ 量能是否配合（缩量回调/放量突破）？
-4. ❓ 筹码结构是否健康？
-5. ❓ 消息面有无重大利空？（减持、处罚、业绩变脸等）
-
-### 决策仪表盘要求：
-- **核心结论**：一句话说清该买/该卖/该等
-- **持仓分类建议**：空仓者怎么做 vs 持仓者怎么做
-- **具体狙击点位**：买入价、止损价、目标价（精确到分）
-- **检查清单**：每项用 ✅/⚠️/❌ 标记
-
-请输出完整的 JSON 格式决策仪表盘。"""
+请输出以上 {total} 只股票的批量分析结果，results 中的 stock_code 依次为：{', '.join(codes)}"""
         
         return prompt
     
@@ -1097,66 +1233,11 @@ class GeminiAnalyzer:
         如果解析失败，尝试智能提取或返回默认结果
         """
         try:
-            # 清理响应文本：移除 markdown 代码块标记
-            cleaned_text = response_text
-            if '```json' in cleaned_text:
-                cleaned_text = cleaned_text.replace('```json', '').replace('```', '')
-            elif '```' in cleaned_text:
-                cleaned_text = cleaned_text.replace('```', '')
-            
-            # 尝试找到 JSON 内容
-            json_start = cleaned_text.find('{')
-            json_end = cleaned_text.rfind('}') + 1
+            json_str = self._extract_json_text(response_text)
             
-            if json_start >= 0 and json_end > json_start:
-                json_str = cleaned_text[json_start:json_end]
-                
-                # 尝试修复常见的 JSON 问题
-                json_str = self._fix_json_string(json_str)
-                
+            if json_str is not None:
                 data = json.loads(json_str)
-                
-                # 提取 dashboard 数据
-                dashboard = data.get('dashboard', None)
-                
-                # 解析所有字段，使用默认值防止缺失
-                return AnalysisResult(
-                    code=code,
-                    name=name,
-                    # 核心指标
-                    sentiment_score=int(data.get('sentiment_score', 50)),
-                    trend_prediction=data.get('trend_prediction', '震荡'),
-                    operation_advice=data.get('operation_advice', '持有'),
-                    confidence_level=data.get('confidence_level', '中'),
-                    # 决策仪表盘
-                    dashboard=dashboard,
-                    # 走势分析
-                    trend_analysis=data.get('trend_analysis', ''),
-                    short_term_outlook=data.get('short_term_outlook', ''),
-                    medium_term_outlook=data.get('medium_term_outlook', ''),
-                    # 技术面
-                    technical_analysis=data.get('technical_analysis', ''),
-                    ma_analysis=data.get('ma_analysis', ''),
-                    volume_analysis=data.get('volume_analysis', ''),
-                    pattern_analysis=data.get('pattern_analysis', ''),
-                    # 基本面
-                    fundamental_analysis=data.get('fundamental_analysis', ''),
-                    sector_position=data.get('sector_position', ''),
-                    company_highlights=data.get('company_highlights', ''),
-                    # 情绪面/消息面
-                    news_summary=data.get('news_summary', ''),
-                    market_sentiment=data.get('market_sentiment', ''),
-                    hot_topics=data.get('hot_topics', ''),
-                    # 综合
-                    analysis_summary=data.get('analysis_summary', '分析完成'),
-                    key_points=data.get('key_points', ''),
-                    risk_warning=data.get('risk_warning', ''),
-                    buy_reason=data.get('buy_reason', ''),
-                    # 元数据
-                    search_performed=data.get('search_performed', False),
-                    data_sources=data.get('data_sources', '技术面数据'),
-                    success=True,
-                )
+                return self._build_result(data, code, name)
             else:
                 # 没有找到 JSON，尝试从纯文本中提取信息
                 logger.warning(f"无法从响应中提取 JSON，使用原始文本分析")
@@ -1166,6 +1247,133 @@ class GeminiAnalyzer:
             logger.warning(f"JSON 解析失败: {e}，尝试从文本提取")
             return self._parse_text_response(response_text, code, name)
     
+    def _extract_json_text(self, response_text: str) -> Optional[str]:
+        """从响应中截取 JSON 文本（移除代码块标记并修复常见格式问题），找不到返回 None"""
+        # 清理响应文本：移除 markdown 代码块标记
+        cleaned_text = response_text
+        if '```json' in cleaned_text:
+            cleaned_text = cleaned_text.replace('```json', '').replace('```', '')
+        elif '```' in cleaned_text:
+            cleaned_text = cleaned_text.replace('```', '')
+        
+        # 尝试找到 JSON 内容
+        json_start = cleaned_text.find('{')
+        json_end = cleaned_text.rfind('}') + 1
+        
+        if json_start >= 0 and json_end > json_start:
+            # 尝试修复常见的 JSON 问题
+            return self._fix_json_string(cleaned_text[json_start:json_end])
+        return None
+    
+    def _build_result(self, data: Dict[str, Any], code: str, name: str) -> AnalysisResult:
+        """由解析出的 JSON 字典构建 AnalysisResult"""
+        # 提取 dashboard 数据
+        dashboard = data.get('dashboard', None)
+        
+        # 解析所有字段，使用默认值防止缺失
+        return AnalysisResult(
+            code=code,
+            name=name,
+            # 核心指标
+            sentiment_score=int(data.get('sentiment_score', 50)),
+            trend_prediction=data.get('trend_prediction', '震荡'),
+            operation_advice=data.get('operation_advice', '持有'),
+            confidence_level=data.get('confidence_level', '中'),
+            # 决策仪表盘
+            dashboard=dashboard,
+            # 走势分析
+            trend_analysis=data.get('trend_analysis', ''),
+            short_term_outlook=data.get('short_term_outlook', ''),
+            medium_term_outlook=data.get('medium_term_outlook', ''),
+            # 技术面
+            technical_analysis=data.get('technical_analysis', ''),
+            ma_analysis=data.get('ma_analysis', ''),
+            volume_analysis=data.get('volume_analysis', ''),
+            pattern_analysis=data.get('pattern_analysis', ''),
+            # 基本面
+            fundamental_analysis=data.get('fundamental_analysis', ''),
+            sector_position=data.get('sector_position', ''),
+            company_highlights=data.get('company_highlights', ''),
+            # 情绪面/消息面
+            news_summary=data.get('news_summary', ''),
+            market_sentiment=data.get('market_sentiment', ''),
+            hot_topics=data.get('hot_topics', ''),
+            # 综合
+            analysis_summary=data.get('analysis_summary', '分析完成'),
+            key_points=data.get('key_points', ''),
+            risk_warning=data.get('risk_warning', ''),
+            buy_reason=data.get('buy_reason', ''),
+            # 元数据
+            search_performed=data.get('search_performed', False),
+            data_sources=data.get('data_sources', '技术面数据'),
+            success=True,
+        )
+    
+    def _parse_batch_response(
+        self,
+        response_text: str,
+        stocks: List[Tuple[str, str]]
+    ) -> Dict[str, AnalysisResult]:
+        """
+        解析批量分析响应，拆分为每只股票的结果
+        
+        只返回通过校验的股票（字段完整、代码匹配），缺失或无效的股票
+        不出现在返回值中，由调用方回退到单股分析
+        
+        Args:
+            response_text: 模型响应文本
+            stocks: 本批股票 [(代码, 名称), ...]
+            
+        Returns:
+            {股票代码: AnalysisResult}
+        """
+        json_str = self._extract_json_text(response_text)
+        if json_str is None:
+            logger.warning("[LLM批量] 响应中未找到 JSON")
+            return {}
+        
+        try:
+            data = json.loads(json_str)
+        except json.JSONDecodeError as e:
+            logger.warning(f"[LLM批量] JSON 解析失败: {e}")
+            return {}
+        
+        items = data.get('results') if isinstance(data, dict) else None
+        if not isinstance(items, list):
+            logger.warning("[LLM批量] 响应缺少 results 数组")
+            return {}
+        
+        names = {code.upper(): (code, name) for code, name in stocks}
+        parsed: Dict[str, AnalysisResult] = {}
+        
+        for index, item in enumerate(items):
+            if not isinstance(item, dict):
+                continue
+            
+            item_code = str(item.get('stock_code') or item.get('code') or '').strip().upper()
+            if not item_code and len(items) == len(stocks):
+                # 模型漏写代码时按位置对应
+                item_code = stocks[index][0].upper()
+            if item_code not in names:
+                logger.warning(f"[LLM批量] 忽略无法匹配的结果: stock_code={item_code or '空'}")
+                continue
+            
+            # 校验核心字段
+            if 'sentiment_score' not in item or not ('operation_advice' in item or 'dashboard' in item):
+                logger.warning(f"[LLM批量] {item_code} 结果缺少核心字段")
+                continue
+            
+            code, name = names[item_code]
+            try:
+                result = self._build_result(item, code, name)
+            except (TypeError, ValueError) as e:
+                logger.warning(f"[LLM批量] {code} 结果字段无效: {e}")
+                continue
+            result.raw_response = json.dumps(item, ensure_ascii=False)
+            parsed[code] = result
+        
+        return parsed
+    
     def _fix_json_string(self, json_str: str) -> str:
         """修复常见的 JSON 格式问题"""
         import re
@@ -1233,28 +1441,96 @@ class GeminiAnalyzer:
     def batch_analyze(
         self, 
         contexts: List[Dict[str, Any]],
-        delay_between: float = 2.0
+        max_workers: Optional[int] = None
     ) -> List[AnalysisResult]:
         """
-        批量分析多只股票
+        批量分析多只股票（并行提交）
         
-        注意：为避免 API 速率限制，每次分析之间会有延迟
+        请求速率由全局 LLM 调度器控制（并发上限、RPM/TPM、429 共享冷却），
+        这里不再做固定间隔的 sleep
         
         Args:
             contexts: 上下文数据列表
-            delay_between: 每次分析之间的延迟（秒）
+            max_workers: 并行线程数（默认等于调度器并发上限）
             
         Returns:
-            AnalysisResult 列表
+            AnalysisResult 列表（与 contexts 顺序一致）
         """
-        results = []
+        return get_llm_dispatcher().map(self.analyze, contexts, max_workers=max_workers)
+    
+    def analyze_batch(
+        self,
+        items: List[Tuple[Dict[str, Any], Optional[str]]],
+        batch_size: int = 5
+    ) -> List[AnalysisResult]:
+        """
+        多股票打包分析（批量提示词模式）
+        
+        每 batch_size 只股票合并为一次 LLM 请求，共享 SYSTEM_PROMPT 与任务说明；
+        批量结果中缺失或校验失败的股票自动回退为单股分析。
+        各批次之间并行提交，速率由全局 LLM 调度器控制。
         
-        for i, context in enumerate(contexts):
-            if i > 0:
-                logger.debug(f"等待 {delay_between} 秒后继续...")
-                time.sleep(delay_between)
+        Args:
+            items: [(上下文, 新闻内容), ...]
+            batch_size: 每批股票数（<=1 时等同于逐只分析）
             
-            result = self.analyze(context)
+        Returns:
+            AnalysisResult 列表（与 items 顺序一致）
+        """
+        if not items:
+            return []
+        
+        if batch_size <= 1 or not self.is_available():
+            return get_llm_dispatcher().map(lambda item: self.analyze(item[0], news_context=item[1]), items)
+        
+        batches = [items[i:i + batch_size] for i in range(0, len(items), batch_size)]
+        logger.info(f"[LLM批量] {len(items)} 只股票分为 {len(batches)} 批，每批最多 {batch_size} 只")
+        
+        batch_results = get_llm_dispatcher().map(self._analyze_one_batch, batches)
+        return [result for results in batch_results for result in results]
+    
+    def _analyze_one_batch(self, batch: List[Tuple[Dict[str, Any], Optional[str]]]) -> List[AnalysisResult]:
+        """执行单个批次的分析，失败的股票回退为单股分析"""
+        if len(batch) == 1:
+            context, news_context = batch[0]
+            return [self.analyze(context, news_context=news_context)]
+        
+        entries = [(context, self._resolve_stock_name(context), news_context) for context, news_context in batch]
+        stocks = [(context.get('code', 'Unknown'), name) for context, name, _ in entries]
+        label = ', '.join(code for code, _ in stocks)
+        
+        parsed: Dict[str, AnalysisResult] = {}
+        try:
+            prompt = self._format_batch_prompt(entries)
+            config = get_config()
+            generation_config = {
+                "temperature": config.gemini_temperature,
+                "max_output_tokens": min(
+                    self.BATCH_OUTPUT_TOKENS_PER_STOCK * len(batch),
+                    config.llm_batch_max_output_tokens,
+                ),
+            }
+            
+            logger.info(f"[LLM批量] 开始分析 [{label}]，Prompt 长度: {len(prompt)} 字符")
+            start_time = time.time()
+            response_text = self._call_api_with_retry(prompt, generation_config)
+            parsed = self._parse_batch_response(response_text, stocks)
+            logger.info(
+                f"[LLM批量] [{label}] 完成，耗时 {time.time() - start_time:.2f}s，"
+                f"有效结果 {len(parsed)}/{len(batch)}"
+            )
+        except Exception as e:
+            logger.warning(f"[LLM批量] [{label}] 批量请求失败: {e}，全部回退单股分析")
+        
+        results = []
+        for context, name, news_context in entries:
+            code = context.get('code', 'Unknown')
+            result = parsed.get(code)
+            if result is None:
+                logger.info(f"[LLM批量] {name}({code}) 批量结果缺失或无效，回退单股分析")
+                result = self.analyze(context, news_context=news_context)
+            else:
+                result.search_performed = bool(news_context)
             results.append(result)
         
         return results
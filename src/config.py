@@ -41,6 +41,7 @@ class Config:
     
     # === AI 分析配置 ===
     gemini_api_key: Optional[str] = None
+    gemini_api_keys: List[str] = field(default_factory=list)  # 多 Key 负载均衡（含 gemini_api_key）
     gemini_model: str = "gemini-3-flash-preview"  # 主模型
     gemini_model_fallback: str = "gemini-2.5-flash"  # 备选模型
     gemini_temperature: float = 0.7  # 温度参数（0.0-2.0，控制输出随机性，默认0.7）
@@ -50,8 +51,19 @@ class Config:
     gemini_max_retries: int = 5  # 最大重试次数
     gemini_retry_delay: float = 5.0  # 重试基础延时（秒）
 
+    # LLM 全局调度配置（进程内所有线程共享）
+    llm_max_concurrency: int = 3  # 最大并发请求数
+    llm_rpm_limit: int = 0  # 每个模型/Key 每分钟最大请求数（0 表示不限制）
+    llm_tpm_limit: int = 0  # 每个模型/Key 每分钟最大输入 token 数（0 表示不限制）
+    llm_batch_size: int = 1  # 批量提示词模式：每次请求打包的股票数（1 表示逐只分析）
+    llm_batch_max_output_tokens: int = 32768  # 批量请求的最大输出 token 数
+    llm_context_cache: bool = False  # Gemini 显式上下文缓存（缓存 SYSTEM_PROMPT，按存储时长计费）
+    llm_context_cache_ttl: int = 3600  # 显式上下文缓存有效期（秒）
+    llm_streaming: bool = True  # 交互式分析（机器人 /analyze）使用流式响应，核心结论提前推送
+
     # OpenAI 兼容 API（备选，当 Gemini 不可用时使用）
     openai_api_key: Optional[str] = None
+    openai_api_keys: List[str] = field(default_factory=list)  # 多 Key 负载均衡（含 openai_api_key）
     openai_base_url: Optional[str] = None  # 如: https://api.openai.com/v1
     openai_model: str = "gpt-4o-mini"  # OpenAI 兼容模型名称
     openai_temperature: float = 0.7  # OpenAI 温度参数（0.0-2.0，默认0.7）
@@ -61,6 +73,36 @@ class Config:
     tavily_api_keys: List[str] = field(default_factory=list)  # Tavily API Keys
     serpapi_keys: List[str] = field(default_factory=list)  # SerpAPI Keys
     
+    # 搜索结果缓存（SQLite，按搜索维度设置有效期）
+    search_cache_enabled: bool = True
+    search_cache_ttl_news: int = 3600  # 最新消息：1 小时
+    search_cache_ttl_risk: int = 43200  # 风险排查：12 小时
+    search_cache_ttl_earnings: int = 259200  # 业绩预期：3 天
+    
+    # 多维度情报搜索
+    search_race_providers: bool = False  # 每个维度同时请求两个引擎，取先成功的结果（会多消耗额度）
+    search_dimension_timeout: float = 15.0  # 单个维度的超时时间（秒）
+    
+    # 搜索共享限流（按引擎的 Key 数线性扩展）
+    search_concurrency_per_key: int = 2  # 单 Key 最大并发请求数
+    search_rpm_per_key: int = 0  # 单 Key 每分钟最大请求数（0 表示不限制）
+    
+    # 搜索 Key 池健康跟踪
+    search_key_cooldown: int = 60  # 触发频率限制后的基础冷却时间（秒），连续触发时翻倍
+    search_key_exhausted_cooldown: int = 21600  # 配额耗尽/Key 无效后的冷却时间（秒）
+    search_key_state_persist: bool = True  # 是否将 Key 状态持久化到数据库
+    
+    # 情报报告后处理（去重、相关性过滤、按时间排序、按预算压缩摘要）
+    search_intel_token_budget: int = 300  # 每个情报维度写入提示词的 token 预算（0 表示不限制）
+    search_intel_relevance_filter: bool = True  # 是否丢弃未提及股票代码/名称的结果
+    
+    # 本地新闻索引（SQLite FTS5）
+    news_index_enabled: bool = True
+    news_index_path: str = "./data/news_index.db"
+    news_index_min_hits: int = 2  # 本地命中少于该条数时才实时搜索
+    news_index_max_age_hours: int = 48  # 新闻保留时长（小时）
+    news_ingest_max_results: int = 10  # 每个大盘/板块查询拉取的新闻条数
+    
     # === 通知配置（可同时配置多个，全部推送）===
     
     # 企业微信 Webhook
@@ -117,6 +159,21 @@ class Config:
     feishu_max_bytes: int = 20000  # 飞书限制约 20KB，默认 20000 字节
     wechat_max_bytes: int = 4000   # 企业微信限制 4096 字节，默认 4000 字节
     
+    # 多渠道并发推送时单个渠道的超时时间（秒）
+    notification_channel_timeout: float = 120.0
+    
+    # 通知推送队列（入队后由后台线程投递，失败自动重试，重启不丢消息）
+    notification_outbox_enabled: bool = True
+    notification_outbox_max_attempts: int = 5  # 单条消息最大投递次数
+    notification_outbox_retry_base: float = 30.0  # 首次重试等待时间（秒），之后每次翻倍
+    notification_outbox_min_interval: float = 1.0  # 同一渠道两次投递之间的最小间隔（秒）
+    notification_outbox_retention_days: int = 7  # 已投递/已放弃的记录保留天数
+    
+    # 共享 HTTP 连接池（通知 Webhook、搜索 API 复用 Keep-Alive 连接）
+    http_pool_maxsize: int = 10  # 每个主机保持的最大连接数
+    http_retries: int = 2  # 连接失败重试次数（只重试连接阶段，不会重复投递）
+    http_timeout: float = 15.0  # 调用方未指定超时时的默认超时（秒）
+    
     # === 数据库配置 ===
     database_path: str = "./data/stock_analysis.db"
     
@@ -126,6 +183,9 @@ class Config:
     
     # === 系统配置 ===
     max_workers: int = 3  # 低并发防封禁
+    job_workers: int = 0  # 进程内任务调度器工作线程数（WebUI/机器人/定时任务共用，0 表示同 max_workers）
+    job_queue_max: int = 100  # 任务调度器排队上限，超出后拒绝新的 WebUI/机器人任务
+    job_max_per_user: int = 20  # 单个用户排队 + 执行中的任务上限（0 表示不限制）
     debug: bool = False
     http_proxy: Optional[str] = None  # HTTP 代理 (例如: http://127.0.0.1:10809)
     https_proxy: Optional[str] = None # HTTPS 代理
@@ -167,6 +227,12 @@ class Config:
     webui_enabled: bool = False
     webui_host: str = "127.0.0.1"
     webui_port: int = 8000
+    webui_server: str = "threading"  # 服务器模式：threading（每连接一个线程）/ asyncio（事件循环 + 有界线程池）
+    webui_handler_threads: int = 8  # asyncio 模式下执行路由处理函数的线程数
+    webui_keepalive_timeout: float = 15.0  # asyncio 模式下连接空闲/读取请求超时（秒）
+    webui_max_body_bytes: int = 1048576  # POST 请求体上限（字节）
+    analysis_result_reuse_minutes: int = 5  # 相同股票的分析结果复用有效期（分钟，0 表示不复用）
+    analysis_task_history: int = 200  # 内存中保留的最近分析任务数，更早的任务从数据库查询
     
     # === 机器人配置 ===
     bot_enabled: bool = True              # 是否启用机器人功能
@@ -174,6 +240,9 @@ class Config:
     bot_rate_limit_requests: int = 10     # 频率限制：窗口内最大请求数
     bot_rate_limit_window: int = 60       # 频率限制：窗口时间（秒）
     bot_admin_users: List[str] = field(default_factory=list)  # 管理员用户 ID 列表
+    bot_webhook_async: bool = True        # Webhook 先确认后异步执行命令（平台支持主动回复时）
+    bot_webhook_dedup_seconds: int = 600  # Webhook 事件去重窗口（秒，0 表示不去重）
+    bot_progress_interval: int = 30       # /batch 进度回复最小间隔（秒，-1 表示关闭进度回复）
     
     # 飞书机器人（事件订阅）- 已有 feishu_app_id, feishu_app_secret
     feishu_verification_token: Optional[str] = None  # 事件订阅验证 Token
@@ -293,26 +362,58 @@ class Config:
         serpapi_keys_str = os.getenv('SERPAPI_API_KEYS', '')
         serpapi_keys = [k.strip() for k in serpapi_keys_str.split(',') if k.strip()]
         
+        # 解析 LLM API Keys（GEMINI_API_KEY 与 GEMINI_API_KEYS 合并去重，OpenAI 同理）
+        gemini_api_keys = cls._merge_keys(os.getenv('GEMINI_API_KEY'), os.getenv('GEMINI_API_KEYS', ''))
+        openai_api_keys = cls._merge_keys(os.getenv('OPENAI_API_KEY'), os.getenv('OPENAI_API_KEYS', ''))
+        
         return cls(
             stock_list=stock_list,
             feishu_app_id=os.getenv('FEISHU_APP_ID'),
             feishu_app_secret=os.getenv('FEISHU_APP_SECRET'),
             feishu_folder_token=os.getenv('FEISHU_FOLDER_TOKEN'),
             tushare_token=os.getenv('TUSHARE_TOKEN'),
-            gemini_api_key=os.getenv('GEMINI_API_KEY'),
+            gemini_api_key=os.getenv('GEMINI_API_KEY') or (gemini_api_keys[0] if gemini_api_keys else None),
+            gemini_api_keys=gemini_api_keys,
             gemini_model=os.getenv('GEMINI_MODEL', 'gemini-3-flash-preview'),
             gemini_model_fallback=os.getenv('GEMINI_MODEL_FALLBACK', 'gemini-2.5-flash'),
             gemini_temperature=float(os.getenv('GEMINI_TEMPERATURE', '0.7')),
             gemini_request_delay=float(os.getenv('GEMINI_REQUEST_DELAY', '2.0')),
             gemini_max_retries=int(os.getenv('GEMINI_MAX_RETRIES', '5')),
             gemini_retry_delay=float(os.getenv('GEMINI_RETRY_DELAY', '5.0')),
-            openai_api_key=os.getenv('OPENAI_API_KEY'),
+            llm_max_concurrency=int(os.getenv('LLM_MAX_CONCURRENCY', '3')),
+            llm_rpm_limit=int(os.getenv('LLM_RPM_LIMIT', '0')),
+            llm_tpm_limit=int(os.getenv('LLM_TPM_LIMIT', '0')),
+            llm_batch_size=int(os.getenv('LLM_BATCH_SIZE', '1')),
+            llm_batch_max_output_tokens=int(os.getenv('LLM_BATCH_MAX_OUTPUT_TOKENS', '32768')),
+            llm_context_cache=os.getenv('LLM_CONTEXT_CACHE', 'false').lower() == 'true',
+            llm_context_cache_ttl=int(os.getenv('LLM_CONTEXT_CACHE_TTL', '3600')),
+            llm_streaming=os.getenv('LLM_STREAMING', 'true').lower() == 'true',
+            openai_api_key=os.getenv('OPENAI_API_KEY') or (openai_api_keys[0] if openai_api_keys else None),
+            openai_api_keys=openai_api_keys,
             openai_base_url=os.getenv('OPENAI_BASE_URL'),
             openai_model=os.getenv('OPENAI_MODEL', 'gpt-4o-mini'),
             openai_temperature=float(os.getenv('OPENAI_TEMPERATURE', '0.7')),
             bocha_api_keys=bocha_api_keys,
             tavily_api_keys=tavily_api_keys,
             serpapi_keys=serpapi_keys,
+            search_cache_enabled=os.getenv('SEARCH_CACHE_ENABLED', 'true').lower() == 'true',
+            search_cache_ttl_news=int(os.getenv('SEARCH_CACHE_TTL_NEWS', '3600')),
+            search_cache_ttl_risk=int(os.getenv('SEARCH_CACHE_TTL_RISK', '43200')),
+            search_cache_ttl_earnings=int(os.getenv('SEARCH_CACHE_TTL_EARNINGS', '259200')),
+            search_race_providers=os.getenv('SEARCH_RACE_PROVIDERS', 'false').lower() == 'true',
+            search_dimension_timeout=float(os.getenv('SEARCH_DIMENSION_TIMEOUT', '15')),
+            search_concurrency_per_key=int(os.getenv('SEARCH_CONCURRENCY_PER_KEY', '2')),
+            search_rpm_per_key=int(os.getenv('SEARCH_RPM_PER_KEY', '0')),
+            search_key_cooldown=int(os.getenv('SEARCH_KEY_COOLDOWN', '60')),
+            search_key_exhausted_cooldown=int(os.getenv('SEARCH_KEY_EXHAUSTED_COOLDOWN', '21600')),
+            search_key_state_persist=os.getenv('SEARCH_KEY_STATE_PERSIST', 'true').lower() == 'true',
+            search_intel_token_budget=int(os.getenv('SEARCH_INTEL_TOKEN_BUDGET', '300')),
+            search_intel_relevance_filter=os.getenv('SEARCH_INTEL_RELEVANCE_FILTER', 'true').lower() == 'true',
+            news_index_enabled=os.getenv('NEWS_INDEX_ENABLED', 'true').lower() == 'true',
+            news_index_path=os.getenv('NEWS_INDEX_PATH', './data/news_index.db'),
+            news_index_min_hits=int(os.getenv('NEWS_INDEX_MIN_HITS', '2')),
+            news_index_max_age_hours=int(os.getenv('NEWS_INDEX_MAX_AGE_HOURS', '48')),
+            news_ingest_max_results=int(os.getenv('NEWS_INGEST_MAX_RESULTS', '10')),
             wechat_webhook_url=os.getenv('WECHAT_WEBHOOK_URL'),
             feishu_webhook_url=os.getenv('FEISHU_WEBHOOK_URL'),
             telegram_bot_token=os.getenv('TELEGRAM_BOT_TOKEN'),
@@ -333,10 +434,22 @@ class Config:
             analysis_delay=float(os.getenv('ANALYSIS_DELAY', '0')),
             feishu_max_bytes=int(os.getenv('FEISHU_MAX_BYTES', '20000')),
             wechat_max_bytes=int(os.getenv('WECHAT_MAX_BYTES', '4000')),
+            notification_channel_timeout=float(os.getenv('NOTIFICATION_CHANNEL_TIMEOUT', '120')),
+            notification_outbox_enabled=os.getenv('NOTIFICATION_OUTBOX_ENABLED', 'true').lower() == 'true',
+            notification_outbox_max_attempts=int(os.getenv('NOTIFICATION_OUTBOX_MAX_ATTEMPTS', '5')),
+            notification_outbox_retry_base=float(os.getenv('NOTIFICATION_OUTBOX_RETRY_BASE', '30')),
+            notification_outbox_min_interval=float(os.getenv('NOTIFICATION_OUTBOX_MIN_INTERVAL', '1')),
+            notification_outbox_retention_days=int(os.getenv('NOTIFICATION_OUTBOX_RETENTION_DAYS', '7')),
+            http_pool_maxsize=int(os.getenv('HTTP_POOL_MAXSIZE', '10')),
+            http_retries=int(os.getenv('HTTP_RETRIES', '2')),
+            http_timeout=float(os.getenv('HTTP_TIMEOUT', '15')),
             database_path=os.getenv('DATABASE_PATH', './data/stock_analysis.db'),
             log_dir=os.getenv('LOG_DIR', './logs'),
             log_level=os.getenv('LOG_LEVEL', 'INFO'),
             max_workers=int(os.getenv('MAX_WORKERS', '3')),
+            job_workers=int(os.getenv('JOB_WORKERS', '0')),
+            job_queue_max=int(os.getenv('JOB_QUEUE_MAX', '100')),
+            job_max_per_user=int(os.getenv('JOB_MAX_PER_USER', '20')),
             debug=os.getenv('DEBUG', 'false').lower() == 'true',
             http_proxy=os.getenv('HTTP_PROXY'),
             https_proxy=os.getenv('HTTPS_PROXY'),
@@ -346,12 +459,21 @@ class Config:
             webui_enabled=os.getenv('WEBUI_ENABLED', 'false').lower() == 'true',
             webui_host=os.getenv('WEBUI_HOST', '127.0.0.1'),
             webui_port=int(os.getenv('WEBUI_PORT', '8000')),
+            webui_server=os.getenv('WEBUI_SERVER', 'threading').strip().lower(),
+            webui_handler_threads=int(os.getenv('WEBUI_HANDLER_THREADS', '8')),
+            webui_keepalive_timeout=float(os.getenv('WEBUI_KEEPALIVE_TIMEOUT', '15')),
+            webui_max_body_bytes=int(os.getenv('WEBUI_MAX_BODY_BYTES', '1048576')),
+            analysis_result_reuse_minutes=int(os.getenv('ANALYSIS_RESULT_REUSE_MINUTES', '5')),
+            analysis_task_history=int(os.getenv('ANALYSIS_TASK_HISTORY', '200')),
             # 机器人配置
             bot_enabled=os.getenv('BOT_ENABLED', 'true').lower() == 'true',
             bot_command_prefix=os.getenv('BOT_COMMAND_PREFIX', '/'),
             bot_rate_limit_requests=int(os.getenv('BOT_RATE_LIMIT_REQUESTS', '10')),
             bot_rate_limit_window=int(os.getenv('BOT_RATE_LIMIT_WINDOW', '60')),
             bot_admin_users=[u.strip() for u in os.getenv('BOT_ADMIN_USERS', '').split(',') if u.strip()],
+            bot_webhook_async=os.getenv('BOT_WEBHOOK_ASYNC', 'true').lower() == 'true',
+            bot_webhook_dedup_seconds=int(os.getenv('BOT_WEBHOOK_DEDUP_SECONDS', '600')),
+            bot_progress_interval=int(os.getenv('BOT_PROGRESS_INTERVAL', '30')),
             # 飞书机器人
             feishu_verification_token=os.getenv('FEISHU_VERIFICATION_TOKEN'),
             feishu_encrypt_key=os.getenv('FEISHU_ENCRYPT_KEY'),
@@ -387,6 +509,16 @@ class Config:
             generate_operation_advice=os.getenv('GENERATE_OPERATION_ADVICE', 'true').lower() == 'true',
         )
     
+    @staticmethod
+    def _merge_keys(single_key: Optional[str], keys_str: str) -> List[str]:
+        """合并单个 Key 与逗号分隔的 Key 列表（保持顺序、去重）"""
+        keys = []
+        for key in [single_key or ''] + keys_str.split(','):
+            key = key.strip()
+            if key and key not in keys:
+                keys.append(key)
+        return keys
+    
     @classmethod
     def reset_instance(cls) -> None:
         """重置单例（主要用于测试）"""
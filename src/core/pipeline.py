@@ -11,21 +11,24 @@ A股自选股智能分析系统 - 核心分析流水线
 4. 提供股票分析的核心功能
 """
 
+import functools
 import logging
 import time
-from concurrent.futures import ThreadPoolExecutor, as_completed
+from concurrent.futures import FIRST_COMPLETED, Future, wait
 from datetime import date
-from typing import List, Dict, Any, Optional, Tuple
+from typing import List, Dict, Any, Iterator, Optional, Tuple, Callable
 
 from src.config import get_config, Config
-from src.storage import get_db
-from data_provider import DataFetcherManager
 from data_provider.realtime_types import ChipDistribution
-from src.analyzer import GeminiAnalyzer, AnalysisResult, STOCK_NAME_MAP
-from src.notification import NotificationService, NotificationChannel
-from src.search_service import SearchService
+from src.analyzer import AnalysisResult, STOCK_NAME_MAP
+from src.notification import NotificationService, NotificationChannel, ChannelDetector, CONTEXT_CHANNEL_NAME
+from src.prompt_cache import get_prompt_cache_stats
+from src.http_client import get_http_stats
+from src.notification_outbox import get_notification_outbox
+from src.job_scheduler import JobPriority, get_job_scheduler
 from src.enums import ReportType
-from src.stock_analyzer import StockTrendAnalyzer, TrendAnalysisResult
+from src.stock_analyzer import TrendAnalysisResult
+from src.core.services import ServiceContainer, get_service_container
 from bot.models import BotMessage
 
 
@@ -46,34 +49,37 @@ class StockAnalysisPipeline:
         self,
         config: Optional[Config] = None,
         max_workers: Optional[int] = None,
-        source_message: Optional[BotMessage] = None
+        source_message: Optional[BotMessage] = None,
+        services: Optional[ServiceContainer] = None
     ):
         """
         初始化调度器
-        
+
         Args:
             config: 配置对象（可选，默认使用全局配置）
             max_workers: 最大并发线程数（可选，默认从配置读取）
+            source_message: 触发消息（机器人命令，用于回复到来源会话）
+            services: 共享服务容器（可选，默认使用全局容器）
         """
         self.config = config or get_config()
         self.max_workers = max_workers or self.config.max_workers
         self.source_message = source_message
-        
-        # 初始化各模块
-        self.db = get_db()
-        self.fetcher_manager = DataFetcherManager()
+
+        # 重量级组件从共享容器获取，跨请求复用
+        services = services or get_service_container()
+        self.db = services.db
+        self.fetcher_manager = services.fetcher_manager
         # 不再单独创建 akshare_fetcher，统一使用 fetcher_manager 获取增强数据
-        self.trend_analyzer = StockTrendAnalyzer()  # 趋势分析器
-        self.analyzer = GeminiAnalyzer()
+        self.trend_analyzer = services.trend_analyzer  # 趋势分析器
+        self.analyzer = services.analyzer
+        self.search_service = services.search_service
+
+        # 请求级状态：通知服务绑定触发消息，每个请求单独创建
         self.notifier = NotificationService(source_message=source_message)
-        
-        # 初始化搜索服务
-        self.search_service = SearchService(
-            bocha_keys=self.config.bocha_api_keys,
-            tavily_keys=self.config.tavily_api_keys,
-            serpapi_keys=self.config.serpapi_keys,
-        )
-        
+
+        # 推送队列：通知入队后由后台线程投递，分析线程不等待 Webhook
+        self._outbox = get_notification_outbox() if self.config.notification_outbox_enabled else None
+
         logger.info(f"调度器初始化完成，最大并发数: {self.max_workers}")
         logger.info("已启用趋势分析器 (MA5>MA10>MA20 多头判断)")
         # 打印实时行情/筹码配置状态
@@ -136,23 +142,57 @@ class StockAnalysisPipeline:
             logger.error(f"[{code}] {error_msg}")
             return False, error_msg
     
-    def analyze_stock(self, code: str) -> Optional[AnalysisResult]:
+    def analyze_stock(
+        self,
+        code: str,
+        on_conclusion: Optional[Callable[[AnalysisResult], None]] = None
+    ) -> Optional[AnalysisResult]:
         """
         分析单只股票（增强版：含量比、换手率、筹码分析、多维度情报）
         
+        流程：
+        1. 准备分析输入（实时行情、筹码、趋势、情报、技术面上下文）
+        2. 调用 AI 进行综合分析
+        
+        Args:
+            code: 股票代码
+            on_conclusion: 核心结论回调（可选，流式响应中核心结论生成后立即调用）
+            
+        Returns:
+            AnalysisResult 或 None（如果分析失败）
+        """
+        try:
+            prepared = self.prepare_analysis_input(code)
+            if prepared is None:
+                return None
+            
+            enhanced_context, news_context = prepared
+            
+            # 调用 AI 分析（传入增强的上下文和新闻）
+            return self.analyzer.analyze(enhanced_context, news_context=news_context, on_conclusion=on_conclusion)
+            
+        except Exception as e:
+            logger.error(f"[{code}] 分析失败: {e}")
+            logger.exception(f"[{code}] 详细错误信息:")
+            return None
+    
+    def prepare_analysis_input(self, code: str) -> Optional[Tuple[Dict[str, Any], Optional[str]]]:
+        """
+        准备单只股票的 AI 分析输入（不调用 LLM）
+        
         流程：
         1. 获取实时行情（量比、换手率）- 通过 DataFetcherManager 自动故障切换
         2. 获取筹码分布 - 通过 DataFetcherManager 带熔断保护
         3. 进行趋势分析（基于交易理念）
         4. 多维度情报搜索（最新消息+风险排查+业绩预期）
         5. 从数据库获取分析上下文
-        6. 调用 AI 进行综合分析
+        6. 增强上下文数据
         
         Args:
             code: 股票代码
             
         Returns:
-            AnalysisResult 或 None（如果分析失败）
+            (增强后的上下文, 新闻内容)，失败返回 None
         """
         try:
             # 获取股票名称（优先从实时行情获取真实名称）
@@ -223,7 +263,7 @@ class StockAnalysisPipeline:
                 
                 # 格式化情报报告
                 if intel_results:
-                    news_context = self.search_service.format_intel_report(intel_results, stock_name)
+                    news_context = self.search_service.format_intel_report(intel_results, stock_name, code)
                     total_results = sum(
                         len(r.results) for r in intel_results.values() if r.success
                     )
@@ -256,13 +296,10 @@ class StockAnalysisPipeline:
                 stock_name  # 传入股票名称
             )
             
-            # Step 7: 调用 AI 分析（传入增强的上下文和新闻）
-            result = self.analyzer.analyze(enhanced_context, news_context=news_context)
-            
-            return result
+            return enhanced_context, news_context
             
         except Exception as e:
-            logger.error(f"[{code}] 分析失败: {e}")
+            logger.error(f"[{code}] 准备分析数据失败: {e}")
             logger.exception(f"[{code}] 详细错误信息:")
             return None
     
@@ -370,7 +407,8 @@ class StockAnalysisPipeline:
         code: str,
         skip_analysis: bool = False,
         single_stock_notify: bool = False,
-        report_type: ReportType = ReportType.SIMPLE
+        report_type: ReportType = ReportType.SIMPLE,
+        on_conclusion: Optional[Callable[[AnalysisResult], None]] = None
     ) -> Optional[AnalysisResult]:
         """
         处理单只股票的完整流程
@@ -388,6 +426,7 @@ class StockAnalysisPipeline:
             skip_analysis: 是否跳过 AI 分析
             single_stock_notify: 是否启用单股推送模式（每分析完一只立即推送）
             report_type: 报告类型枚举（从配置读取，Issue #119）
+            on_conclusion: 核心结论回调（可选，交互式分析提前推送核心结论）
 
         Returns:
             AnalysisResult 或 None
@@ -407,7 +446,7 @@ class StockAnalysisPipeline:
                 logger.info(f"[{code}] 跳过 AI 分析（dry-run 模式）")
                 return None
             
-            result = self.analyze_stock(code)
+            result = self.analyze_stock(code, on_conclusion=on_conclusion)
             
             if result:
                 logger.info(
@@ -416,24 +455,8 @@ class StockAnalysisPipeline:
                 )
                 
                 # 单股推送模式（#55）：每分析完一只股票立即推送
-                if single_stock_notify and self.notifier.is_available():
-                    try:
-                        # 根据报告类型选择生成方法
-                        if report_type == ReportType.FULL:
-                            # 完整报告：使用决策仪表盘格式
-                            report_content = self.notifier.generate_dashboard_report([result])
-                            logger.info(f"[{code}] 使用完整报告格式")
-                        else:
-                            # 精简报告：使用单股报告格式（默认）
-                            report_content = self.notifier.generate_single_stock_report(result)
-                            logger.info(f"[{code}] 使用精简报告格式")
-                        
-                        if self.notifier.send(report_content):
-                            logger.info(f"[{code}] 单股推送成功")
-                        else:
-                            logger.warning(f"[{code}] 单股推送失败")
-                    except Exception as e:
-                        logger.error(f"[{code}] 单股推送异常: {e}")
+                if single_stock_notify:
+                    self._notify_single_stock(result, report_type)
             
             return result
             
@@ -442,18 +465,148 @@ class StockAnalysisPipeline:
             logger.exception(f"[{code}] 处理过程发生未知异常: {e}")
             return None
     
+    def _notify_single_stock(self, result: AnalysisResult, report_type: ReportType) -> None:
+        """
+        单股推送（#55）
+        
+        Args:
+            result: 单只股票的分析结果
+            report_type: 报告类型
+        """
+        code = result.code
+        if not self.notifier.is_available():
+            return
+        
+        try:
+            # 根据报告类型选择生成方法
+            if report_type == ReportType.FULL:
+                # 完整报告：使用决策仪表盘格式
+                report_content = self.notifier.generate_dashboard_report([result])
+                logger.info(f"[{code}] 使用完整报告格式")
+            else:
+                # 精简报告：使用单股报告格式（默认）
+                report_content = self.notifier.generate_single_stock_report(result)
+                logger.info(f"[{code}] 使用精简报告格式")
+            
+            contents = {channel: report_content for channel in self.notifier.get_available_channels()}
+            if self._deliver_notifications(contents, report_content):
+                logger.info(f"[{code}] 单股推送成功")
+            else:
+                logger.warning(f"[{code}] 单股推送失败")
+        except Exception as e:
+            logger.error(f"[{code}] 单股推送异常: {e}")
+    
+    def _deliver_notifications(self, contents: Dict[NotificationChannel, str], context_content: str) -> bool:
+        """
+        推送到各渠道
+        
+        启用推送队列时写入队列由后台线程投递（不阻塞分析线程），否则各渠道并发直接发送；
+        消息上下文渠道（机器人会话回复）始终直接发送。
+        
+        Args:
+            contents: {渠道: 消息内容}
+            context_content: 发送到消息上下文渠道的内容
+            
+        Returns:
+            是否至少有一个渠道发送成功或入队成功
+        """
+        if self._outbox is not None:
+            context_success = (
+                self.notifier.send_to_context(context_content) if self.notifier.has_context_channel() else False
+            )
+            queued = self._outbox.enqueue_many(contents)
+            return queued > 0 or context_success
+        
+        jobs: Dict[str, Callable[[], bool]] = {}
+        if self.notifier.has_context_channel():
+            jobs[CONTEXT_CHANNEL_NAME] = functools.partial(self.notifier.send_to_context, context_content)
+        for channel, content in contents.items():
+            jobs[ChannelDetector.get_channel_name(channel)] = functools.partial(
+                self.notifier.send_to_channel, channel, content
+            )
+        return any(self.notifier.send_in_parallel(jobs).values())
+    
+    def _prepare_stock(self, code: str) -> Optional[Tuple[Dict[str, Any], Optional[str]]]:
+        """批量 LLM 模式下单只股票的数据阶段：获取数据 + 准备分析输入"""
+        logger.info(f"========== 开始处理 {code} ==========")
+        
+        success, error = self.fetch_and_save_stock_data(code)
+        if not success:
+            logger.warning(f"[{code}] 数据获取失败: {error}")
+            # 即使获取失败，也尝试用已有数据分析
+        
+        return self.prepare_analysis_input(code)
+    
+    def _run_batched_analysis(
+        self,
+        stock_codes: List[str],
+        single_stock_notify: bool,
+        report_type: ReportType,
+        job_user: str = "schedule",
+        on_stock_done: Optional[Callable[[str, Optional[AnalysisResult]], None]] = None
+    ) -> List[AnalysisResult]:
+        """
+        批量 LLM 模式（LLM_BATCH_SIZE > 1）
+        
+        1. 任务调度器并发完成所有股票的数据获取与情报搜索
+        2. 多只股票打包为一次 LLM 请求，减少重复的系统提示词与请求开销
+        
+        Args:
+            stock_codes: 股票代码列表
+            single_stock_notify: 是否单股推送
+            report_type: 报告类型
+            job_user: 任务提交者（任务调度的用户轮转）
+            on_stock_done: 单只股票完成回调
+            
+        Returns:
+            分析结果列表
+        """
+        prepared: Dict[str, Tuple[Dict[str, Any], Optional[str]]] = {}
+        
+        for code, future in self._iter_stock_jobs(self._prepare_stock, stock_codes, job_user):
+            try:
+                item = future.result()
+                if item:
+                    prepared[code] = item
+            except Exception as e:
+                logger.error(f"[{code}] 数据准备失败: {e}")
+            if code not in prepared:
+                self._emit_stock_done(on_stock_done, code, None)
+        
+        # 保持自选股顺序
+        items = [prepared[code] for code in stock_codes if code in prepared]
+        results = self.analyzer.analyze_batch(items, batch_size=self.config.llm_batch_size)
+        
+        for result in results:
+            logger.info(
+                f"[{result.code}] 分析完成: {result.operation_advice}, "
+                f"评分 {result.sentiment_score}"
+            )
+            if single_stock_notify:
+                self._notify_single_stock(result, report_type)
+        
+        # 批量请求整体完成后才能拿到结果，按自选股顺序逐只回调
+        analyzed = {result.code: result for result in results}
+        for code in stock_codes:
+            if code in prepared:
+                self._emit_stock_done(on_stock_done, code, analyzed.get(code))
+        
+        return results
+    
     def run(
         self, 
         stock_codes: Optional[List[str]] = None,
         dry_run: bool = False,
-        send_notification: bool = True
+        send_notification: bool = True,
+        job_user: str = "schedule",
+        on_stock_done: Optional[Callable[[str, Optional[AnalysisResult]], None]] = None
     ) -> List[AnalysisResult]:
         """
         运行完整的分析流程
         
         流程：
         1. 获取待分析的股票列表
-        2. 使用线程池并发处理
+        2. 提交到进程内任务调度器并发处理（与 WebUI/机器人任务共用工作线程）
         3. 收集分析结果
         4. 发送通知
         
@@ -461,6 +614,8 @@ class StockAnalysisPipeline:
             stock_codes: 股票代码列表（可选，默认使用配置中的自选股）
             dry_run: 是否仅获取数据不分析
             send_notification: 是否发送推送通知
+            job_user: 任务提交者（任务调度的用户轮转，机器人 /batch 传入发送者 ID）
+            on_stock_done: 单只股票完成回调 (code, result)，失败时 result 为 None（机器人进度推送）
             
         Returns:
             分析结果列表
@@ -487,6 +642,13 @@ class StockAnalysisPipeline:
             if prefetch_count > 0:
                 logger.info(f"已启用批量预取架构：一次拉取全市场数据，{len(stock_codes)} 只股票共享缓存")
         
+        # === 批量拉取大盘/板块新闻写入本地新闻索引（个股情报优先从索引命中）===
+        if not dry_run and self.search_service.is_available:
+            try:
+                self.search_service.ingest_market_news()
+            except Exception as e:
+                logger.warning(f"大盘/板块新闻拉取失败，个股情报将实时搜索: {e}")
+        
         # 单股推送模式（#55）：从配置读取
         single_stock_notify = getattr(self.config, 'single_stock_notify', False)
         # Issue #119: 从配置读取报告类型
@@ -499,29 +661,39 @@ class StockAnalysisPipeline:
             logger.info(f"已启用单股推送模式：每分析完一只股票立即推送（报告类型: {report_type_str}）")
         
         results: List[AnalysisResult] = []
-        
-        # 使用线程池并发处理
-        # 注意：max_workers 设置较低（默认3）以避免触发反爬
-        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
-            # 提交任务
-            future_to_code = {
-                executor.submit(
-                    self.process_single_stock,
-                    code,
-                    skip_analysis=dry_run,
-                    single_stock_notify=single_stock_notify and send_notification,
-                    report_type=report_type  # Issue #119: 传递报告类型
-                ): code
-                for code in stock_codes
-            }
+        cache_stats_before = get_prompt_cache_stats().snapshot()
+        
+        # 批量 LLM 模式：多只股票合并为一次请求
+        use_batch_llm = not dry_run and self.config.llm_batch_size > 1
+        
+        if use_batch_llm:
+            logger.info(f"已启用批量 LLM 模式：每次请求分析 {self.config.llm_batch_size} 只股票")
+            results = self._run_batched_analysis(
+                stock_codes,
+                single_stock_notify=single_stock_notify and send_notification,
+                report_type=report_type,
+                job_user=job_user,
+                on_stock_done=on_stock_done,
+            )
+        else:
+            # 提交到任务调度器并发处理
+            # 注意：max_workers 设置较低（默认3）以避免触发反爬
+            jobs = self._iter_stock_jobs(
+                self.process_single_stock,
+                stock_codes,
+                job_user,
+                skip_analysis=dry_run,
+                single_stock_notify=single_stock_notify and send_notification,
+                report_type=report_type  # Issue #119: 传递报告类型
+            )
             
             # 收集结果
-            for idx, future in enumerate(as_completed(future_to_code)):
-                code = future_to_code[future]
+            for idx, (code, future) in enumerate(jobs):
                 try:
                     result = future.result()
                     if result:
                         results.append(result)
+                    self._emit_stock_done(on_stock_done, code, result)
 
                     # Issue #128: 分析间隔 - 在个股分析和大盘分析之间添加延迟
                     if idx < len(stock_codes) - 1 and analysis_delay > 0:
@@ -530,6 +702,7 @@ class StockAnalysisPipeline:
 
                 except Exception as e:
                     logger.error(f"[{code}] 任务执行失败: {e}")
+                    self._emit_stock_done(on_stock_done, code, None)
         
         # 统计
         elapsed_time = time.time() - start_time
@@ -545,6 +718,9 @@ class StockAnalysisPipeline:
         
         logger.info("===== 分析完成 =====")
         logger.info(f"成功: {success_count}, 失败: {fail_count}, 耗时: {elapsed_time:.2f} 秒")
+        if not dry_run:
+            cache_stats = get_prompt_cache_stats().snapshot() - cache_stats_before
+            logger.info(f"[提示词缓存] 本次运行: {cache_stats.summary()}")
         
         # 发送通知（单股推送模式下跳过汇总推送，避免重复）
         if results and send_notification and not dry_run:
@@ -555,8 +731,61 @@ class StockAnalysisPipeline:
             else:
                 self._send_notifications(results)
         
+        if not dry_run:
+            logger.info(f"[HTTP] 本次运行各主机请求: {get_http_stats().summary()}")
+        logger.info(f"[任务调度] {get_job_scheduler().summary()}")
+        
         return results
     
+    @staticmethod
+    def _emit_stock_done(
+        callback: Optional[Callable[[str, Optional[AnalysisResult]], None]],
+        code: str,
+        result: Optional[AnalysisResult]
+    ) -> None:
+        """调用单只股票完成回调（回调异常不影响分析流程）"""
+        if callback is None:
+            return
+        try:
+            callback(code, result)
+        except Exception as e:
+            logger.warning(f"[{code}] 进度回调失败: {e}")
+    
+    def _iter_stock_jobs(
+        self,
+        fn: Callable[..., Any],
+        stock_codes: List[str],
+        job_user: str,
+        **kwargs: Any
+    ) -> Iterator[Tuple[str, Future]]:
+        """
+        把单只股票的工作以批量优先级提交到进程内任务调度器，按完成顺序返回 (code, future)
+        
+        同一次运行最多 max_workers 只股票同时在调度器中排队或执行，
+        其余股票在前面的完成后再提交，不会一次占满队列挤掉交互式请求。
+        """
+        scheduler = get_job_scheduler()
+        pending: Dict[Future, str] = {}
+        next_index = 0
+        
+        while next_index < len(stock_codes) or pending:
+            while next_index < len(stock_codes) and len(pending) < self.max_workers:
+                code = stock_codes[next_index]
+                next_index += 1
+                future = scheduler.submit(
+                    fn, code,
+                    priority=JobPriority.BATCH,
+                    user=job_user,
+                    name=f"{fn.__name__}:{code}",
+                    block=True,
+                    **kwargs
+                )
+                pending[future] = code
+            
+            done, _ = wait(list(pending), return_when=FIRST_COMPLETED)
+            for future in done:
+                yield pending.pop(future), future
+    
     def _send_notifications(self, results: List[AnalysisResult], skip_push: bool = False) -> None:
         """
         发送分析结果通知
@@ -583,40 +812,19 @@ class StockAnalysisPipeline:
             
             # 推送通知
             if self.notifier.is_available():
-                channels = self.notifier.get_available_channels()
-                context_success = self.notifier.send_to_context(report)
-
-                # 企业微信：只发精简版（平台限制）
-                wechat_success = False
-                if NotificationChannel.WECHAT in channels:
-                    dashboard_content = self.notifier.generate_wechat_dashboard(results)
-                    logger.info(f"企业微信仪表盘长度: {len(dashboard_content)} 字符")
-                    logger.debug(f"企业微信推送内容:\n{dashboard_content}")
-                    wechat_success = self.notifier.send_to_wechat(dashboard_content)
-
-                # 其他渠道：发完整报告（避免自定义 Webhook 被 wechat 截断逻辑污染）
-                non_wechat_success = False
-                for channel in channels:
+                contents: Dict[NotificationChannel, str] = {}
+                for channel in self.notifier.get_available_channels():
                     if channel == NotificationChannel.WECHAT:
-                        continue
-                    if channel == NotificationChannel.FEISHU:
-                        non_wechat_success = self.notifier.send_to_feishu(report) or non_wechat_success
-                    elif channel == NotificationChannel.TELEGRAM:
-                        non_wechat_success = self.notifier.send_to_telegram(report) or non_wechat_success
-                    elif channel == NotificationChannel.EMAIL:
-                        non_wechat_success = self.notifier.send_to_email(report) or non_wechat_success
-                    elif channel == NotificationChannel.CUSTOM:
-                        non_wechat_success = self.notifier.send_to_custom(report) or non_wechat_success
-                    elif channel == NotificationChannel.PUSHPLUS:
-                        non_wechat_success = self.notifier.send_to_pushplus(report) or non_wechat_success
-                    elif channel == NotificationChannel.DISCORD:
-                        non_wechat_success = self.notifier.send_to_discord(report) or non_wechat_success
-                    elif channel == NotificationChannel.PUSHOVER:
-                        non_wechat_success = self.notifier.send_to_pushover(report) or non_wechat_success
+                        # 企业微信：只发精简版（平台限制）
+                        dashboard_content = self.notifier.generate_wechat_dashboard(results)
+                        logger.info(f"企业微信仪表盘长度: {len(dashboard_content)} 字符")
+                        logger.debug(f"企业微信推送内容:\n{dashboard_content}")
+                        contents[channel] = dashboard_content
                     else:
-                        logger.warning(f"未知通知渠道: {channel}")
+                        # 其他渠道：发完整报告（避免自定义 Webhook 被 wechat 截断逻辑污染）
+                        contents[channel] = report
 
-                success = wechat_success or non_wechat_success or context_success
+                success = self._deliver_notifications(contents, report)
                 if success:
                     logger.info("决策仪表盘推送成功")
                 else:
@@ -0,0 +1,125 @@
+# -*- coding: utf-8 -*-
+"""
+===================================
+A股自选股智能分析系统 - 共享服务容器
+===================================
+
+职责：
+1. 在常驻进程（WebUI/机器人/定时任务）中只初始化一次重量级组件并在各请求间共享
+   - DataFetcherManager（5 个数据源，含 Tushare 登录）
+   - GeminiAnalyzer（模型初始化）
+   - SearchService（搜索引擎与 Key 池）
+   - StockTrendAnalyzer
+2. 请求级状态（如触发消息 source_message、NotificationService）仍由调用方按请求创建
+
+说明：
+- 以上组件原本就在流水线的多个分析线程间共享，可以跨请求并发使用
+- 各组件首次访问时才创建（线程安全），warm_up() 可在服务启动时提前初始化
+"""
+
+import logging
+import threading
+import time
+from typing import Optional
+
+from src.config import Config, get_config
+from src.storage import get_db
+from data_provider import DataFetcherManager
+from src.analyzer import GeminiAnalyzer
+from src.search_service import SearchService
+from src.stock_analyzer import StockTrendAnalyzer
+
+logger = logging.getLogger(__name__)
+
+
+class ServiceContainer:
+    """
+    共享服务容器
+
+    使用方式：
+        services = get_service_container()
+        pipeline = StockAnalysisPipeline(config=config, services=services, source_message=message)
+    """
+
+    def __init__(self, config: Optional[Config] = None):
+        self.config = config or get_config()
+        self._lock = threading.RLock()
+        self._fetcher_manager: Optional[DataFetcherManager] = None
+        self._analyzer: Optional[GeminiAnalyzer] = None
+        self._search_service: Optional[SearchService] = None
+        self._trend_analyzer: Optional[StockTrendAnalyzer] = None
+
+    @property
+    def db(self):
+        return get_db()
+
+    @property
+    def fetcher_manager(self) -> DataFetcherManager:
+        if self._fetcher_manager is None:
+            with self._lock:
+                if self._fetcher_manager is None:
+                    self._fetcher_manager = DataFetcherManager()
+        return self._fetcher_manager
+
+    @property
+    def analyzer(self) -> GeminiAnalyzer:
+        if self._analyzer is None:
+            with self._lock:
+                if self._analyzer is None:
+                    self._analyzer = GeminiAnalyzer()
+        return self._analyzer
+
+    @property
+    def search_service(self) -> SearchService:
+        if self._search_service is None:
+            with self._lock:
+                if self._search_service is None:
+                    self._search_service = SearchService(
+                        bocha_keys=self.config.bocha_api_keys,
+                        tavily_keys=self.config.tavily_api_keys,
+                        serpapi_keys=self.config.serpapi_keys,
+                    )
+        return self._search_service
+
+    @property
+    def trend_analyzer(self) -> StockTrendAnalyzer:
+        if self._trend_analyzer is None:
+            with self._lock:
+                if self._trend_analyzer is None:
+                    self._trend_analyzer = StockTrendAnalyzer()
+        return self._trend_analyzer
+
+    def warm_up(self) -> None:
+        """提前初始化所有组件（服务启动时调用，首个请求不再承担初始化开销）"""
+        start = time.time()
+        for name in ('fetcher_manager', 'analyzer', 'search_service', 'trend_analyzer'):
+            try:
+                getattr(self, name)
+            except Exception as e:
+                logger.warning(f"[服务容器] {name} 预热失败，将在首次使用时重试: {e}")
+        logger.info(f"[服务容器] 共享组件初始化完成，耗时 {time.time() - start:.2f}s")
+
+
+# === 便捷函数 ===
+_container: Optional[ServiceContainer] = None
+_container_lock = threading.Lock()
+
+
+def get_service_container() -> ServiceContainer:
+    """获取共享服务容器单例"""
+    global _container
+
+    if _container is None:
+        with _container_lock:
+            if _container is None:
+                _container = ServiceContainer()
+
+    return _container
+
+
+def reset_service_container() -> None:
+    """重置共享服务容器（主要用于测试或配置变更）"""
+    global _container
+
+    with _container_lock:
+        _container = None
@@ -0,0 +1,165 @@
+# -*- coding: utf-8 -*-
+"""
+===================================
+A股自选股智能分析系统 - 共享 HTTP 客户端
+===================================
+
+职责：
+1. 提供进程内共享的 requests.Session，按主机复用 Keep-Alive 连接（分段推送不再每段重新握手 TLS）
+2. 统一的默认超时与重试策略（只重试连接阶段的错误，不会重复投递 Webhook）
+3. 按主机统计请求次数、失败次数与延迟
+
+说明：
+- requests/urllib3 只支持 HTTP/1.1，连接复用已覆盖主要的握手开销
+- Tavily、SerpAPI 的 SDK 内部自行发起请求，不经过此客户端
+"""
+
+import logging
+import threading
+import time
+from dataclasses import dataclass
+from typing import Dict, Optional
+from urllib.parse import urlparse
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class HostStats:
+    """单个主机的请求统计"""
+    requests: int = 0
+    errors: int = 0
+    total_latency: float = 0.0
+    max_latency: float = 0.0
+
+    @property
+    def avg_latency(self) -> float:
+        return self.total_latency / self.requests if self.requests else 0.0
+
+
+class HttpStats:
+    """按主机统计 HTTP 请求延迟（线程安全）"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._hosts: Dict[str, HostStats] = {}
+
+    def record(self, host: str, latency: float, error: bool = False) -> None:
+        with self._lock:
+            stats = self._hosts.setdefault(host, HostStats())
+            stats.requests += 1
+            stats.total_latency += latency
+            stats.max_latency = max(stats.max_latency, latency)
+            if error:
+                stats.errors += 1
+
+    def snapshot(self) -> Dict[str, HostStats]:
+        """获取各主机统计的副本"""
+        with self._lock:
+            return {host: HostStats(**vars(stats)) for host, stats in self._hosts.items()}
+
+    def summary(self) -> str:
+        """单行摘要（用于日志）"""
+        hosts = self.snapshot()
+        if not hosts:
+            return "无 HTTP 请求"
+        parts = []
+        for host, stats in sorted(hosts.items(), key=lambda item: -item[1].requests):
+            text = f"{host} {stats.requests} 次/平均 {stats.avg_latency * 1000:.0f}ms/最大 {stats.max_latency * 1000:.0f}ms"
+            if stats.errors:
+                text += f"/失败 {stats.errors}"
+            parts.append(text)
+        return "；".join(parts)
+
+
+class PooledSession(requests.Session):
+    """
+    带连接池、默认超时和按主机统计的 Session
+
+    requests.Session 可以在多线程间共享使用（每个请求从连接池取独立连接）
+    """
+
+    def __init__(
+        self,
+        pool_maxsize: int = 10,
+        retries: int = 2,
+        default_timeout: float = 15.0,
+        stats: Optional[HttpStats] = None,
+    ):
+        """
+        Args:
+            pool_maxsize: 每个主机保持的最大连接数
+            retries: 连接失败时的重试次数（只重试连接阶段，请求发出后不再重试）
+            default_timeout: 调用方未指定 timeout 时的默认超时（秒）
+            stats: 统计对象
+        """
+        super().__init__()
+        self.default_timeout = default_timeout
+        self.stats = stats or HttpStats()
+
+        retry = Retry(
+            total=retries,
+            connect=retries,
+            read=0,
+            status=0,
+            backoff_factor=0.5,
+            allowed_methods=None,  # 连接阶段失败时请求尚未发出，POST 重试也是安全的
+            raise_on_status=False,
+        )
+        adapter = HTTPAdapter(pool_connections=pool_maxsize, pool_maxsize=pool_maxsize, max_retries=retry)
+        self.mount('https://', adapter)
+        self.mount('http://', adapter)
+
+    def request(self, method, url, *args, **kwargs):
+        kwargs.setdefault('timeout', self.default_timeout)
+        host = urlparse(url).netloc or url
+        start = time.time()
+        try:
+            response = super().request(method, url, *args, **kwargs)
+        except requests.RequestException:
+            self.stats.record(host, time.time() - start, error=True)
+            raise
+        self.stats.record(host, time.time() - start, error=response.status_code >= 400)
+        return response
+
+
+# === 便捷函数 ===
+_session: Optional[PooledSession] = None
+_session_lock = threading.Lock()
+
+
+def get_http_session() -> PooledSession:
+    """获取共享 HTTP Session 单例"""
+    global _session
+
+    if _session is None:
+        with _session_lock:
+            if _session is None:
+                from src.config import get_config
+                config = get_config()
+                _session = PooledSession(
+                    pool_maxsize=config.http_pool_maxsize,
+                    retries=config.http_retries,
+                    default_timeout=config.http_timeout,
+                )
+
+    return _session
+
+
+def get_http_stats() -> HttpStats:
+    """获取共享 HTTP Session 的按主机统计"""
+    return get_http_session().stats
+
+
+def reset_http_session() -> None:
+    """关闭并重置共享 Session（主要用于测试或配置变更）"""
+    global _session
+
+    with _session_lock:
+        if _session is not None:
+            _session.close()
+        _session = None
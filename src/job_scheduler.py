@@ -0,0 +1,303 @@
+# -*- coding: utf-8 -*-
+"""
+===================================
+A股自选股智能分析系统 - 进程内任务调度
+===================================
+
+职责：
+1. 进程内唯一的分析工作线程池，WebUI、机器人命令、定时任务共用，避免互相抢占数据源
+2. 优先级：交互式单股分析 > 批量分析 > 大盘复盘
+3. 队列深度上限与单用户排队上限（准入控制），超出时立即拒绝而不是无限堆积
+4. 同一优先级内按用户轮转，单个用户的大批量任务不会饿死其他用户
+5. 统计各优先级的排队深度与等待时间
+
+使用方式：
+    scheduler = get_job_scheduler()
+    future = scheduler.submit(fn, arg, priority=JobPriority.INTERACTIVE, user=message.user_id)
+    future.result()
+
+说明：
+- 批量任务的编排线程（如 pipeline.run）只负责提交和收集，单只股票的工作在调度器线程中执行；
+  编排逻辑不要作为任务提交，否则等待子任务会占满工作线程
+"""
+
+import heapq
+import itertools
+import logging
+import threading
+import time
+from concurrent.futures import Future
+from dataclasses import dataclass, field
+from enum import IntEnum
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+class JobPriority(IntEnum):
+    """任务优先级（数值越小越优先）"""
+    INTERACTIVE = 0   # 交互式单股分析（WebUI / 机器人 /analyze）
+    BATCH = 1         # 批量分析（定时任务 / 机器人 /batch）
+    MARKET = 2        # 大盘复盘
+
+
+class JobRejected(Exception):
+    """任务被准入控制拒绝（队列已满或用户排队过多）"""
+    pass
+
+
+@dataclass(order=True)
+class _Job:
+    sort_key: Tuple[int, int, int]
+    future: Future = field(compare=False)
+    fn: Callable[..., Any] = field(compare=False)
+    args: Tuple[Any, ...] = field(compare=False)
+    kwargs: Dict[str, Any] = field(compare=False)
+    priority: JobPriority = field(compare=False)
+    user: str = field(compare=False)
+    name: str = field(compare=False)
+    enqueued_at: float = field(compare=False)
+
+
+@dataclass
+class _WaitStats:
+    count: int = 0
+    total: float = 0.0
+    max: float = 0.0
+
+    def record(self, wait: float) -> None:
+        self.count += 1
+        self.total += wait
+        self.max = max(self.max, wait)
+
+    @property
+    def avg(self) -> float:
+        return self.total / self.count if self.count else 0.0
+
+
+class JobScheduler:
+    """
+    带优先级、准入控制与用户公平性的线程池
+    """
+
+    def __init__(self, workers: int = 3, max_queue: int = 100, max_per_user: int = 20):
+        """
+        Args:
+            workers: 工作线程数（整个进程的分析并发上限）
+            max_queue: 排队任务上限（不含执行中的任务）
+            max_per_user: 单个用户排队 + 执行中的任务上限（0 表示不限制）
+        """
+        self.workers = max(1, workers)
+        self.max_queue = max(1, max_queue)
+        self.max_per_user = max(0, max_per_user)
+
+        self._cond = threading.Condition()
+        self._heap: List[_Job] = []
+        self._seq = itertools.count()
+        self._threads: List[threading.Thread] = []
+        # 用户公平性：每个优先级维护当前轮次，以及各用户下一个任务的轮次
+        self._current_round: Dict[JobPriority, int] = {p: 0 for p in JobPriority}
+        self._user_round: Dict[Tuple[JobPriority, str], int] = {}
+        self._user_active: Dict[str, int] = {}
+
+        self._running = 0
+        self._submitted = 0
+        self._completed = 0
+        self._rejected = 0
+        self._wait_stats: Dict[JobPriority, _WaitStats] = {p: _WaitStats() for p in JobPriority}
+
+    @classmethod
+    def from_config(cls, config=None) -> 'JobScheduler':
+        """根据配置创建调度器"""
+        if config is None:
+            from src.config import get_config
+            config = get_config()
+        return cls(
+            workers=config.job_workers or config.max_workers,
+            max_queue=config.job_queue_max,
+            max_per_user=config.job_max_per_user,
+        )
+
+    # ========== 提交 ==========
+
+    def submit(
+        self,
+        fn: Callable[..., Any],
+        *args: Any,
+        priority: JobPriority = JobPriority.INTERACTIVE,
+        user: str = "system",
+        name: str = "",
+        block: bool = False,
+        timeout: Optional[float] = None,
+        **kwargs: Any,
+    ) -> Future:
+        """
+        提交任务
+
+        Args:
+            fn: 任务函数
+            priority: 优先级
+            user: 提交者（用于单用户上限与轮转）
+            name: 任务名称（用于日志）
+            block: 队列已满时是否等待空位（内部编排使用；对外入口应直接拒绝）
+            timeout: block=True 时的最长等待时间（秒）
+
+        Returns:
+            concurrent.futures.Future
+
+        Raises:
+            JobRejected: 队列已满或用户排队过多
+        """
+        future: Future = Future()
+        deadline = None if timeout is None else time.time() + timeout
+
+        with self._cond:
+            while True:
+                reason = self._admission_error(user)
+                if reason is None:
+                    break
+                remaining = None if deadline is None else deadline - time.time()
+                if not block or (remaining is not None and remaining <= 0):
+                    self._rejected += 1
+                    logger.warning(f"[任务调度] 拒绝任务 {name or fn.__name__}（用户 {user}）: {reason}")
+                    raise JobRejected(reason)
+                self._cond.wait(remaining)
+
+            round_key = (priority, user)
+            job_round = max(self._user_round.get(round_key, 0), self._current_round[priority])
+            self._user_round[round_key] = job_round + 1
+            self._user_active[user] = self._user_active.get(user, 0) + 1
+
+            job = _Job(
+                sort_key=(int(priority), job_round, next(self._seq)),
+                future=future,
+                fn=fn,
+                args=args,
+                kwargs=kwargs,
+                priority=priority,
+                user=user,
+                name=name or getattr(fn, '__name__', 'job'),
+                enqueued_at=time.time(),
+            )
+            heapq.heappush(self._heap, job)
+            self._submitted += 1
+            self._ensure_workers()
+            self._cond.notify_all()
+
+        return future
+
+    def can_admit(self, user: str = "system", count: int = 1) -> bool:
+        """当前是否还能接纳 count 个任务（用于提交批量任务前的预检）"""
+        with self._cond:
+            if len(self._heap) + count > self.max_queue:
+                return False
+            return not self.max_per_user or self._user_active.get(user, 0) + count <= self.max_per_user
+
+    def _admission_error(self, user: str) -> Optional[str]:
+        if len(self._heap) >= self.max_queue:
+            return f"任务队列已满（{self.max_queue}）"
+        if self.max_per_user and self._user_active.get(user, 0) >= self.max_per_user:
+            return f"该用户已有 {self.max_per_user} 个任务在排队或执行"
+        return None
+
+    # ========== 执行 ==========
+
+    def _ensure_workers(self) -> None:
+        """按需启动工作线程（调用方持有锁）"""
+        self._threads = [t for t in self._threads if t.is_alive()]
+        while len(self._threads) < self.workers:
+            thread = threading.Thread(
+                target=self._worker, name=f"job-worker-{len(self._threads)}", daemon=True
+            )
+            self._threads.append(thread)
+            thread.start()
+
+    def _worker(self) -> None:
+        while True:
+            with self._cond:
+                while not self._heap:
+                    self._cond.wait()
+                job = heapq.heappop(self._heap)
+                self._current_round[job.priority] = max(self._current_round[job.priority], job.sort_key[1])
+                wait = time.time() - job.enqueued_at
+                self._wait_stats[job.priority].record(wait)
+                self._running += 1
+                # 队列出现空位，唤醒阻塞提交的编排线程
+                self._cond.notify_all()
+
+            if wait >= 5:
+                logger.info(f"[任务调度] {job.name}（{job.priority.name}）排队 {wait:.1f}s 后开始执行")
+
+            if job.future.set_running_or_notify_cancel():
+                try:
+                    job.future.set_result(job.fn(*job.args, **job.kwargs))
+                except BaseException as e:
+                    job.future.set_exception(e)
+
+            with self._cond:
+                self._running -= 1
+                self._completed += 1
+                active = self._user_active.get(job.user, 1) - 1
+                if active > 0:
+                    self._user_active[job.user] = active
+                else:
+                    self._user_active.pop(job.user, None)
+                    for priority in JobPriority:
+                        self._user_round.pop((priority, job.user), None)
+                self._cond.notify_all()
+
+    # ========== 统计 ==========
+
+    def stats(self) -> Dict[str, Any]:
+        """队列深度、执行数与各优先级等待时间"""
+        with self._cond:
+            depth = {p.name: 0 for p in JobPriority}
+            oldest = 0.0
+            now = time.time()
+            for job in self._heap:
+                depth[job.priority.name] += 1
+                oldest = max(oldest, now - job.enqueued_at)
+            return {
+                "workers": self.workers,
+                "running": self._running,
+                "queued": len(self._heap),
+                "queued_by_priority": depth,
+                "oldest_wait_seconds": round(oldest, 3),
+                "submitted": self._submitted,
+                "completed": self._completed,
+                "rejected": self._rejected,
+                "wait_seconds": {
+                    p.name: {"avg": round(s.avg, 3), "max": round(s.max, 3), "count": s.count}
+                    for p, s in self._wait_stats.items()
+                },
+            }
+
+    def summary(self) -> str:
+        """单行摘要（用于日志）"""
+        stats = self.stats()
+        waits = "，".join(
+            f"{name} 平均等待 {item['avg']:.1f}s/最大 {item['max']:.1f}s"
+            for name, item in stats["wait_seconds"].items() if item["count"]
+        )
+        text = (
+            f"执行中 {stats['running']}/{stats['workers']}，排队 {stats['queued']}，"
+            f"已完成 {stats['completed']}，拒绝 {stats['rejected']}"
+        )
+        return f"{text}；{waits}" if waits else text
+
+
+# === 便捷函数 ===
+_scheduler: Optional[JobScheduler] = None
+_scheduler_lock = threading.Lock()
+
+
+def get_job_scheduler() -> JobScheduler:
+    """获取任务调度器单例"""
+    global _scheduler
+
+    if _scheduler is None:
+        with _scheduler_lock:
+            if _scheduler is None:
+                _scheduler = JobScheduler.from_config()
+
+    return _scheduler
@@ -0,0 +1,296 @@
+# -*- coding: utf-8 -*-
+"""
+===================================
+A股自选股智能分析系统 - LLM 调度器
+===================================
+
+职责：
+1. 进程级 LLM 并发控制（所有线程共享同一个并发上限）
+2. 按 模型/Key 维度管理 RPM/TPM 配额与最小请求间隔
+3. 429 自适应退避：限流时放慢共享调度器，而不是让每个线程各自 sleep
+4. 批量任务并行提交（保持输入顺序返回结果）
+
+使用方式：
+    dispatcher = get_llm_dispatcher()
+    with dispatcher.slot("gemini:gemini-2.5-flash", estimated_tokens=3000):
+        response = model.generate_content(...)
+"""
+
+import logging
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from typing import Any, Callable, Deque, Dict, Iterator, List, Optional, Sequence, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+def estimate_tokens(text: Optional[str]) -> int:
+    """
+    粗略估算文本 token 数（用于 TPM 预算）
+
+    中文约 1 字 1 token（UTF-8 下 3 字节），英文约 4 字符 1 token，
+    按 UTF-8 字节数 / 3 估算，对中英文混排偏保守。
+    """
+    if not text:
+        return 0
+    return max(1, len(text.encode('utf-8')) // 3)
+
+
+@dataclass
+class _RateBudget:
+    """单个 模型/Key 的滑动窗口配额状态"""
+    requests: Deque[Tuple[float, int]] = field(default_factory=deque)  # (时间戳, token 数)
+    tokens_in_window: int = 0
+    last_request_time: float = 0.0
+    cooldown_until: float = 0.0  # 共享冷却截止时间（429 退避）
+    backoff_level: int = 0  # 连续限流次数
+    total_requests: int = 0
+    total_tokens: int = 0
+    rate_limit_count: int = 0
+
+    def prune(self, now: float, window: float = 60.0) -> None:
+        """移除窗口外的请求记录"""
+        while self.requests and now - self.requests[0][0] >= window:
+            _, tokens = self.requests.popleft()
+            self.tokens_in_window -= tokens
+
+    def wait_time(self, now: float, tokens: int, rpm_limit: int, tpm_limit: int, min_interval: float) -> float:
+        """计算本次请求需要等待的秒数（0 表示可立即发出）"""
+        waits = [self.cooldown_until - now]
+
+        if min_interval > 0 and self.last_request_time:
+            waits.append(self.last_request_time + min_interval - now)
+
+        if rpm_limit > 0 and len(self.requests) >= rpm_limit:
+            waits.append(self.requests[-rpm_limit][0] + 60.0 - now)
+
+        if tpm_limit > 0 and self.requests and self.tokens_in_window + tokens > tpm_limit:
+            # 找到最早的一批记录，移除后能腾出足够 token 的时间点
+            released = 0
+            excess = self.tokens_in_window + tokens - tpm_limit
+            for ts, used in self.requests:
+                released += used
+                if released >= excess:
+                    waits.append(ts + 60.0 - now)
+                    break
+
+        return max(waits)
+
+    def record(self, now: float, tokens: int) -> None:
+        """记录一次已放行的请求"""
+        self.requests.append((now, tokens))
+        self.tokens_in_window += tokens
+        self.last_request_time = now
+        self.total_requests += 1
+        self.total_tokens += tokens
+
+
+class LLMDispatcher:
+    """
+    进程级 LLM 请求调度器
+
+    设计说明：
+    - 并发上限由信号量控制，所有分析线程共享
+    - 每个 budget_key（通常为 "provider:model"）独立维护 RPM/TPM 滑动窗口
+    - 收到 429 时对该 key 设置共享冷却期，冷却时长按连续限流次数指数增长；
+      请求成功后逐级恢复。冷却期间排队的请求统一等待，不再各自 sleep
+    """
+
+    def __init__(
+        self,
+        max_concurrency: int = 3,
+        rpm_limit: int = 0,
+        tpm_limit: int = 0,
+        min_interval: float = 0.0,
+        base_backoff: float = 5.0,
+        max_backoff: float = 60.0,
+    ):
+        """
+        初始化调度器
+
+        Args:
+            max_concurrency: 最大并发请求数
+            rpm_limit: 每个 key 每分钟最大请求数（0 表示不限制）
+            tpm_limit: 每个 key 每分钟最大输入 token 数（0 表示不限制）
+            min_interval: 同一 key 两次请求之间的最小间隔（秒）
+            base_backoff: 429 退避基础时长（秒）
+            max_backoff: 429 退避最大时长（秒）
+        """
+        self.max_concurrency = max(1, max_concurrency)
+        self.rpm_limit = max(0, rpm_limit)
+        self.tpm_limit = max(0, tpm_limit)
+        self.min_interval = max(0.0, min_interval)
+        self.base_backoff = base_backoff
+        self.max_backoff = max_backoff
+
+        self._semaphore = threading.BoundedSemaphore(self.max_concurrency)
+        self._cond = threading.Condition()
+        self._budgets: Dict[str, _RateBudget] = {}
+        self._in_flight = 0
+
+    def _get_budget(self, budget_key: str) -> _RateBudget:
+        """获取或初始化 key 的配额状态（调用方需持有锁）"""
+        if budget_key not in self._budgets:
+            self._budgets[budget_key] = _RateBudget()
+        return self._budgets[budget_key]
+
+    def _reserve(self, budget_key: str, estimated_tokens: int) -> float:
+        """
+        等待配额并登记本次请求
+
+        Returns:
+            实际等待的秒数
+        """
+        start = time.time()
+        logged = False
+        with self._cond:
+            while True:
+                budget = self._get_budget(budget_key)
+                now = time.time()
+                budget.prune(now)
+                wait = budget.wait_time(now, estimated_tokens, self.rpm_limit, self.tpm_limit, self.min_interval)
+                if wait <= 0:
+                    budget.record(now, estimated_tokens)
+                    return now - start
+                if not logged and wait > 1:
+                    logger.info(f"[LLM调度] {budget_key} 配额/冷却限制，排队等待 {wait:.1f} 秒")
+                    logged = True
+                self._cond.wait(timeout=wait)
+
+    @contextmanager
+    def slot(self, budget_key: str, estimated_tokens: int = 0) -> Iterator[None]:
+        """
+        获取一个请求槽位（上下文管理器）
+
+        先等待该 key 的配额与冷却期，再占用全局并发槽位，
+        避免排队等冷却的请求占着并发额度。
+
+        Args:
+            budget_key: 配额维度（如 "gemini:gemini-2.5-flash"）
+            estimated_tokens: 预估输入 token 数
+        """
+        self._reserve(budget_key, estimated_tokens)
+        self._semaphore.acquire()
+        with self._cond:
+            self._in_flight += 1
+        try:
+            yield
+        finally:
+            with self._cond:
+                self._in_flight -= 1
+            self._semaphore.release()
+
+    def report_rate_limit(self, budget_key: str) -> float:
+        """
+        报告一次 429 限流，延长该 key 的共享冷却期
+
+        Returns:
+            冷却时长（秒）
+        """
+        with self._cond:
+            budget = self._get_budget(budget_key)
+            budget.backoff_level += 1
+            budget.rate_limit_count += 1
+            cooldown = min(self.base_backoff * (2 ** (budget.backoff_level - 1)), self.max_backoff)
+            budget.cooldown_until = max(budget.cooldown_until, time.time() + cooldown)
+            level = budget.backoff_level
+        logger.warning(f"[LLM调度] {budget_key} 触发限流，共享冷却 {cooldown:.1f} 秒 (连续 {level} 次)")
+        return cooldown
+
+    def cooldown_remaining(self, budget_key: str) -> float:
+        """该 key 剩余的 429 冷却时间（秒）"""
+        with self._cond:
+            budget = self._budgets.get(budget_key)
+            if budget is None:
+                return 0.0
+            return max(0.0, budget.cooldown_until - time.time())
+
+    def report_success(self, budget_key: str) -> None:
+        """报告请求成功，逐级降低退避等级"""
+        with self._cond:
+            budget = self._get_budget(budget_key)
+            if budget.backoff_level > 0:
+                budget.backoff_level -= 1
+
+    def map(
+        self,
+        func: Callable[[Any], Any],
+        items: Sequence[Any],
+        max_workers: Optional[int] = None,
+    ) -> List[Any]:
+        """
+        并行执行批量任务，按输入顺序返回结果
+
+        实际的 LLM 请求速率仍由 slot() 控制，这里只负责并行提交。
+
+        Args:
+            func: 处理单个元素的函数
+            items: 待处理元素列表
+            max_workers: 线程数（默认等于最大并发数）
+        """
+        if not items:
+            return []
+        workers = min(max_workers or self.max_concurrency, len(items))
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="llm") as executor:
+            return list(executor.map(func, items))
+
+    def get_stats(self) -> Dict[str, Any]:
+        """获取调度器统计信息"""
+        with self._cond:
+            now = time.time()
+            keys = {}
+            for budget_key, budget in self._budgets.items():
+                budget.prune(now)
+                keys[budget_key] = {
+                    'requests_last_minute': len(budget.requests),
+                    'tokens_last_minute': budget.tokens_in_window,
+                    'total_requests': budget.total_requests,
+                    'total_tokens': budget.total_tokens,
+                    'rate_limit_count': budget.rate_limit_count,
+                    'cooldown_remaining': max(0.0, budget.cooldown_until - now),
+                }
+            return {
+                'max_concurrency': self.max_concurrency,
+                'in_flight': self._in_flight,
+                'keys': keys,
+            }
+
+
+# === 便捷函数 ===
+_dispatcher: Optional[LLMDispatcher] = None
+_dispatcher_lock = threading.Lock()
+
+
+def get_llm_dispatcher() -> LLMDispatcher:
+    """获取 LLM 调度器单例（进程内共享）"""
+    global _dispatcher
+
+    if _dispatcher is None:
+        with _dispatcher_lock:
+            if _dispatcher is None:
+                from src.config import get_config
+                config = get_config()
+
+                _dispatcher = LLMDispatcher(
+                    max_concurrency=config.llm_max_concurrency,
+                    rpm_limit=config.llm_rpm_limit,
+                    tpm_limit=config.llm_tpm_limit,
+                    min_interval=config.gemini_request_delay,
+                    base_backoff=config.gemini_retry_delay,
+                )
+                logger.info(
+                    f"LLM 调度器初始化完成 (并发: {config.llm_max_concurrency}, "
+                    f"RPM: {config.llm_rpm_limit or '不限'}, TPM: {config.llm_tpm_limit or '不限'})"
+                )
+
+    return _dispatcher
+
+
+def reset_llm_dispatcher() -> None:
+    """重置 LLM 调度器（用于测试）"""
+    global _dispatcher
+    _dispatcher = None
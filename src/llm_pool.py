@@ -0,0 +1,273 @@
+# -*- coding: utf-8 -*-
+"""
+===================================
+A股自选股智能分析系统 - LLM 端点池
+===================================
+
+职责：
+1. 管理多个 (provider, key, model) 端点，吞吐随 Key 数量线性扩展
+2. 按优先级分层 + 层内加权最少负载选择端点
+3. 端点健康跟踪：连续失败熔断、冷却后自动恢复
+4. 与 LLM 调度器配合：每个端点独立的 RPM/TPM 配额与 429 冷却
+
+优先级（数值越小越优先）：
+    0 = Gemini 主模型，1 = Gemini 备选模型，2 = OpenAI 兼容 API
+同一层内的多个 Key 之间做负载均衡；整层不可用（熔断/冷却中）时才降级到下一层。
+"""
+
+import hashlib
+import logging
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Any, Dict, Iterable, List, Optional, Set
+
+from src.llm_dispatcher import get_llm_dispatcher
+
+logger = logging.getLogger(__name__)
+
+
+# 端点优先级
+PRIORITY_GEMINI_PRIMARY = 0
+PRIORITY_GEMINI_FALLBACK = 1
+PRIORITY_OPENAI = 2
+
+
+def is_valid_api_key(key: Optional[str]) -> bool:
+    """过滤未填写或占位符形式的 API Key"""
+    return bool(key) and not key.startswith('your_') and len(key) > 10
+
+
+@dataclass
+class LLMEndpoint:
+    """单个 LLM 端点 (provider, key, model)"""
+    provider: str  # gemini / openai
+    api_key: str
+    model: str
+    weight: float = 1.0  # 负载权重（越大分到的请求越多）
+    priority: int = PRIORITY_GEMINI_PRIMARY
+    base_url: Optional[str] = None  # OpenAI 兼容 API 地址
+
+    # ========== 运行时状态 ==========
+    in_flight: int = 0
+    total_calls: int = 0
+    total_failures: int = 0
+    consecutive_failures: int = 0
+    unhealthy_until: float = 0.0  # 熔断截止时间
+    disabled: bool = False  # 客户端无法创建（依赖缺失等），永久禁用
+    client: Any = field(default=None, repr=False)  # 懒加载的 SDK 客户端/模型对象
+
+    @property
+    def key_id(self) -> str:
+        """Key 的稳定短标识（哈希，不同 Key 互不相同；前缀如 sk-proj- 会在多个 Key 间重复）"""
+        return hashlib.sha256(self.api_key.encode('utf-8')).hexdigest()[:12]
+
+    @property
+    def name(self) -> str:
+        """端点唯一标识（调度配额维度、失败排除集合）"""
+        return f"{self.provider}:{self.model}#{self.key_id}"
+
+    @property
+    def label(self) -> str:
+        """脱敏的端点描述（仅用于日志，Key 只保留末 4 位）"""
+        return f"{self.provider}:{self.model}#…{self.api_key[-4:]}"
+
+    @property
+    def budget_key(self) -> str:
+        """LLM 调度器中的配额维度（每个端点独立）"""
+        return self.name
+
+
+class LLMEndpointPool:
+    """
+    LLM 端点池
+
+    选择策略：
+    1. 过滤掉已禁用、熔断中、调度器冷却中的端点
+    2. 取优先级最高（数值最小）的一层
+    3. 层内按 in_flight / weight 最小选择（最少负载），再按累计调用量打散
+    4. 若全部端点都不可用，选择最早恢复的端点（调度器会在 slot() 中等待冷却）
+    """
+
+    def __init__(
+        self,
+        endpoints: Iterable[LLMEndpoint],
+        failure_threshold: int = 3,
+        cooldown_seconds: float = 120.0,
+    ):
+        """
+        初始化端点池
+
+        Args:
+            endpoints: 端点列表
+            failure_threshold: 连续失败多少次后熔断（不含 429，429 由调度器冷却）
+            cooldown_seconds: 熔断冷却时间（秒）
+        """
+        self._endpoints: List[LLMEndpoint] = list(endpoints)
+        self.failure_threshold = failure_threshold
+        self.cooldown_seconds = cooldown_seconds
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._endpoints)
+
+    @property
+    def endpoints(self) -> List[LLMEndpoint]:
+        return list(self._endpoints)
+
+    def usable_count(self) -> int:
+        """未被永久禁用的端点数"""
+        return sum(1 for ep in self._endpoints if not ep.disabled)
+
+    @property
+    def is_available(self) -> bool:
+        """是否存在可用（未被永久禁用）的端点"""
+        return any(not ep.disabled for ep in self._endpoints)
+
+    @classmethod
+    def from_config(cls, config, gemini_keys: Optional[List[str]] = None) -> 'LLMEndpointPool':
+        """
+        根据配置构建端点池
+
+        Args:
+            config: Config 对象
+            gemini_keys: 覆盖配置中的 Gemini Key 列表（可选）
+        """
+        endpoints: List[LLMEndpoint] = []
+
+        # 去重：重复配置的 Key 会得到相同的端点标识
+        keys = list(dict.fromkeys(
+            k for k in (gemini_keys if gemini_keys is not None else config.gemini_api_keys) if is_valid_api_key(k)
+        ))
+        models = [(config.gemini_model, PRIORITY_GEMINI_PRIMARY)]
+        if config.gemini_model_fallback and config.gemini_model_fallback != config.gemini_model:
+            models.append((config.gemini_model_fallback, PRIORITY_GEMINI_FALLBACK))
+        for model, priority in models:
+            for key in keys:
+                endpoints.append(LLMEndpoint(provider='gemini', api_key=key, model=model, priority=priority))
+
+        base_url = config.openai_base_url if config.openai_base_url and config.openai_base_url.startswith('http') else None
+        for key in dict.fromkeys(config.openai_api_keys):
+            if is_valid_api_key(key):
+                endpoints.append(LLMEndpoint(
+                    provider='openai',
+                    api_key=key,
+                    model=config.openai_model,
+                    priority=PRIORITY_OPENAI,
+                    base_url=base_url,
+                ))
+
+        return cls(endpoints)
+
+    def _is_healthy(self, endpoint: LLMEndpoint, now: float, dispatcher) -> bool:
+        """端点当前是否可直接使用（未熔断且不在 429 冷却中）"""
+        if endpoint.disabled or now < endpoint.unhealthy_until:
+            return False
+        return dispatcher.cooldown_remaining(endpoint.budget_key) <= 0
+
+    def acquire(self, exclude: Optional[Set[str]] = None) -> Optional[LLMEndpoint]:
+        """
+        选择一个端点并占用（in_flight + 1），使用完必须调用 release()
+
+        Args:
+            exclude: 本次调用中需要跳过的端点名称（如刚失败过的端点）
+
+        Returns:
+            LLMEndpoint，没有任何可用端点时返回 None
+        """
+        exclude = exclude or set()
+        dispatcher = get_llm_dispatcher()
+
+        with self._lock:
+            usable = [ep for ep in self._endpoints if not ep.disabled]
+            if not usable:
+                return None
+
+            candidates = [ep for ep in usable if ep.name not in exclude] or usable
+            now = time.time()
+            healthy = [ep for ep in candidates if self._is_healthy(ep, now, dispatcher)]
+
+            if healthy:
+                top = min(ep.priority for ep in healthy)
+                tier = [ep for ep in healthy if ep.priority == top]
+                chosen = min(
+                    tier,
+                    key=lambda ep: (ep.in_flight / ep.weight, ep.total_calls / ep.weight),
+                )
+            else:
+                # 全部熔断/冷却中：选择最早恢复的端点，由调度器负责等待
+                chosen = min(
+                    candidates,
+                    key=lambda ep: (
+                        max(ep.unhealthy_until - now, dispatcher.cooldown_remaining(ep.budget_key)),
+                        ep.priority,
+                    ),
+                )
+
+            chosen.in_flight += 1
+            chosen.total_calls += 1
+            return chosen
+
+    def release(self, endpoint: LLMEndpoint, success: bool, rate_limited: bool = False) -> None:
+        """
+        释放端点并记录调用结果
+
+        Args:
+            endpoint: acquire() 返回的端点
+            success: 是否调用成功
+            rate_limited: 是否为 429 限流（限流不计入熔断，由调度器冷却）
+        """
+        with self._lock:
+            endpoint.in_flight = max(0, endpoint.in_flight - 1)
+            if success:
+                if endpoint.consecutive_failures and endpoint.unhealthy_until:
+                    logger.info(f"[LLM池] {endpoint.label} 恢复正常")
+                endpoint.consecutive_failures = 0
+                endpoint.unhealthy_until = 0.0
+                return
+
+            endpoint.total_failures += 1
+            if rate_limited:
+                return
+
+            endpoint.consecutive_failures += 1
+            if endpoint.consecutive_failures >= self.failure_threshold:
+                endpoint.unhealthy_until = time.time() + self.cooldown_seconds
+                logger.warning(
+                    f"[LLM池] {endpoint.label} 连续失败 {endpoint.consecutive_failures} 次，"
+                    f"熔断 {self.cooldown_seconds:.0f}s"
+                )
+
+    def disable(self, endpoint: LLMEndpoint, reason: str) -> None:
+        """永久禁用端点（如 SDK 未安装、客户端无法创建）"""
+        with self._lock:
+            endpoint.disabled = True
+        logger.error(f"[LLM池] 禁用端点 {endpoint.label}: {reason}")
+
+    def describe(self) -> str:
+        """端点池概览（用于日志）"""
+        groups: Dict[str, int] = {}
+        for ep in self._endpoints:
+            if not ep.disabled:
+                label = f"{ep.provider}:{ep.model}"
+                groups[label] = groups.get(label, 0) + 1
+        return ", ".join(f"{label}×{count}" for label, count in groups.items()) or "无可用端点"
+
+    def get_stats(self) -> List[Dict[str, Any]]:
+        """获取各端点统计信息"""
+        now = time.time()
+        with self._lock:
+            return [
+                {
+                    'endpoint': ep.name,
+                    'label': ep.label,
+                    'priority': ep.priority,
+                    'weight': ep.weight,
+                    'in_flight': ep.in_flight,
+                    'total_calls': ep.total_calls,
+                    'total_failures': ep.total_failures,
+                    'healthy': not ep.disabled and now >= ep.unhealthy_until,
+                    'disabled': ep.disabled,
+                }
+                for ep in self._endpoints
+            ]
@@ -0,0 +1,169 @@
+# -*- coding: utf-8 -*-
+"""
+===================================
+A股自选股智能分析系统 - LLM 流式响应解析
+===================================
+
+职责：
+1. 增量解析流式返回的决策仪表盘 JSON，字段一生成完就能拿到
+2. 容忍 JSON 前的 ```json 代码块标记等多余文本
+
+说明：
+- 只解析标量字段（字符串/数字/布尔/null），按点分路径输出，
+  如 "sentiment_score"、"dashboard.core_conclusion.one_sentence"
+- 完整结果仍由 GeminiAnalyzer._parse_response 统一解析（含 JSON 修复），
+  这里只负责"提前拿到关键字段"
+"""
+
+import json
+import logging
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+class StreamingJSONParser:
+    """
+    流式 JSON 标量字段解析器
+
+    使用方式：
+        parser = StreamingJSONParser(on_field=lambda path, value: ...)
+        for chunk in stream:
+            parser.feed(chunk)
+        text = parser.text  # 完整响应文本
+    """
+
+    def __init__(self, on_field: Optional[Callable[[str, Any], None]] = None):
+        """
+        Args:
+            on_field: 每解析出一个完整标量字段时的回调 (路径, 值)
+        """
+        self.on_field = on_field
+        self.reset()
+
+    def reset(self) -> None:
+        """清空状态（重试时重新开始解析）"""
+        self.fields: Dict[str, Any] = {}
+        self._chunks: List[str] = []
+        self._started = False
+        self._done = False
+        # 栈元素：[容器类型 'obj'/'arr', 容器路径, 当前键或数组下标, 对象是否在等待键]
+        self._stack: List[list] = []
+        self._in_string = False
+        self._escape = False
+        self._string_is_key = False
+        self._buf: List[str] = []
+        self._scalar: List[str] = []
+
+    @property
+    def text(self) -> str:
+        """目前为止收到的完整文本"""
+        return ''.join(self._chunks)
+
+    @property
+    def done(self) -> bool:
+        """根对象是否已闭合"""
+        return self._done
+
+    def feed(self, chunk: str) -> List[Tuple[str, Any]]:
+        """
+        输入一段流式文本
+
+        Returns:
+            本次新解析出的 [(路径, 值), ...]
+        """
+        if not chunk:
+            return []
+        self._chunks.append(chunk)
+        emitted: List[Tuple[str, Any]] = []
+        for ch in chunk:
+            if self._done:
+                break
+            self._consume(ch, emitted)
+        return emitted
+
+    # ========== 内部状态机 ==========
+
+    def _consume(self, ch: str, emitted: List[Tuple[str, Any]]) -> None:
+        if not self._started:
+            if ch == '{':
+                self._started = True
+                self._stack.append(['obj', (), None, True])
+            return
+
+        if self._in_string:
+            if self._escape:
+                self._buf.append('\\' + ch)
+                self._escape = False
+            elif ch == '\\':
+                self._escape = True
+            elif ch == '"':
+                self._in_string = False
+                value = self._decode_string(''.join(self._buf))
+                self._buf = []
+                if self._string_is_key:
+                    self._stack[-1][2] = value
+                    self._stack[-1][3] = False
+                else:
+                    self._emit(value, emitted)
+            else:
+                self._buf.append(ch)
+            return
+
+        frame = self._stack[-1]
+        if ch == '"':
+            self._in_string = True
+            self._string_is_key = frame[0] == 'obj' and frame[3]
+        elif ch in '{[':
+            self._stack.append(['obj' if ch == '{' else 'arr', self._child_path(), None if ch == '{' else 0, ch == '{'])
+        elif ch in '}]':
+            self._flush_scalar(emitted)
+            self._stack.pop()
+            if not self._stack:
+                self._done = True
+        elif ch == ',':
+            self._flush_scalar(emitted)
+            if frame[0] == 'obj':
+                frame[2] = None
+                frame[3] = True
+            else:
+                frame[2] += 1
+        elif ch == ':':
+            frame[3] = False
+        elif ch.isspace():
+            self._flush_scalar(emitted)
+        else:
+            self._scalar.append(ch)
+
+    def _child_path(self) -> tuple:
+        """当前值在 JSON 中的路径"""
+        frame = self._stack[-1]
+        return frame[1] + (frame[2],)
+
+    def _emit(self, value: Any, emitted: List[Tuple[str, Any]]) -> None:
+        path = '.'.join(str(p) for p in self._child_path())
+        self.fields[path] = value
+        emitted.append((path, value))
+        if self.on_field:
+            try:
+                self.on_field(path, value)
+            except Exception as e:
+                logger.warning(f"[流式解析] 字段回调异常 ({path}): {e}")
+
+    def _flush_scalar(self, emitted: List[Tuple[str, Any]]) -> None:
+        if not self._scalar:
+            return
+        raw = ''.join(self._scalar)
+        self._scalar = []
+        try:
+            value = json.loads(raw)
+        except ValueError:
+            value = raw
+        self._emit(value, emitted)
+
+    @staticmethod
+    def _decode_string(raw: str) -> str:
+        try:
+            return json.loads(f'"{raw}"')
+        except ValueError:
+            return raw
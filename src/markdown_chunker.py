@@ -0,0 +1,219 @@
+# -*- coding: utf-8 -*-
+"""
+===================================
+A股自选股智能分析系统 - Markdown 分段
+===================================
+
+职责：
+1. 为所有推送渠道提供统一的长消息分段（企业微信、飞书、钉钉、Telegram、Pushover 等）
+2. 按结构分段：优先在股票分隔线 `---` 处切分，其次是各级标题、空行、换行，最后按长度硬切
+3. 一次编码、按字节偏移切分，整体 O(n)，不会在多字节字符中间截断
+
+使用方式：
+    chunks = chunk_markdown(report, max_size=4000)                 # 按 UTF-8 字节计（企业微信/飞书/钉钉）
+    chunks = chunk_markdown(report, max_size=4096, unit='chars')   # 按字符计（Telegram/Pushover）
+
+性能基准（100 只股票日报）：
+    python -m src.markdown_chunker
+"""
+
+import time
+from typing import List, Sequence, Tuple, Union
+
+# 分隔符：(匹配串, 切分时跳过的长度)
+# 分隔线整体丢弃；标题类只丢弃前导换行，标题本身保留在下一段开头
+Separator = Tuple[str, int]
+
+DEFAULT_SEPARATORS: Tuple[Separator, ...] = (
+    ("\n---\n", 5),
+    ("\n### ", 1),
+    ("\n## ", 1),
+    ("\n**", 1),
+    ("\n\n", 2),
+    ("\n", 1),
+)
+
+# Pushover 纯文本报告使用的分隔符
+PLAIN_TEXT_SEPARATORS: Tuple[Separator, ...] = (
+    ("────────", 8),
+    ("\n\n", 2),
+    ("\n", 1),
+)
+
+# 分页标记（如 "📄 (12/34)"）预留的长度
+PAGE_MARKER_RESERVE = 32
+
+_Text = Union[str, bytes]
+
+
+def chunk_markdown(
+    content: str,
+    max_size: int,
+    unit: str = 'bytes',
+    separators: Sequence[Separator] = DEFAULT_SEPARATORS,
+) -> List[str]:
+    """
+    将长消息切分为不超过 max_size 的若干段
+
+    Args:
+        content: 消息内容
+        max_size: 单段上限
+        unit: 'bytes' 按 UTF-8 字节计，'chars' 按字符计
+        separators: 分隔符优先级列表
+
+    Returns:
+        分段列表（空白段已去除）
+    """
+    if not content:
+        return []
+    max_size = max(1, max_size)
+
+    if unit == 'bytes':
+        data: _Text = content.encode('utf-8')
+        seps = [(pattern.encode('utf-8'), skip) for pattern, skip in separators]
+    else:
+        data = content
+        seps = list(separators)
+
+    pieces = _split(data, max_size, seps, 0)
+    if unit == 'bytes':
+        pieces = [piece.decode('utf-8') for piece in pieces]
+    return [piece for piece in pieces if piece.strip()]
+
+
+def _split(data: _Text, limit: int, seps: list, level: int) -> List[_Text]:
+    """按第 level 级及以后的分隔符切分 data（超长段递归使用更细的分隔符）"""
+    if len(data) <= limit:
+        return [data]
+
+    for index in range(level, len(seps)):
+        pattern, skip = seps[index]
+        if pattern in data:
+            break
+    else:
+        return _hard_split(data, limit)
+
+    # 各段在 data 中的 (起点, 终点) 偏移
+    spans = []
+    pos = 0
+    while True:
+        found = data.find(pattern, pos)
+        if found < 0:
+            spans.append((pos, len(data)))
+            break
+        spans.append((pos, found))
+        pos = found + skip
+
+    chunks: List[_Text] = []
+    start = end = -1
+    for span_start, span_end in spans:
+        if span_end - span_start > limit:
+            if start >= 0:
+                chunks.append(data[start:end])
+                start = -1
+            chunks.extend(_split(data[span_start:span_end], limit, seps, index + 1))
+        elif start < 0:
+            start, end = span_start, span_end
+        elif span_end - start <= limit:
+            # 相邻段在原文中连续，合并后的长度就是偏移差，无需重新拼接或编码
+            end = span_end
+        else:
+            chunks.append(data[start:end])
+            start, end = span_start, span_end
+    if start >= 0:
+        chunks.append(data[start:end])
+    return chunks
+
+
+def _hard_split(data: _Text, limit: int) -> List[_Text]:
+    """按长度硬切（字节模式下退到 UTF-8 字符边界）"""
+    chunks = []
+    pos = 0
+    is_bytes = isinstance(data, bytes)
+    while pos < len(data):
+        end = min(pos + limit, len(data))
+        if is_bytes:
+            # 0b10xxxxxx 是多字节字符的后续字节，不能从这里切
+            while end < len(data) and end > pos + 1 and (data[end] & 0xC0) == 0x80:
+                end -= 1
+        chunks.append(data[pos:end])
+        pos = end
+    return chunks
+
+
+# ========== 性能基准 ==========
+
+def _sample_report(stock_count: int) -> str:
+    """生成与决策仪表盘结构相近的测试报告"""
+    sections = ["# 🎯 2026-01-05 决策仪表盘\n\n> 共分析 {} 只股票".format(stock_count)]
+    for i in range(stock_count):
+        code = f"{600000 + i}"
+        lines = [
+            f"## 🟢 股票{i}({code})",
+            "",
+            "### 📰 重要信息速览",
+            "**💭 舆情情绪**: 市场关注度较高，机构观点偏积极，短期资金面改善。",
+            "**📊 业绩预期**: 三季报净利润同比增长 18.5%，高于一致预期。",
+            "",
+            "### 📌 核心结论",
+            "**🟢 买入** | 看多",
+            "> **一句话决策**: 回踩 MA5 附近分批介入，跌破 MA20 止损。",
+            "",
+            "| 持仓情况 | 操作建议 |",
+            "|---------|---------|",
+            "| 🆕 **空仓者** | 等待回调至 12.35 附近再介入 |",
+            "| 💼 **持仓者** | 继续持有，止损 11.80 |",
+            "",
+            "### 📊 数据透视",
+            "- 现价 12.58 | MA5 12.41 | MA10 12.20 | MA20 11.95 | 乖离率 1.37%",
+            "- 量比 1.35 | 换手率 2.8% | 筹码获利比例 68%",
+        ] + [f"- 检查项 {k}: ✅ 满足条件，趋势与量能配合良好" for k in range(8)]
+        sections.append("\n".join(lines))
+    return "\n---\n".join(sections)
+
+
+def _legacy_line_chunk(content: str, max_bytes: int) -> List[str]:
+    """旧实现：逐行拼接并对不断变长的字符串重复编码（作为对照）"""
+    chunks = []
+    current = ""
+    for line in content.split('\n'):
+        candidate = current + ('\n' if current else '') + line
+        if len(candidate.encode('utf-8')) > max_bytes:
+            if current:
+                chunks.append(current)
+            current = line
+        else:
+            current = candidate
+    if current:
+        chunks.append(current)
+    return chunks
+
+
+def benchmark(stock_count: int = 100, rounds: int = 20) -> None:
+    """对 100 只股票的日报按各渠道上限分段并计时"""
+    report = _sample_report(stock_count)
+    size = len(report.encode('utf-8'))
+    print(f"报告: {stock_count} 只股票, {len(report)} 字符, {size} 字节, 每项 {rounds} 轮")
+
+    cases = [
+        ("企业微信 4000B", dict(max_size=4000)),
+        ("飞书/钉钉 20000B", dict(max_size=20000)),
+        ("Telegram 4096 字符", dict(max_size=4096, unit='chars')),
+        ("Pushover 1024 字符", dict(max_size=1024, unit='chars')),
+    ]
+    for name, kwargs in cases:
+        start = time.perf_counter()
+        for _ in range(rounds):
+            chunks = chunk_markdown(report, **kwargs)
+        elapsed = (time.perf_counter() - start) / rounds * 1000
+        print(f"  {name:<20} {len(chunks):>4} 段  {elapsed:8.2f} ms/次")
+
+    start = time.perf_counter()
+    for _ in range(rounds):
+        legacy = _legacy_line_chunk(report, 4000)
+    elapsed = (time.perf_counter() - start) / rounds * 1000
+    print(f"  {'旧实现(逐行重编码) 4000B':<20} {len(legacy):>4} 段  {elapsed:8.2f} ms/次")
+
+
+if __name__ == '__main__':
+    benchmark()
@@ -356,30 +356,12 @@ class MarketAnalyzer:
             return []
         
         all_news = []
-        today = datetime.now()
-        month_str = f"{today.year}年{today.month}月"
-        
-        # 多维度搜索
-        search_queries = [
-            f"A股 大盘 复盘 {month_str}",
-            f"股市 行情 分析 今日 {month_str}",
-            f"A股 市场 热点 板块 {month_str}",
-        ]
         
         try:
-            logger.info("[大盘] 开始搜索市场新闻...")
+            logger.info("[大盘] 开始获取市场新闻...")
             
-            for query in search_queries:
-                # 使用 search_stock_news 方法，传入"大盘"作为股票名
-                response = self.search_service.search_stock_news(
-                    stock_code="market",
-                    stock_name="大盘",
-                    max_results=3,
-                    focus_keywords=query.split()
-                )
-                if response and response.results:
-                    all_news.extend(response.results)
-                    logger.info(f"[大盘] 搜索 '{query}' 获取 {len(response.results)} 条结果")
+            # 大盘/板块新闻每次运行只拉取一次，结果同时写入本地新闻索引供个股情报复用
+            all_news = self.search_service.ingest_market_news()
             
             logger.info(f"[大盘] 共获取 {len(all_news)} 条市场新闻")
             
@@ -409,22 +391,9 @@ class MarketAnalyzer:
         try:
             logger.info("[大盘] 调用大模型生成复盘报告...")
             
-            generation_config = {
-                'temperature': 0.7,
-                'max_output_tokens': 2048,
-            }
-            
-            # 根据 analyzer 使用的 API 类型调用
-            if self.analyzer._use_openai:
-                # 使用 OpenAI 兼容 API
-                review = self.analyzer._call_openai_api(prompt, generation_config)
-            else:
-                # 使用 Gemini API
-                response = self.analyzer._model.generate_content(
-                    prompt,
-                    generation_config=generation_config,
-                )
-                review = response.text.strip() if response and response.text else None
+            # 走分析器的端点池（多 Key 负载均衡 + 全局限流 + 重试）
+            review = self.analyzer.generate_content(prompt, temperature=0.7, max_output_tokens=2048)
+            review = review.strip() if review else None
             
             if review:
                 logger.info(f"[大盘] 复盘报告生成成功，长度: {len(review)} 字符")
@@ -0,0 +1,201 @@
+# -*- coding: utf-8 -*-
+"""
+===================================
+A股自选股智能分析系统 - 本地新闻索引
+===================================
+
+职责：
+1. 存储每次运行批量拉取的大盘/板块新闻，以及各股票实时搜索到的新闻
+2. 按 URL / 标题哈希去重
+3. 基于 SQLite FTS5（trigram 分词，支持中文子串匹配）按股票代码/名称检索
+
+说明：
+- 个股情报优先从本地索引命中，命中条数不足时才实时调用搜索 API
+- SQLite 不支持 trigram 分词（< 3.34）时退化为 LIKE 查询
+- trigram 只能匹配 3 个字符以上的词，2 字股票简称等短词使用 LIKE 查询
+"""
+
+import hashlib
+import logging
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Iterable, List, Optional, Sequence
+
+logger = logging.getLogger(__name__)
+
+
+def _normalize_title(title: str) -> str:
+    """标题去重用的规范化：去掉空白与常见标点"""
+    return ''.join(ch for ch in title.lower() if ch.isalnum())
+
+
+def _hash(text: str) -> str:
+    return hashlib.sha1(text.encode('utf-8')).hexdigest()
+
+
+class NewsIndex:
+    """
+    本地新闻全文索引（线程安全）
+
+    表结构：
+    - news：新闻正文，url_hash / title_hash 唯一约束实现去重
+    - news_fts：FTS5 外部内容表（title, snippet），trigram 分词
+    """
+
+    def __init__(self, db_path: str):
+        """
+        Args:
+            db_path: SQLite 文件路径（":memory:" 表示内存库）
+        """
+        if db_path != ':memory:':
+            Path(db_path).parent.mkdir(parents=True, exist_ok=True)
+
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(db_path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._fts_enabled = False
+        self._init_schema()
+
+    def _init_schema(self) -> None:
+        with self._lock, self._conn:
+            self._conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS news (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    url_hash TEXT UNIQUE,
+                    title_hash TEXT UNIQUE,
+                    title TEXT NOT NULL,
+                    snippet TEXT,
+                    url TEXT,
+                    source TEXT,
+                    published_date TEXT,
+                    topic TEXT,
+                    ingested_at REAL NOT NULL
+                )
+                """
+            )
+            self._conn.execute("CREATE INDEX IF NOT EXISTS ix_news_ingested_at ON news (ingested_at)")
+
+            try:
+                self._conn.execute(
+                    "CREATE VIRTUAL TABLE IF NOT EXISTS news_fts USING fts5("
+                    "title, snippet, content='news', content_rowid='id', tokenize='trigram')"
+                )
+                self._fts_enabled = True
+            except sqlite3.OperationalError as e:
+                logger.warning(f"[新闻索引] 当前 SQLite 不支持 FTS5 trigram，使用 LIKE 查询: {e}")
+
+    @property
+    def fts_enabled(self) -> bool:
+        return self._fts_enabled
+
+    def add(self, results: Iterable, topic: str = '') -> int:
+        """
+        写入新闻（重复的 URL / 标题自动跳过）
+
+        Args:
+            results: SearchResult 列表
+            topic: 来源主题（如 market / 股票代码）
+
+        Returns:
+            新增条数
+        """
+        now = time.time()
+        added = 0
+        with self._lock, self._conn:
+            for r in results:
+                title = (r.title or '').strip()
+                if not title:
+                    continue
+                url_hash = _hash(r.url.strip()) if r.url else None
+                cursor = self._conn.execute(
+                    "INSERT OR IGNORE INTO news (url_hash, title_hash, title, snippet, url, source, "
+                    "published_date, topic, ingested_at) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                    (
+                        url_hash, _hash(_normalize_title(title)), title, r.snippet or '', r.url,
+                        r.source, r.published_date, topic, now,
+                    ),
+                )
+                if cursor.rowcount:
+                    added += 1
+                    if self._fts_enabled:
+                        self._conn.execute(
+                            "INSERT INTO news_fts (rowid, title, snippet) VALUES (?, ?, ?)",
+                            (cursor.lastrowid, title, r.snippet or ''),
+                        )
+        return added
+
+    def search(
+        self,
+        terms: Sequence[str],
+        max_age_hours: float = 48,
+        limit: int = 5,
+        must_contain_any: Optional[Sequence[str]] = None,
+    ) -> List[tuple]:
+        """
+        检索包含任一关键词的新闻（按入库时间倒序）
+
+        Args:
+            terms: 检索词（如股票代码、股票名称），命中任一即可
+            max_age_hours: 只返回最近 N 小时入库的新闻
+            limit: 最大返回条数
+            must_contain_any: 额外过滤词（标题或摘要需包含其中之一，如风险/业绩关键词）
+
+        Returns:
+            [(title, snippet, url, source, published_date), ...]
+        """
+        terms = [t.strip() for t in terms if t and t.strip()]
+        if not terms:
+            return []
+
+        since = time.time() - max_age_hours * 3600
+        long_terms = [t for t in terms if len(t) >= 3] if self._fts_enabled else []
+        short_terms = [t for t in terms if t not in long_terms]
+
+        clauses = []
+        params: list = []
+        if long_terms:
+            match = ' OR '.join('"{}"'.format(t.replace('"', '""')) for t in long_terms)
+            clauses.append("id IN (SELECT rowid FROM news_fts WHERE news_fts MATCH ?)")
+            params.append(match)
+        for term in short_terms:
+            clauses.append("(title LIKE ? OR snippet LIKE ?)")
+            params.extend([f"%{term}%", f"%{term}%"])
+
+        sql = (
+            "SELECT title, snippet, url, source, published_date FROM news "
+            f"WHERE ingested_at >= ? AND ({' OR '.join(clauses)})"
+        )
+        params.insert(0, since)
+
+        if must_contain_any:
+            sql += " AND (" + ' OR '.join("title LIKE ? OR snippet LIKE ?" for _ in must_contain_any) + ")"
+            for word in must_contain_any:
+                params.extend([f"%{word}%", f"%{word}%"])
+
+        sql += " ORDER BY ingested_at DESC, id DESC LIMIT ?"
+        params.append(limit)
+
+        with self._lock:
+            return self._conn.execute(sql, params).fetchall()
+
+    def purge(self, max_age_hours: float) -> int:
+        """删除超过 N 小时的新闻，返回删除条数"""
+        since = time.time() - max_age_hours * 3600
+        with self._lock, self._conn:
+            if self._fts_enabled:
+                rows = self._conn.execute(
+                    "SELECT id, title, snippet FROM news WHERE ingested_at < ?", (since,)
+                ).fetchall()
+                self._conn.executemany(
+                    "INSERT INTO news_fts (news_fts, rowid, title, snippet) VALUES ('delete', ?, ?, ?)",
+                    rows,
+                )
+            cursor = self._conn.execute("DELETE FROM news WHERE ingested_at < ?", (since,))
+            return cursor.rowcount or 0
+
+    def count(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM news").fetchone()[0]
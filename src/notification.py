@@ -15,19 +15,21 @@ A股自选股智能分析系统 - 通知层
    - Pushover（手机/桌面推送）
 """
 
+import functools
 import logging
 import json
 import smtplib
 import re
+import time
 import markdown2
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeoutError
 from datetime import datetime
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Optional, Callable, Tuple
 from email.mime.text import MIMEText
 from email.mime.multipart import MIMEMultipart
 from email.header import Header
 from enum import Enum
 
-import requests
 try:
     import discord
     discord_available = True
@@ -36,6 +38,8 @@ except ImportError:
 
 from src.config import get_config
 from src.analyzer import AnalysisResult
+from src.http_client import get_http_session
+from src.markdown_chunker import PAGE_MARKER_RESERVE, PLAIN_TEXT_SEPARATORS, chunk_markdown
 from bot.models import BotMessage
 
 logger = logging.getLogger(__name__)
@@ -79,6 +83,10 @@ SMTP_CONFIGS = {
 }
 
 
+# 并发推送结果中消息上下文渠道（如钉钉会话回复）的名称
+CONTEXT_CHANNEL_NAME = "消息上下文"
+
+
 class ChannelDetector:
     """
     渠道检测器 - 简化版
@@ -173,6 +181,9 @@ class NotificationService:
         self._feishu_max_bytes = getattr(config, 'feishu_max_bytes', 20000)
         self._wechat_max_bytes = getattr(config, 'wechat_max_bytes', 4000)
         
+        # 并发推送时单个渠道的超时时间（秒）
+        self._channel_timeout = getattr(config, 'notification_channel_timeout', 120.0)
+        
         # 检测所有已配置的渠道
         self._available_channels = self._detect_all_channels()
         if self._has_context_channel():
@@ -269,6 +280,10 @@ class NotificationService:
             or self._extract_feishu_reply_info() is not None
         )
 
+    def has_context_channel(self) -> bool:
+        """是否存在消息上下文渠道（由机器人消息触发的任务）"""
+        return self._has_context_channel()
+
     def _extract_dingtalk_session_webhook(self) -> Optional[str]:
         """从来源消息中提取钉钉会话 Webhook（用于 Stream 模式回复）"""
         if not isinstance(self._source_message, BotMessage):
@@ -1176,70 +1191,7 @@ class NotificationService:
         """
         import time
         
-        def get_bytes(s: str) -> int:
-            """获取字符串的 UTF-8 字节数"""
-            return len(s.encode('utf-8'))
-        
-        # 智能分割：优先按 "---" 分隔（股票之间的分隔线）
-        # 其次尝试各级标题分割
-        if "\n---\n" in content:
-            sections = content.split("\n---\n")
-            separator = "\n---\n"
-        elif "\n### " in content:
-            # 按 ### 分割
-            parts = content.split("\n### ")
-            sections = [parts[0]] + [f"### {p}" for p in parts[1:]]
-            separator = "\n"
-        elif "\n## " in content:
-            # 按 ## 分割 (兼容二级标题)
-            parts = content.split("\n## ")
-            sections = [parts[0]] + [f"## {p}" for p in parts[1:]]
-            separator = "\n"
-        elif "\n**" in content:
-            # 按 ** 加粗标题分割 (兼容 AI 未输出标准 Markdown 标题的情况)
-            parts = content.split("\n**")
-            sections = [parts[0]] + [f"**{p}" for p in parts[1:]]
-            separator = "\n"
-        else:
-            # 无法智能分割，按字符强制分割
-            return self._send_wechat_force_chunked(content, max_bytes)
-        
-        chunks = []
-        current_chunk = []
-        current_bytes = 0
-        separator_bytes = get_bytes(separator)
-        
-        for section in sections:
-            section_bytes = get_bytes(section) + separator_bytes
-            
-            # 如果单个 section 就超长，需要强制截断
-            if section_bytes > max_bytes:
-                # 先发送当前积累的内容
-                if current_chunk:
-                    chunks.append(separator.join(current_chunk))
-                    current_chunk = []
-                    current_bytes = 0
-                
-                # 强制截断这个超长 section（按字节截断）
-                truncated = self._truncate_to_bytes(section, max_bytes - 200)
-                truncated += "\n\n...(本段内容过长已截断)"
-                chunks.append(truncated)
-                continue
-            
-            # 检查加入后是否超长
-            if current_bytes + section_bytes > max_bytes:
-                # 保存当前块，开始新块
-                if current_chunk:
-                    chunks.append(separator.join(current_chunk))
-                current_chunk = [section]
-                current_bytes = section_bytes
-            else:
-                current_chunk.append(section)
-                current_bytes += section_bytes
-        
-        # 添加最后一块
-        if current_chunk:
-            chunks.append(separator.join(current_chunk))
+        chunks = chunk_markdown(content, max_bytes - PAGE_MARKER_RESERVE)
         
         # 分批发送
         total_chunks = len(chunks)
@@ -1270,53 +1222,6 @@ class NotificationService:
 
         return success_count == total_chunks
     
-    def _send_wechat_force_chunked(self, content: str, max_bytes: int) -> bool:
-        """
-        强制按字节分割发送（无法智能分割时的 fallback）
-        
-        Args:
-            content: 完整消息内容
-            max_bytes: 单条消息最大字节数
-        """
-        import time
-        
-        chunks = []
-        current_chunk = ""
-        
-        # 按行分割，确保不会在多字节字符中间截断
-        lines = content.split('\n')
-        
-        for line in lines:
-            test_chunk = current_chunk + ('\n' if current_chunk else '') + line
-            if len(test_chunk.encode('utf-8')) > max_bytes - 100:  # 预留空间给分页标记
-                if current_chunk:
-                    chunks.append(current_chunk)
-                current_chunk = line
-            else:
-                current_chunk = test_chunk
-        
-        if current_chunk:
-            chunks.append(current_chunk)
-        
-        total_chunks = len(chunks)
-        success_count = 0
-        
-        logger.info(f"企业微信强制分批发送：共 {total_chunks} 批")
-        
-        for i, chunk in enumerate(chunks):
-            page_marker = f"\n\n📄 *({i+1}/{total_chunks})*" if total_chunks > 1 else ""
-            
-            try:
-                if self._send_wechat_message(chunk + page_marker):
-                    success_count += 1
-            except Exception as e:
-                logger.error(f"企业微信第 {i+1}/{total_chunks} 批发送异常: {e}")
-            
-            if i < total_chunks - 1:
-                time.sleep(1)
-        
-        return success_count == total_chunks
-    
     def _truncate_to_bytes(self, text: str, max_bytes: int) -> str:
         """
         按字节数截断字符串，确保不会在多字节字符中间截断
@@ -1351,7 +1256,7 @@ class NotificationService:
             }
         }
         
-        response = requests.post(
+        response = get_http_session().post(
             self._wechat_url,
             json=payload,
             timeout=10
@@ -1428,60 +1333,7 @@ class NotificationService:
         """
         import time
         
-        def get_bytes(s: str) -> int:
-            """获取字符串的 UTF-8 字节数"""
-            return len(s.encode('utf-8'))
-        
-        # 智能分割：优先按 "---" 分隔（股票之间的分隔线）
-        # 如果没有分隔线，按 "### " 标题分割（每只股票的标题）
-        if "\n---\n" in content:
-            sections = content.split("\n---\n")
-            separator = "\n---\n"
-        elif "\n### " in content:
-            # 按 ### 分割，但保留 ### 前缀
-            parts = content.split("\n### ")
-            sections = [parts[0]] + [f"### {p}" for p in parts[1:]]
-            separator = "\n"
-        else:
-            # 无法智能分割，按行强制分割
-            return self._send_feishu_force_chunked(content, max_bytes)
-        
-        chunks = []
-        current_chunk = []
-        current_bytes = 0
-        separator_bytes = get_bytes(separator)
-        
-        for section in sections:
-            section_bytes = get_bytes(section) + separator_bytes
-            
-            # 如果单个 section 就超长，需要强制截断
-            if section_bytes > max_bytes:
-                # 先发送当前积累的内容
-                if current_chunk:
-                    chunks.append(separator.join(current_chunk))
-                    current_chunk = []
-                    current_bytes = 0
-                
-                # 强制截断这个超长 section（按字节截断）
-                truncated = self._truncate_to_bytes(section, max_bytes - 200)
-                truncated += "\n\n...(本段内容过长已截断)"
-                chunks.append(truncated)
-                continue
-            
-            # 检查加入后是否超长
-            if current_bytes + section_bytes > max_bytes:
-                # 保存当前块，开始新块
-                if current_chunk:
-                    chunks.append(separator.join(current_chunk))
-                current_chunk = [section]
-                current_bytes = section_bytes
-            else:
-                current_chunk.append(section)
-                current_bytes += section_bytes
-        
-        # 添加最后一块
-        if current_chunk:
-            chunks.append(separator.join(current_chunk))
+        chunks = chunk_markdown(content, max_bytes - PAGE_MARKER_RESERVE)
         
         # 分批发送
         total_chunks = len(chunks)
@@ -1512,60 +1364,13 @@ class NotificationService:
         
         return success_count == total_chunks
     
-    def _send_feishu_force_chunked(self, content: str, max_bytes: int) -> bool:
-        """
-        强制按字节分割发送（无法智能分割时的 fallback）
-        
-        Args:
-            content: 完整消息内容
-            max_bytes: 单条消息最大字节数
-        """
-        import time
-        
-        chunks = []
-        current_chunk = ""
-        
-        # 按行分割，确保不会在多字节字符中间截断
-        lines = content.split('\n')
-        
-        for line in lines:
-            test_chunk = current_chunk + ('\n' if current_chunk else '') + line
-            if len(test_chunk.encode('utf-8')) > max_bytes - 100:  # 预留空间给分页标记
-                if current_chunk:
-                    chunks.append(current_chunk)
-                current_chunk = line
-            else:
-                current_chunk = test_chunk
-        
-        if current_chunk:
-            chunks.append(current_chunk)
-        
-        total_chunks = len(chunks)
-        success_count = 0
-        
-        logger.info(f"飞书强制分批发送：共 {total_chunks} 批")
-        
-        for i, chunk in enumerate(chunks):
-            page_marker = f"\n\n📄 ({i+1}/{total_chunks})" if total_chunks > 1 else ""
-            
-            try:
-                if self._send_feishu_message(chunk + page_marker):
-                    success_count += 1
-            except Exception as e:
-                logger.error(f"飞书第 {i+1}/{total_chunks} 批发送异常: {e}")
-            
-            if i < total_chunks - 1:
-                time.sleep(1)
-        
-        return success_count == total_chunks
-    
     def _send_feishu_message(self, content: str) -> bool:
         """发送单条飞书消息（优先使用 Markdown 卡片）"""
         def _post_payload(payload: Dict[str, Any]) -> bool:
             logger.debug(f"飞书请求 URL: {self._feishu_url}")
             logger.debug(f"飞书请求 payload 长度: {len(content)} 字符")
 
-            response = requests.post(
+            response = get_http_session().post(
                 self._feishu_url,
                 json=payload,
                 timeout=30
@@ -1964,7 +1769,7 @@ class NotificationService:
             "disable_web_page_preview": True
         }
         
-        response = requests.post(api_url, json=payload, timeout=10)
+        response = get_http_session().post(api_url, json=payload, timeout=10)
         
         if response.status_code == 200:
             result = response.json()
@@ -1982,7 +1787,7 @@ class NotificationService:
                     payload['text'] = text  # 使用原始文本
                     del payload['parse_mode']
                     
-                    response = requests.post(api_url, json=payload, timeout=10)
+                    response = get_http_session().post(api_url, json=payload, timeout=10)
                     if response.status_code == 200 and response.json().get('ok'):
                         logger.info("Telegram 消息发送成功（纯文本）")
                         return True
@@ -1994,39 +1799,14 @@ class NotificationService:
             return False
     
     def _send_telegram_chunked(self, api_url: str, chat_id: str, content: str, max_length: int) -> bool:
-        """分段发送长 Telegram 消息"""
-        # 按段落分割
-        sections = content.split("\n---\n")
-        
-        current_chunk = []
-        current_length = 0
+        """分段发送长 Telegram 消息（Telegram 按字符数限制）"""
+        chunks = chunk_markdown(content, max_length, unit='chars')
         all_success = True
-        chunk_index = 1
-        
-        for section in sections:
-            section_length = len(section) + 5  # +5 for "\n---\n"
-            
-            if current_length + section_length > max_length:
-                # 发送当前块
-                if current_chunk:
-                    chunk_content = "\n---\n".join(current_chunk)
-                    logger.info(f"发送 Telegram 消息块 {chunk_index}...")
-                    if not self._send_telegram_message(api_url, chat_id, chunk_content):
-                        all_success = False
-                    chunk_index += 1
-                
-                # 重置
-                current_chunk = [section]
-                current_length = section_length
-            else:
-                current_chunk.append(section)
-                current_length += section_length
-        
-        # 发送最后一块
-        if current_chunk:
-            chunk_content = "\n---\n".join(current_chunk)
-            logger.info(f"发送 Telegram 消息块 {chunk_index}（最后）...")
-            if not self._send_telegram_message(api_url, chat_id, chunk_content):
+        
+        for i, chunk in enumerate(chunks, 1):
+            suffix = "（最后）" if i == len(chunks) else ""
+            logger.info(f"发送 Telegram 消息块 {i}{suffix}...")
+            if not self._send_telegram_message(api_url, chat_id, chunk):
                 all_success = False
         
         return all_success
@@ -2173,7 +1953,7 @@ class NotificationService:
                 "priority": priority,
             }
             
-            response = requests.post(api_url, data=payload, timeout=30)
+            response = get_http_session().post(api_url, data=payload, timeout=30)
             
             if response.status_code == 200:
                 result = response.json()
@@ -2209,40 +1989,8 @@ class NotificationService:
         """
         import time
         
-        # 按段落（分隔线或双换行）分割
-        if "────────" in content:
-            sections = content.split("────────")
-            separator = "────────"
-        else:
-            sections = content.split("\n\n")
-            separator = "\n\n"
-        
-        chunks = []
-        current_chunk = []
-        current_length = 0
-        
-        for section in sections:
-            # 计算添加这个 section 后的实际长度
-            # join() 只在元素之间放置分隔符，不是每个元素后面
-            # 所以：第一个元素不需要分隔符，后续元素需要一个分隔符连接
-            if current_chunk:
-                # 已有元素，添加新元素需要：当前长度 + 分隔符 + 新 section
-                new_length = current_length + len(separator) + len(section)
-            else:
-                # 第一个元素，不需要分隔符
-                new_length = len(section)
-            
-            if new_length > max_length:
-                if current_chunk:
-                    chunks.append(separator.join(current_chunk))
-                current_chunk = [section]
-                current_length = len(section)
-            else:
-                current_chunk.append(section)
-                current_length = new_length
-        
-        if current_chunk:
-            chunks.append(separator.join(current_chunk))
+        # 按分隔线或空行分割
+        chunks = chunk_markdown(content, max_length, unit='chars', separators=PLAIN_TEXT_SEPARATORS)
         
         total_chunks = len(chunks)
         success_count = 0
@@ -2335,84 +2083,19 @@ class NotificationService:
         if self._custom_webhook_bearer_token:
             headers['Authorization'] = f'Bearer {self._custom_webhook_bearer_token}'
         body = json.dumps(payload, ensure_ascii=False).encode('utf-8')
-        response = requests.post(url, data=body, headers=headers, timeout=timeout)
+        response = get_http_session().post(url, data=body, headers=headers, timeout=timeout)
         if response.status_code == 200:
             return True
         logger.error(f"自定义 Webhook 推送失败: HTTP {response.status_code}")
         logger.debug(f"响应内容: {response.text[:200]}")
         return False
 
-    def _chunk_markdown_by_bytes(self, content: str, max_bytes: int) -> List[str]:
-        def get_bytes(s: str) -> int:
-            return len(s.encode('utf-8'))
-
-        def split_by_bytes(text: str, limit: int) -> List[str]:
-            parts: List[str] = []
-            remaining = text
-            while remaining:
-                part = self._truncate_to_bytes(remaining, limit)
-                if not part:
-                    break
-                parts.append(part)
-                remaining = remaining[len(part):]
-            return parts
-
-        # 优先按分隔线/标题分割，保证分页自然
-        if "\n---\n" in content:
-            sections = content.split("\n---\n")
-            separator = "\n---\n"
-        elif "\n### " in content:
-            parts = content.split("\n### ")
-            sections = [parts[0]] + [f"### {p}" for p in parts[1:]]
-            separator = "\n"
-        else:
-            # fallback：按行拼接
-            sections = content.split("\n")
-            separator = "\n"
-
-        chunks: List[str] = []
-        current_chunk: List[str] = []
-        current_bytes = 0
-        sep_bytes = get_bytes(separator)
-
-        for section in sections:
-            section_bytes = get_bytes(section)
-            extra = sep_bytes if current_chunk else 0
-
-            # 单段超长：截断
-            if section_bytes + extra > max_bytes:
-                if current_chunk:
-                    chunks.append(separator.join(current_chunk))
-                    current_chunk = []
-                    current_bytes = 0
-
-                # 无法按结构拆分时，按字节强制拆分，避免整段被截断丢失
-                for part in split_by_bytes(section, max(200, max_bytes - 200)):
-                    chunks.append(part)
-                continue
-
-            if current_bytes + section_bytes + extra > max_bytes:
-                chunks.append(separator.join(current_chunk))
-                current_chunk = [section]
-                current_bytes = section_bytes
-            else:
-                if current_chunk:
-                    current_bytes += sep_bytes
-                current_chunk.append(section)
-                current_bytes += section_bytes
-
-        if current_chunk:
-            chunks.append(separator.join(current_chunk))
-
-        # 移除空块
-        return [c for c in (c.strip() for c in chunks) if c]
-
     def _send_dingtalk_chunked(self, url: str, content: str, max_bytes: int = 20000) -> bool:
         import time as _time
 
         # 为 payload 开销预留空间，避免 body 超限
         budget = max(1000, max_bytes - 1500)
-        chunks = self._chunk_markdown_by_bytes(content, budget)
+        chunks = chunk_markdown(content, budget)
         if not chunks:
             return False
 
@@ -2595,41 +2278,7 @@ class NotificationService:
         """
         import time
         
-        def get_bytes(s: str) -> int:
-            return len(s.encode('utf-8'))
-        
-        # 按段落或分隔线分割
-        if "\n---\n" in content:
-            sections = content.split("\n---\n")
-            separator = "\n---\n"
-        elif "\n### " in content:
-            parts = content.split("\n### ")
-            sections = [parts[0]] + [f"### {p}" for p in parts[1:]]
-            separator = "\n"
-        else:
-            # 按行分割
-            sections = content.split("\n")
-            separator = "\n"
-        
-        chunks = []
-        current_chunk = []
-        current_bytes = 0
-        separator_bytes = get_bytes(separator)
-        
-        for section in sections:
-            section_bytes = get_bytes(section) + separator_bytes
-            
-            if current_bytes + section_bytes > max_bytes:
-                if current_chunk:
-                    chunks.append(separator.join(current_chunk))
-                current_chunk = [section]
-                current_bytes = section_bytes
-            else:
-                current_chunk.append(section)
-                current_bytes += section_bytes
-        
-        if current_chunk:
-            chunks.append(separator.join(current_chunk))
+        chunks = chunk_markdown(content, max_bytes)
         
         # 发送每个分块
         success = True
@@ -2688,7 +2337,7 @@ class NotificationService:
                 "template": "markdown"  # 使用 Markdown 格式
             }
 
-            response = requests.post(api_url, json=payload, timeout=10)
+            response = get_http_session().post(api_url, json=payload, timeout=10)
 
             if response.status_code == 200:
                 result = response.json()
@@ -2747,7 +2396,7 @@ class NotificationService:
                 'avatar_url': 'https://picsum.photos/200'
             }
             
-            response = requests.post(
+            response = get_http_session().post(
                 self._discord_config['webhook_url'],
                 json=payload,
                 timeout=10
@@ -2784,7 +2433,7 @@ class NotificationService:
             }
             
             url = f'https://discord.com/api/v10/channels/{self._discord_config["channel_id"]}/messages'
-            response = requests.post(url, json=payload, headers=headers, timeout=10)
+            response = get_http_session().post(url, json=payload, headers=headers, timeout=10)
             
             if response.status_code == 200:
                 logger.info("Discord Bot 消息发送成功")
@@ -2796,11 +2445,90 @@ class NotificationService:
             logger.error(f"Discord Bot 发送异常: {e}")
             return False
     
+    def send_to_channel(self, channel: NotificationChannel, content: str) -> bool:
+        """
+        向指定渠道发送消息
+        
+        Args:
+            channel: 通知渠道
+            content: 消息内容（Markdown 格式）
+            
+        Returns:
+            是否发送成功
+        """
+        if channel == NotificationChannel.WECHAT:
+            return self.send_to_wechat(content)
+        elif channel == NotificationChannel.FEISHU:
+            return self.send_to_feishu(content)
+        elif channel == NotificationChannel.TELEGRAM:
+            return self.send_to_telegram(content)
+        elif channel == NotificationChannel.EMAIL:
+            return self.send_to_email(content)
+        elif channel == NotificationChannel.PUSHOVER:
+            return self.send_to_pushover(content)
+        elif channel == NotificationChannel.PUSHPLUS:
+            return self.send_to_pushplus(content)
+        elif channel == NotificationChannel.CUSTOM:
+            return self.send_to_custom(content)
+        elif channel == NotificationChannel.DISCORD:
+            return self.send_to_discord(content)
+        else:
+            logger.warning(f"不支持的通知渠道: {channel}")
+            return False
+    
+    def send_in_parallel(self, jobs: Dict[str, Callable[[], bool]]) -> Dict[str, bool]:
+        """
+        并发执行多个渠道的发送任务
+        
+        每个渠道在独立线程中发送（渠道内部的分段间隔保持不变），
+        总耗时取决于最慢的渠道；超过 NOTIFICATION_CHANNEL_TIMEOUT 的渠道记为失败。
+        
+        Args:
+            jobs: {渠道名称: 发送函数}
+            
+        Returns:
+            {渠道名称: 是否发送成功}
+        """
+        if not jobs:
+            return {}
+        
+        start_time = time.time()
+        deadline = start_time + self._channel_timeout
+        outcomes: Dict[str, bool] = {}
+        
+        def _timed(job: Callable[[], bool]) -> Tuple[bool, float]:
+            job_start = time.time()
+            return bool(job()), time.time() - job_start
+        
+        executor = ThreadPoolExecutor(max_workers=len(jobs), thread_name_prefix="notify")
+        try:
+            futures = {name: executor.submit(_timed, job) for name, job in jobs.items()}
+            for name, future in futures.items():
+                try:
+                    outcomes[name], elapsed = future.result(timeout=max(0.0, deadline - time.time()))
+                    logger.info(f"{name} 发送{'成功' if outcomes[name] else '失败'}，耗时 {elapsed:.1f}s")
+                except FutureTimeoutError:
+                    outcomes[name] = False
+                    logger.error(f"{name} 发送超时（>{self._channel_timeout:.0f}s），记为失败")
+                except Exception as e:
+                    outcomes[name] = False
+                    logger.error(f"{name} 发送失败: {e}")
+        finally:
+            # 超时的渠道仍在后台线程中执行，不阻塞调用方
+            executor.shutdown(wait=False)
+        
+        success_count = sum(1 for ok in outcomes.values() if ok)
+        logger.info(
+            f"通知发送完成：成功 {success_count} 个，失败 {len(outcomes) - success_count} 个，"
+            f"总耗时 {time.time() - start_time:.1f}s"
+        )
+        return outcomes
+    
     def send(self, content: str) -> bool:
         """
         统一发送接口 - 向所有已配置的渠道发送
         
-        遍历所有已配置的渠道，逐一发送消息
+        所有已配置的渠道（含消息上下文渠道）并发发送
         
         Args:
             content: 消息内容（Markdown 格式）
@@ -2808,9 +2536,8 @@ class NotificationService:
         Returns:
             是否至少有一个渠道发送成功
         """
-        context_success = self.send_to_context(content)
-
         if not self._available_channels:
+            context_success = self.send_to_context(content)
             if context_success:
                 logger.info("已通过消息上下文渠道完成推送（无其他通知渠道）")
                 return True
@@ -2820,86 +2547,15 @@ class NotificationService:
         channel_names = self.get_channel_names()
         logger.info(f"正在向 {len(self._available_channels)} 个渠道发送通知：{channel_names}")
         
-        success_count = 0
-        fail_count = 0
-        
-        for channel in self._available_channels:
-            channel_name = ChannelDetector.get_channel_name(channel)
-            try:
-                if channel == NotificationChannel.WECHAT:
-                    result = self.send_to_wechat(content)
-                elif channel == NotificationChannel.FEISHU:
-                    result = self.send_to_feishu(content)
-                elif channel == NotificationChannel.TELEGRAM:
-                    result = self.send_to_telegram(content)
-                elif channel == NotificationChannel.EMAIL:
-                    result = self.send_to_email(content)
-                elif channel == NotificationChannel.PUSHOVER:
-                    result = self.send_to_pushover(content)
-                elif channel == NotificationChannel.PUSHPLUS:
-                    result = self.send_to_pushplus(content)
-                elif channel == NotificationChannel.CUSTOM:
-                    result = self.send_to_custom(content)
-                elif channel == NotificationChannel.DISCORD:
-                    result = self.send_to_discord(content)
-                else:
-                    logger.warning(f"不支持的通知渠道: {channel}")
-                    result = False
-                
-                if result:
-                    success_count += 1
-                else:
-                    fail_count += 1
-                    
-            except Exception as e:
-                logger.error(f"{channel_name} 发送失败: {e}")
-                fail_count += 1
-        
-        logger.info(f"通知发送完成：成功 {success_count} 个，失败 {fail_count} 个")
-        return success_count > 0 or context_success
-    
-    def _send_chunked_messages(self, content: str, max_length: int) -> bool:
-        """
-        分段发送长消息
-        
-        按段落（---）分割，确保每段不超过最大长度
-        """
-        # 按分隔线分割
-        sections = content.split("\n---\n")
-        
-        current_chunk = []
-        current_length = 0
-        all_success = True
-        chunk_index = 1
-        
-        for section in sections:
-            section_with_divider = section + "\n---\n"
-            section_length = len(section_with_divider)
-            
-            if current_length + section_length > max_length:
-                # 发送当前块
-                if current_chunk:
-                    chunk_content = "\n---\n".join(current_chunk)
-                    logger.info(f"发送消息块 {chunk_index}...")
-                    if not self.send(chunk_content):
-                        all_success = False
-                    chunk_index += 1
-                
-                # 重置
-                current_chunk = [section]
-                current_length = section_length
-            else:
-                current_chunk.append(section)
-                current_length += section_length
-        
-        # 发送最后一块
-        if current_chunk:
-            chunk_content = "\n---\n".join(current_chunk)
-            logger.info(f"发送消息块 {chunk_index}（最后）...")
-            if not self.send(chunk_content):
-                all_success = False
+        jobs: Dict[str, Callable[[], bool]] = {
+            ChannelDetector.get_channel_name(channel): functools.partial(self.send_to_channel, channel, content)
+            for channel in self._available_channels
+        }
+        if self.has_context_channel():
+            jobs[CONTEXT_CHANNEL_NAME] = functools.partial(self.send_to_context, content)
         
-        return all_success
+        outcomes = self.send_in_parallel(jobs)
+        return any(outcomes.values())
     
     def save_report_to_file(
         self, 
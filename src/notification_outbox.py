@@ -0,0 +1,299 @@
+# -*- coding: utf-8 -*-
+"""
+===================================
+A股自选股智能分析系统 - 通知推送队列
+===================================
+
+职责：
+1. 分析流程只把通知写入数据库队列（Outbox），不再等待 Webhook 返回
+2. 后台投递线程按渠道并发发送，同一渠道内按最小间隔限速
+3. 发送失败按指数退避重试，超过最大次数后标记为 failed
+4. 幂等键去重（只针对待投递/投递中的消息），进程重启后继续投递未完成的消息
+5. 领取记录带租约，多个进程共用数据库时只回收租约过期（投递进程已退出）的记录
+6. 定期清理超过保留期的已投递/已放弃记录
+
+说明：
+- 消息上下文渠道（钉钉/飞书会话回复）依赖触发消息，无法持久化，仍然直接发送
+- 单次运行的命令行模式在退出前调用 flush() 等待队列投递完成
+"""
+
+import hashlib
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Optional
+
+from src.notification import ChannelDetector, NotificationChannel, NotificationService
+
+logger = logging.getLogger(__name__)
+
+
+def make_idempotency_key(channel: NotificationChannel, content: str) -> str:
+    """幂等键：渠道 + 内容的哈希"""
+    return hashlib.sha256(f"{channel.value}\n{content}".encode('utf-8')).hexdigest()
+
+
+class NotificationOutbox:
+    """
+    通知推送队列
+
+    使用方式：
+        outbox = get_notification_outbox()
+        outbox.enqueue(NotificationChannel.FEISHU, report)
+        ...
+        outbox.flush(timeout=120)  # 命令行模式退出前等待投递完成
+    """
+
+    # 空闲时轮询数据库的间隔（秒）
+    POLL_INTERVAL = 2.0
+    # 重试间隔上限（秒）
+    MAX_RETRY_DELAY = 3600
+    # 领取租约相对单渠道发送超时的倍数
+    CLAIM_LEASE_FACTOR = 3
+
+    def __init__(
+        self,
+        notifier: Optional[NotificationService] = None,
+        max_attempts: int = 5,
+        retry_base_delay: float = 30,
+        channel_min_interval: float = 1.0,
+        claim_lease: float = 360.0,
+        retention_days: int = 7,
+        db=None,
+    ):
+        """
+        Args:
+            notifier: 用于实际发送的通知服务（默认按配置创建）
+            max_attempts: 单条消息最大投递次数
+            retry_base_delay: 首次重试等待时间（秒），之后每次翻倍
+            channel_min_interval: 同一渠道两次投递之间的最小间隔（秒）
+            claim_lease: 领取租约（秒），投递前续租，超过租约仍处于 sending 的记录才会被重新入队
+            retention_days: 已投递/已放弃记录的保留天数
+            db: DatabaseManager（默认使用全局实例）
+        """
+        self._notifier = notifier
+        self.max_attempts = max(1, max_attempts)
+        self.retry_base_delay = retry_base_delay
+        self.channel_min_interval = channel_min_interval
+        self.claim_lease = max(1.0, claim_lease)
+        self.retention_days = max(1, retention_days)
+        self._db = db
+
+        self._lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._last_sent: Dict[str, float] = {}
+        self._last_housekeeping = 0.0
+
+    @classmethod
+    def from_config(cls, config=None) -> 'NotificationOutbox':
+        """根据配置创建推送队列"""
+        if config is None:
+            from src.config import get_config
+            config = get_config()
+        return cls(
+            max_attempts=config.notification_outbox_max_attempts,
+            retry_base_delay=config.notification_outbox_retry_base,
+            channel_min_interval=config.notification_outbox_min_interval,
+            claim_lease=config.notification_channel_timeout * cls.CLAIM_LEASE_FACTOR,
+            retention_days=config.notification_outbox_retention_days,
+        )
+
+    @property
+    def db(self):
+        if self._db is None:
+            from src.storage import get_db
+            self._db = get_db()
+        return self._db
+
+    @property
+    def notifier(self) -> NotificationService:
+        if self._notifier is None:
+            self._notifier = NotificationService()
+        return self._notifier
+
+    # ========== 入队 ==========
+
+    def enqueue(self, channel: NotificationChannel, content: str, idempotency_key: Optional[str] = None) -> bool:
+        """
+        通知入队（自动启动后台投递线程）
+
+        Args:
+            channel: 通知渠道
+            content: 消息内容
+            idempotency_key: 幂等键（默认按渠道 + 内容生成）
+
+        Returns:
+            是否已在队列中等待投递（相同消息仍在待投递时不重复入队，也返回 True）
+        """
+        key = idempotency_key or make_idempotency_key(channel, content)
+        try:
+            added = self.db.enqueue_notification(key, channel.value, content)
+        except Exception as e:
+            logger.error(f"[推送队列] {ChannelDetector.get_channel_name(channel)} 入队失败: {e}")
+            return False
+
+        if added:
+            logger.info(f"[推送队列] {ChannelDetector.get_channel_name(channel)} 消息已入队（{len(content)} 字符）")
+            self.start()
+            self._wakeup.set()
+        else:
+            logger.info(f"[推送队列] {ChannelDetector.get_channel_name(channel)} 相同消息已在队列中，跳过")
+        return True
+
+    def enqueue_many(self, contents: Dict[NotificationChannel, str]) -> int:
+        """批量入队 {渠道: 内容}，返回已在队列中等待投递的条数"""
+        return sum(1 for channel, content in contents.items() if self.enqueue(channel, content))
+
+    # ========== 后台投递 ==========
+
+    def start(self) -> None:
+        """启动后台投递线程（已启动时忽略）"""
+        with self._lock:
+            if self._thread is not None and self._thread.is_alive():
+                return
+            self._housekeeping()
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name="notification-outbox", daemon=True)
+            self._thread.start()
+
+    def stop(self, timeout: float = 5.0) -> None:
+        """停止后台投递线程（未投递的消息保留在队列中）"""
+        self._stop.set()
+        self._wakeup.set()
+        thread = self._thread
+        if thread is not None:
+            thread.join(timeout)
+
+    def flush(self, timeout: float = 120.0) -> bool:
+        """
+        等待队列中的消息投递完成（含重试）
+
+        Returns:
+            是否在超时前全部投递完成（失败到达最大次数的也算完成）
+        """
+        deadline = time.time() + timeout
+        while time.time() < deadline:
+            try:
+                pending = self.db.count_pending_notifications()
+            except Exception as e:
+                logger.warning(f"[推送队列] 查询队列状态失败: {e}")
+                return False
+            if not pending:
+                return True
+            self.start()
+            self._wakeup.set()
+            time.sleep(min(1.0, max(0.0, deadline - time.time())))
+        logger.warning(f"[推送队列] 等待 {timeout:.0f}s 后仍有消息未投递，将在下次启动时继续")
+        return False
+
+    def _housekeeping(self) -> None:
+        """回收租约过期的领取记录（领取它们的进程已退出），清理超过保留期的记录"""
+        self._last_housekeeping = time.time()
+        try:
+            requeued = self.db.requeue_stale_notifications(self.claim_lease)
+            if requeued:
+                logger.info(f"[推送队列] 恢复 {requeued} 条租约过期的未完成投递")
+        except Exception as e:
+            logger.warning(f"[推送队列] 恢复未完成投递失败: {e}")
+        try:
+            purged = self.db.purge_finished_notifications(self.retention_days)
+            if purged:
+                logger.debug(f"[推送队列] 清理过期记录 {purged} 条")
+        except Exception as e:
+            logger.warning(f"[推送队列] 清理过期记录失败: {e}")
+
+    def _run(self) -> None:
+        while not self._stop.is_set():
+            if time.time() - self._last_housekeeping >= self.claim_lease:
+                self._housekeeping()
+            try:
+                jobs = self.db.claim_due_notifications()
+            except Exception as e:
+                logger.error(f"[推送队列] 读取队列失败: {e}")
+                jobs = []
+
+            if not jobs:
+                self._wakeup.wait(self.POLL_INTERVAL)
+                self._wakeup.clear()
+                continue
+
+            self._deliver_batch(jobs)
+
+    def _deliver_batch(self, jobs: List[Dict[str, Any]]) -> None:
+        """不同渠道并发投递，同一渠道内顺序投递并限速"""
+        by_channel: Dict[str, List[Dict[str, Any]]] = {}
+        for job in jobs:
+            by_channel.setdefault(job['channel'], []).append(job)
+
+        with ThreadPoolExecutor(max_workers=len(by_channel), thread_name_prefix="outbox") as executor:
+            for channel_jobs in by_channel.values():
+                executor.submit(self._deliver_channel, channel_jobs)
+
+    def _deliver_channel(self, jobs: List[Dict[str, Any]]) -> None:
+        for job in jobs:
+            channel_value = job['channel']
+            wait = self._last_sent.get(channel_value, 0) + self.channel_min_interval - time.time()
+            if wait > 0:
+                time.sleep(wait)
+            try:
+                owned = self.db.renew_notification_claim(job['id'])
+            except Exception as e:
+                logger.warning(f"[推送队列] 续租失败，跳过本次投递: {e}")
+                continue
+            if not owned:
+                logger.info(f"[推送队列] 消息 {job['id']} 已被重新入队，跳过本次投递")
+                continue
+            self._deliver(job)
+            self._last_sent[channel_value] = time.time()
+
+    def _deliver(self, job: Dict[str, Any]) -> None:
+        try:
+            channel = NotificationChannel(job['channel'])
+        except ValueError:
+            channel = NotificationChannel.UNKNOWN
+        channel_name = ChannelDetector.get_channel_name(channel)
+        attempt = job['attempts'] + 1
+
+        error = ''
+        try:
+            if self.notifier.send_to_channel(channel, job['content']):
+                self.db.mark_notification_sent(job['id'])
+                logger.info(f"[推送队列] {channel_name} 投递成功（第 {attempt} 次）")
+                return
+            error = "渠道返回发送失败"
+        except Exception as e:
+            error = str(e)
+
+        if attempt >= self.max_attempts:
+            next_attempt_at = None
+            logger.error(f"[推送队列] {channel_name} 投递失败 {attempt} 次，放弃: {error}")
+        else:
+            delay = min(self.retry_base_delay * 2 ** (attempt - 1), self.MAX_RETRY_DELAY)
+            next_attempt_at = datetime.now() + timedelta(seconds=delay)
+            logger.warning(f"[推送队列] {channel_name} 投递失败（第 {attempt} 次），{delay:.0f}s 后重试: {error}")
+
+        try:
+            self.db.mark_notification_failed(job['id'], error, next_attempt_at)
+        except Exception as e:
+            logger.error(f"[推送队列] 更新投递状态失败: {e}")
+
+
+# === 便捷函数 ===
+_outbox: Optional[NotificationOutbox] = None
+_outbox_lock = threading.Lock()
+
+
+def get_notification_outbox() -> NotificationOutbox:
+    """获取推送队列单例"""
+    global _outbox
+
+    if _outbox is None:
+        with _outbox_lock:
+            if _outbox is None:
+                _outbox = NotificationOutbox.from_config()
+
+    return _outbox
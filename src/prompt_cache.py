@@ -0,0 +1,289 @@
+# -*- coding: utf-8 -*-
+"""
+===================================
+A股自选股智能分析系统 - 提示词缓存
+===================================
+
+职责：
+1. Gemini 显式上下文缓存（Context Caching）：SYSTEM_PROMPT 只上传一次，后续请求引用缓存
+2. 统计各服务商返回的缓存命中 token（Gemini 隐式/显式缓存、OpenAI/DeepSeek 前缀缓存）
+3. 按运行输出缓存命中率与节省的输入 token
+
+说明：
+- OpenAI、DeepSeek 以及 Gemini 2.5 系列对相同前缀的请求会自动缓存，
+  只要提示词保持"静态内容在前、股票数据在后"的稳定布局即可命中
+- 显式缓存有最小 token 要求（因模型而异），创建失败时自动回退为普通请求
+"""
+
+import logging
+import threading
+import time
+from dataclasses import dataclass, field
+from datetime import timedelta
+from typing import Any, Dict, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+def extract_usage(provider: str, response: Any) -> Tuple[int, int]:
+    """
+    从 SDK 响应中提取 (输入 token 数, 缓存命中 token 数)
+
+    - Gemini：usage_metadata.prompt_token_count / cached_content_token_count
+    - OpenAI：usage.prompt_tokens / usage.prompt_tokens_details.cached_tokens
+    - DeepSeek：usage.prompt_cache_hit_tokens
+
+    字段缺失时返回 0，不影响正常流程
+    """
+    try:
+        if provider == 'gemini':
+            usage = getattr(response, 'usage_metadata', None)
+            if usage is None:
+                return 0, 0
+            return (
+                int(getattr(usage, 'prompt_token_count', 0) or 0),
+                int(getattr(usage, 'cached_content_token_count', 0) or 0),
+            )
+
+        usage = getattr(response, 'usage', None)
+        if usage is None:
+            return 0, 0
+        prompt_tokens = int(getattr(usage, 'prompt_tokens', 0) or 0)
+        details = getattr(usage, 'prompt_tokens_details', None)
+        cached = int(getattr(details, 'cached_tokens', 0) or 0) if details is not None else 0
+        if not cached:
+            cached = int(getattr(usage, 'prompt_cache_hit_tokens', 0) or 0)
+        return prompt_tokens, cached
+    except (TypeError, ValueError):
+        return 0, 0
+
+
+@dataclass
+class PromptCacheSnapshot:
+    """缓存统计快照（用于计算单次运行的增量）"""
+    requests: int = 0
+    hit_requests: int = 0
+    prompt_tokens: int = 0
+    cached_tokens: int = 0
+    caches_created: int = 0
+    by_provider: Dict[str, Tuple[int, int]] = field(default_factory=dict)  # provider -> (输入 token, 命中 token)
+
+    def __sub__(self, other: 'PromptCacheSnapshot') -> 'PromptCacheSnapshot':
+        by_provider = {}
+        for provider, (prompt, cached) in self.by_provider.items():
+            prev_prompt, prev_cached = other.by_provider.get(provider, (0, 0))
+            if prompt - prev_prompt > 0:
+                by_provider[provider] = (prompt - prev_prompt, cached - prev_cached)
+        return PromptCacheSnapshot(
+            requests=self.requests - other.requests,
+            hit_requests=self.hit_requests - other.hit_requests,
+            prompt_tokens=self.prompt_tokens - other.prompt_tokens,
+            cached_tokens=self.cached_tokens - other.cached_tokens,
+            caches_created=self.caches_created - other.caches_created,
+            by_provider=by_provider,
+        )
+
+    @property
+    def hit_rate(self) -> float:
+        """命中缓存的请求占比"""
+        return self.hit_requests / self.requests if self.requests else 0.0
+
+    @property
+    def token_saving_rate(self) -> float:
+        """输入 token 中由缓存提供的占比"""
+        return self.cached_tokens / self.prompt_tokens if self.prompt_tokens else 0.0
+
+    def summary(self) -> str:
+        """单行摘要（用于日志）"""
+        if not self.requests:
+            return "无 LLM 请求"
+        text = (
+            f"请求 {self.requests} 次，命中 {self.hit_requests} 次 ({self.hit_rate:.0%})，"
+            f"输入 {self.prompt_tokens} token，缓存 {self.cached_tokens} token ({self.token_saving_rate:.0%})"
+        )
+        if self.caches_created:
+            text += f"，新建显式缓存 {self.caches_created} 个"
+        return text
+
+
+class PromptCacheStats:
+    """进程级缓存命中统计（线程安全）"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._data = PromptCacheSnapshot()
+
+    def record(self, provider: str, prompt_tokens: int, cached_tokens: int) -> None:
+        """记录一次 LLM 请求的 token 用量"""
+        if prompt_tokens <= 0 and cached_tokens <= 0:
+            return
+        with self._lock:
+            data = self._data
+            data.requests += 1
+            data.prompt_tokens += prompt_tokens
+            data.cached_tokens += cached_tokens
+            if cached_tokens > 0:
+                data.hit_requests += 1
+            prompt, cached = data.by_provider.get(provider, (0, 0))
+            data.by_provider[provider] = (prompt + prompt_tokens, cached + cached_tokens)
+
+    def record_cache_created(self) -> None:
+        with self._lock:
+            self._data.caches_created += 1
+
+    def snapshot(self) -> PromptCacheSnapshot:
+        """获取当前累计值的副本"""
+        with self._lock:
+            data = self._data
+            return PromptCacheSnapshot(
+                requests=data.requests,
+                hit_requests=data.hit_requests,
+                prompt_tokens=data.prompt_tokens,
+                cached_tokens=data.cached_tokens,
+                caches_created=data.caches_created,
+                by_provider=dict(data.by_provider),
+            )
+
+
+class GeminiContextCache:
+    """
+    Gemini 显式上下文缓存管理
+
+    每个模型维护一份包含 SYSTEM_PROMPT 的 CachedContent，过期前自动续建；
+    模型明确不支持（如 token 数低于模型最小缓存要求）时不再重试，直接使用普通请求；
+    限流、服务端错误、网络异常等临时失败按指数退避后重试。
+
+    注意：CachedContent 使用 SDK 全局配置的 Key 创建，仅在单 Gemini Key 时启用；
+    多 Key 场景依赖服务端的隐式前缀缓存。
+    """
+
+    # 提前续建的余量（秒），避免请求发出时缓存刚好过期
+    REFRESH_MARGIN = 60
+    # 临时失败后的重试间隔（秒），连续失败时翻倍
+    RETRY_BASE_DELAY = 30
+    RETRY_MAX_DELAY = 900
+    # 表示模型不支持显式缓存的错误（HTTP 400/404 或错误信息中的关键词）
+    UNSUPPORTED_STATUS = (400, 404)
+    UNSUPPORTED_KEYWORDS = ('not supported', 'unsupported', 'minimum', 'min_total_token_count', 'too small')
+
+    def __init__(self, system_prompt: str, ttl_seconds: int = 3600, stats: Optional[PromptCacheStats] = None):
+        self.system_prompt = system_prompt
+        self.ttl_seconds = max(ttl_seconds, self.REFRESH_MARGIN * 2)
+        self._stats = stats
+        self._lock = threading.Lock()
+        self._caches: Dict[str, Tuple[Any, float]] = {}  # model -> (CachedContent, 过期时间)
+        self._unsupported: Dict[str, str] = {}  # model -> 失败原因
+        self._retry_after: Dict[str, Tuple[float, int]] = {}  # model -> (可重试时间, 连续失败次数)
+        self._create_locks: Dict[str, threading.Lock] = {}  # model -> 创建锁
+
+    def get(self, model: str) -> Optional[Any]:
+        """
+        获取模型对应的有效 CachedContent（必要时创建）
+
+        创建请求在模型级的锁外发出，不阻塞其他模型；同一模型正在创建时，
+        其他线程沿用尚未过期的旧缓存，没有则直接使用普通请求，不排队等待。
+
+        Returns:
+            CachedContent，不支持、退避中或创建失败时返回 None
+        """
+        now = time.time()
+        with self._lock:
+            if model in self._unsupported:
+                return None
+
+            cached = self._caches.get(model)
+            if cached and now < cached[1] - self.REFRESH_MARGIN:
+                return cached[0]
+            fallback = cached[0] if cached and now < cached[1] else None
+
+            retry = self._retry_after.get(model)
+            if retry and now < retry[0]:
+                return fallback
+
+            create_lock = self._create_locks.setdefault(model, threading.Lock())
+
+        if not create_lock.acquire(blocking=False):
+            return fallback
+        try:
+            return self._create(model) or fallback
+        finally:
+            create_lock.release()
+
+    def _create(self, model: str) -> Optional[Any]:
+        """创建 CachedContent 并记录结果（调用方持有该模型的创建锁）"""
+        try:
+            from google.generativeai import caching
+
+            content = caching.CachedContent.create(
+                model=model if model.startswith('models/') else f"models/{model}",
+                display_name="daily-stock-analysis-system-prompt",
+                system_instruction=self.system_prompt,
+                ttl=timedelta(seconds=self.ttl_seconds),
+            )
+        except Exception as e:
+            with self._lock:
+                if self._is_unsupported_error(e):
+                    self._unsupported[model] = str(e)
+                    logger.info(f"[提示词缓存] {model} 不支持显式上下文缓存，使用普通请求: {str(e)[:100]}")
+                else:
+                    failures = self._retry_after.get(model, (0.0, 0))[1] + 1
+                    delay = min(self.RETRY_BASE_DELAY * 2 ** (failures - 1), self.RETRY_MAX_DELAY)
+                    self._retry_after[model] = (time.time() + delay, failures)
+                    logger.warning(f"[提示词缓存] {model} 创建上下文缓存失败，{delay}s 后重试: {str(e)[:100]}")
+            return None
+
+        with self._lock:
+            self._caches[model] = (content, time.time() + self.ttl_seconds)
+            self._retry_after.pop(model, None)
+        if self._stats:
+            self._stats.record_cache_created()
+        logger.info(f"[提示词缓存] 已为 {model} 创建上下文缓存 (TTL: {self.ttl_seconds}s)")
+        return content
+
+    @classmethod
+    def _is_unsupported_error(cls, error: Exception) -> bool:
+        """是否为模型不支持显式缓存的确定性错误（其余视为临时失败）"""
+        if isinstance(error, ImportError):
+            return True
+        status = getattr(error, 'code', None)
+        if isinstance(status, int):
+            return status in cls.UNSUPPORTED_STATUS
+        message = str(error).lower()
+        return any(keyword in message for keyword in cls.UNSUPPORTED_KEYWORDS)
+
+    def invalidate(self, model: str) -> None:
+        """丢弃模型的缓存记录（服务端缓存提前失效时调用）"""
+        with self._lock:
+            self._caches.pop(model, None)
+
+    def is_fresh(self, model: str, content: Any) -> bool:
+        """
+        模型当前绑定的缓存是否仍有效（过期或已续建则返回 False）
+
+        content 为 None（未使用缓存）时，模型不支持或仍在退避期内视为有效，可以重试创建时返回 False
+        """
+        with self._lock:
+            if content is None:
+                if model in self._unsupported:
+                    return True
+                retry = self._retry_after.get(model)
+                return bool(retry) and time.time() < retry[0]
+            cached = self._caches.get(model)
+            return bool(cached) and cached[0] is content and time.time() < cached[1] - self.REFRESH_MARGIN
+
+
+# === 便捷函数 ===
+_stats: Optional[PromptCacheStats] = None
+_stats_lock = threading.Lock()
+
+
+def get_prompt_cache_stats() -> PromptCacheStats:
+    """获取缓存统计单例（进程内共享）"""
+    global _stats
+
+    if _stats is None:
+        with _stats_lock:
+            if _stats is None:
+                _stats = PromptCacheStats()
+
+    return _stats
@@ -0,0 +1,395 @@
+# -*- coding: utf-8 -*-
+"""
+===================================
+A股自选股智能分析系统 - 搜索 API Key 池
+===================================
+
+职责：
+1. 跟踪每个搜索 API Key 的健康状况：延迟 EWMA、剩余配额、连续错误、冷却窗口
+2. 按"延迟低、配额多、错误少"加权随机选择 Key，跳过冷却中的 Key
+3. 将 Key 状态持久化到数据库，重启后不会再把请求浪费在已耗尽的 Key 上
+
+说明：
+- 只持久化 Key 的哈希标识，不保存明文 Key
+- 剩余配额优先从响应头（X-RateLimit-Remaining 等）解析，拿不到时根据错误信息推断
+- 所有 Key 都在冷却中时 acquire() 返回 None，由上层直接切换到下一个搜索引擎
+"""
+
+import hashlib
+import logging
+import random
+import threading
+import time
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Any, Dict, List, Mapping, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+# 错误类型
+ERROR_RATE_LIMITED = 'rate_limited'  # 请求频率限制（短期冷却）
+ERROR_EXHAUSTED = 'exhausted'  # 配额/余额耗尽（长期冷却）
+ERROR_INVALID = 'invalid'  # Key 无效（长期冷却）
+ERROR_OTHER = 'error'  # 网络错误等（连续多次后冷却）
+
+_ERROR_KEYWORDS: List[Tuple[str, Tuple[str, ...]]] = [
+    (ERROR_RATE_LIMITED, ('429', 'rate limit', 'too many requests', '频率')),
+    (ERROR_EXHAUSTED, ('余额不足', '配额', 'quota', 'run out', 'usage limit', 'credits', '432')),
+    (ERROR_INVALID, ('401', '无效', 'invalid api key', 'unauthorized')),
+]
+
+
+def classify_error(message: Optional[str]) -> str:
+    """根据错误信息判断错误类型"""
+    text = (message or '').lower()
+    for error_type, keywords in _ERROR_KEYWORDS:
+        if any(keyword in text for keyword in keywords):
+            return error_type
+    return ERROR_OTHER
+
+
+def parse_quota_headers(headers: Optional[Mapping[str, str]]) -> Dict[str, Optional[float]]:
+    """
+    从 HTTP 响应头解析配额信息
+
+    支持 X-RateLimit-Remaining / X-RateLimit-Reset / Retry-After 及其常见变体
+
+    Returns:
+        {'remaining': 剩余次数, 'reset_at': 配额重置时间戳, 'retry_after': 建议等待秒数}，
+        缺失的字段为 None
+    """
+    info: Dict[str, Optional[float]] = {'remaining': None, 'reset_at': None, 'retry_after': None}
+    if not headers:
+        return info
+
+    lowered = {str(k).lower(): v for k, v in headers.items()}
+
+    def _number(*names: str) -> Optional[float]:
+        for name in names:
+            value = lowered.get(name)
+            if value is None:
+                continue
+            try:
+                return float(str(value).strip())
+            except ValueError:
+                continue
+        return None
+
+    info['remaining'] = _number('x-ratelimit-remaining', 'ratelimit-remaining', 'x-quota-remaining')
+    info['retry_after'] = _number('retry-after')
+
+    reset = _number('x-ratelimit-reset', 'ratelimit-reset')
+    if reset is not None:
+        # 大于 10 年秒数的视为绝对时间戳，否则视为相对秒数
+        info['reset_at'] = reset if reset > 315360000 else time.time() + reset
+    return info
+
+
+def key_id(api_key: str) -> str:
+    """Key 的哈希标识（用于日志与持久化，不暴露明文）"""
+    return hashlib.sha256(api_key.encode('utf-8')).hexdigest()[:16]
+
+
+@dataclass
+class KeyState:
+    """单个 API Key 的运行状态"""
+    key_id: str
+    requests: int = 0
+    errors: int = 0
+    consecutive_errors: int = 0
+    latency_ewma: Optional[float] = None  # 请求延迟的指数加权平均（秒）
+    quota_remaining: Optional[int] = None  # 剩余配额（未知为 None）
+    quota_reset_at: Optional[float] = None  # 配额重置时间戳
+    cooldown_until: float = 0.0  # 冷却结束时间戳
+
+    def in_cooldown(self, now: float) -> bool:
+        return self.cooldown_until > now
+
+
+class SearchKeyPool:
+    """
+    搜索引擎 API Key 池（线程安全）
+
+    选择权重 = 延迟因子 × 配额因子 × 错误因子：
+    - 延迟因子：1 / 延迟 EWMA（未测量过的 Key 使用池内平均延迟，保证会被试用）
+    - 配额因子：剩余配额低于 LOW_QUOTA 时线性降低
+    - 错误因子：1 / (1 + 连续错误数)
+    """
+
+    EWMA_ALPHA = 0.3
+    LOW_QUOTA = 50
+    # 连续普通错误达到该次数后进入冷却
+    ERROR_COOLDOWN_THRESHOLD = 3
+    # 两次持久化之间的最小间隔（秒），冷却状态变化时立即持久化
+    PERSIST_INTERVAL = 30
+
+    def __init__(
+        self,
+        provider: str,
+        api_keys: List[str],
+        cooldown_seconds: float = 60,
+        exhausted_cooldown_seconds: float = 21600,
+        persist: bool = False,
+    ):
+        """
+        Args:
+            provider: 搜索引擎名称
+            api_keys: API Key 列表
+            cooldown_seconds: 触发频率限制后的基础冷却时间（秒），连续触发时指数递增
+            exhausted_cooldown_seconds: 配额耗尽或 Key 无效后的冷却时间（秒）
+            persist: 是否将状态持久化到数据库
+        """
+        self.provider = provider
+        self.cooldown_seconds = cooldown_seconds
+        self.exhausted_cooldown_seconds = exhausted_cooldown_seconds
+        self._keys = list(api_keys)
+        self._states: Dict[str, KeyState] = {key: KeyState(key_id=key_id(key)) for key in self._keys}
+        self._lock = threading.Lock()
+        self._persist = persist
+        self._loaded = not persist
+        self._db = None
+        self._last_persist = 0.0
+
+    @classmethod
+    def from_config(cls, provider: str, api_keys: List[str], config=None) -> 'SearchKeyPool':
+        """根据配置创建 Key 池"""
+        if config is None:
+            from src.config import get_config
+            config = get_config()
+        return cls(
+            provider,
+            api_keys,
+            cooldown_seconds=config.search_key_cooldown,
+            exhausted_cooldown_seconds=config.search_key_exhausted_cooldown,
+            persist=config.search_key_state_persist,
+        )
+
+    def __len__(self) -> int:
+        return len(self._keys)
+
+    # ========== Key 选择 ==========
+
+    def acquire(self) -> Optional[str]:
+        """
+        选择一个可用的 Key
+
+        Returns:
+            API Key，所有 Key 都在冷却中时返回 None
+        """
+        if not self._keys:
+            return None
+        self._ensure_loaded()
+
+        with self._lock:
+            now = time.time()
+            candidates = [key for key in self._keys if not self._states[key].in_cooldown(now)]
+            if not candidates:
+                return None
+            if len(candidates) == 1:
+                return candidates[0]
+
+            known = [self._states[k].latency_ewma for k in candidates if self._states[k].latency_ewma]
+            default_latency = sum(known) / len(known) if known else 1.0
+            weights = [self._weight(self._states[key], default_latency) for key in candidates]
+            return random.choices(candidates, weights=weights, k=1)[0]
+
+    def _weight(self, state: KeyState, default_latency: float) -> float:
+        latency = max(state.latency_ewma or default_latency, 0.05)
+        weight = 1.0 / latency
+        if state.quota_remaining is not None:
+            weight *= min(1.0, 0.05 + state.quota_remaining / self.LOW_QUOTA)
+        return weight / (1 + state.consecutive_errors)
+
+    def next_available_in(self) -> float:
+        """距离最早一个 Key 结束冷却的秒数（有可用 Key 时为 0）"""
+        now = time.time()
+        with self._lock:
+            if not self._keys:
+                return 0.0
+            return max(0.0, min(self._states[key].cooldown_until for key in self._keys) - now)
+
+    # ========== 结果反馈 ==========
+
+    def report_success(
+        self,
+        api_key: str,
+        latency: float,
+        quota_remaining: Optional[float] = None,
+        quota_reset_at: Optional[float] = None,
+    ) -> None:
+        """记录一次成功请求"""
+        with self._lock:
+            state = self._states.get(api_key)
+            if state is None:
+                return
+            state.requests += 1
+            state.consecutive_errors = 0
+            self._update_latency(state, latency)
+            if quota_remaining is not None:
+                state.quota_remaining = int(quota_remaining)
+            elif state.quota_remaining:
+                state.quota_remaining -= 1
+            elif state.quota_remaining == 0:
+                # 之前判定耗尽但请求成功，说明配额已恢复
+                state.quota_remaining = None
+            if quota_reset_at is not None:
+                state.quota_reset_at = quota_reset_at
+        self._maybe_persist()
+
+    def report_failure(
+        self,
+        api_key: str,
+        latency: float,
+        error_message: Optional[str] = None,
+        retry_after: Optional[float] = None,
+        quota_remaining: Optional[float] = None,
+        quota_reset_at: Optional[float] = None,
+    ) -> str:
+        """
+        记录一次失败请求，并按错误类型设置冷却
+
+        Returns:
+            错误类型
+        """
+        error_type = classify_error(error_message)
+        if error_type == ERROR_OTHER and quota_remaining is not None and quota_remaining <= 0:
+            error_type = ERROR_EXHAUSTED
+
+        cooldown = 0.0
+        with self._lock:
+            state = self._states.get(api_key)
+            if state is None:
+                return error_type
+            now = time.time()
+            state.requests += 1
+            state.errors += 1
+            state.consecutive_errors += 1
+            if quota_reset_at is not None:
+                state.quota_reset_at = quota_reset_at
+
+            if error_type == ERROR_RATE_LIMITED:
+                cooldown = retry_after or self.cooldown_seconds * 2 ** (state.consecutive_errors - 1)
+            elif error_type == ERROR_EXHAUSTED:
+                state.quota_remaining = 0
+                if state.quota_reset_at and state.quota_reset_at > now:
+                    cooldown = state.quota_reset_at - now
+                else:
+                    cooldown = self.exhausted_cooldown_seconds
+            elif error_type == ERROR_INVALID:
+                cooldown = self.exhausted_cooldown_seconds
+            else:
+                self._update_latency(state, latency)
+                if state.consecutive_errors >= self.ERROR_COOLDOWN_THRESHOLD:
+                    exponent = state.consecutive_errors - self.ERROR_COOLDOWN_THRESHOLD
+                    cooldown = self.cooldown_seconds * 2 ** exponent
+
+            if cooldown:
+                cooldown = min(cooldown, self.exhausted_cooldown_seconds)
+                state.cooldown_until = max(state.cooldown_until, now + cooldown)
+
+        if cooldown:
+            logger.warning(
+                f"[{self.provider}] API Key {api_key[:8]}... {error_type}，冷却 {cooldown:.0f}s"
+            )
+        self._maybe_persist(force=bool(cooldown))
+        return error_type
+
+    def _update_latency(self, state: KeyState, latency: float) -> None:
+        if latency <= 0:
+            return
+        if state.latency_ewma is None:
+            state.latency_ewma = latency
+        else:
+            state.latency_ewma = self.EWMA_ALPHA * latency + (1 - self.EWMA_ALPHA) * state.latency_ewma
+
+    def snapshot(self) -> List[KeyState]:
+        """获取所有 Key 状态的副本（用于日志/展示）"""
+        with self._lock:
+            return [KeyState(**vars(self._states[key])) for key in self._keys]
+
+    # ========== 持久化 ==========
+
+    def _get_db(self):
+        if self._db is None and self._persist:
+            try:
+                from src.storage import get_db
+                self._db = get_db()
+            except Exception as e:
+                logger.warning(f"[Key池] 数据库不可用，Key 状态不再持久化: {e}")
+                self._persist = False
+        return self._db
+
+    def _ensure_loaded(self) -> None:
+        """首次使用时从数据库恢复 Key 状态"""
+        if self._loaded:
+            return
+        with self._lock:
+            if self._loaded:
+                return
+            self._loaded = True
+
+        db = self._get_db()
+        if db is None:
+            return
+        try:
+            rows = db.get_search_key_states(self.provider)
+        except Exception as e:
+            logger.warning(f"[Key池] 读取 {self.provider} Key 状态失败: {e}")
+            return
+
+        by_id = {row['key_id']: row for row in rows}
+        restored = 0
+        with self._lock:
+            for state in self._states.values():
+                row = by_id.get(state.key_id)
+                if not row:
+                    continue
+                state.requests = row.get('requests') or 0
+                state.errors = row.get('errors') or 0
+                state.latency_ewma = row.get('latency_ewma')
+                state.quota_remaining = row.get('quota_remaining')
+                state.quota_reset_at = _to_timestamp(row.get('quota_reset_at'))
+                state.cooldown_until = _to_timestamp(row.get('cooldown_until')) or 0.0
+                restored += 1
+        if restored:
+            logger.info(f"[Key池] 已恢复 {self.provider} 的 {restored} 个 Key 状态")
+
+    def _maybe_persist(self, force: bool = False) -> None:
+        if not self._persist:
+            return
+        now = time.time()
+        if not force and now - self._last_persist < self.PERSIST_INTERVAL:
+            return
+        self._last_persist = now
+        self.flush()
+
+    def flush(self) -> None:
+        """立即将 Key 状态写入数据库"""
+        db = self._get_db()
+        if db is None:
+            return
+        rows: List[Dict[str, Any]] = [
+            {
+                'key_id': state.key_id,
+                'requests': state.requests,
+                'errors': state.errors,
+                'latency_ewma': state.latency_ewma,
+                'quota_remaining': state.quota_remaining,
+                'quota_reset_at': _to_datetime(state.quota_reset_at),
+                'cooldown_until': _to_datetime(state.cooldown_until),
+            }
+            for state in self.snapshot()
+        ]
+        try:
+            db.save_search_key_states(self.provider, rows)
+        except Exception as e:
+            logger.warning(f"[Key池] 保存 {self.provider} Key 状态失败: {e}")
+
+
+def _to_datetime(timestamp: Optional[float]) -> Optional[datetime]:
+    return datetime.fromtimestamp(timestamp) if timestamp else None
+
+
+def _to_timestamp(value: Optional[datetime]) -> Optional[float]:
+    return value.timestamp() if value else None
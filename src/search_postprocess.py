@@ -0,0 +1,204 @@
+# -*- coding: utf-8 -*-
+"""
+===================================
+A股自选股智能分析系统 - 搜索结果后处理
+===================================
+
+职责：
+1. 近似重复去重：字符 3-gram Jaccard 相似度，跨维度去重（转载、标题微调的同一篇新闻只保留一次）
+2. 相关性过滤：标题和摘要都不提及股票代码/名称的结果直接丢弃
+3. 按 published_date 由新到旧排序（无日期的排在最后，保持原顺序）
+4. 按维度的 token 预算压缩摘要，减少每次 LLM 调用的输入 token
+
+说明：
+- 每只股票每次只有十几条结果，直接两两比较 shingle 集合比 MinHash 更准确且开销可忽略
+"""
+
+import logging
+import re
+from datetime import datetime, timedelta
+from typing import TYPE_CHECKING, List, Optional, Sequence, Set, Tuple
+
+from src.llm_dispatcher import estimate_tokens
+
+if TYPE_CHECKING:
+    from src.search_service import SearchResult
+
+logger = logging.getLogger(__name__)
+
+
+# 两条结果的 3-gram Jaccard 相似度超过该值视为重复
+DUPLICATE_THRESHOLD = 0.6
+# 单条摘要的最大字符数
+SNIPPET_MAX_CHARS = 120
+# 单条摘要的最小字符数（预算不足以放下时不再追加新条目）
+SNIPPET_MIN_CHARS = 30
+
+_WHITESPACE_RE = re.compile(r'\s+')
+_RELATIVE_DATE_RE = re.compile(r'(\d+)\s*(分钟|小时|天)前')
+_DATE_RE = re.compile(r'(\d{4})[-/年.](\d{1,2})[-/月.](\d{1,2})')
+
+
+def _normalize(text: str) -> str:
+    return ''.join(ch for ch in (text or '').lower() if ch.isalnum())
+
+
+def shingles(text: str, n: int = 3) -> Set[str]:
+    """字符 n-gram 集合（去掉空白与标点）"""
+    text = _normalize(text)
+    if len(text) <= n:
+        return {text} if text else set()
+    return {text[i:i + n] for i in range(len(text) - n + 1)}
+
+
+def jaccard(a: Set[str], b: Set[str]) -> float:
+    if not a or not b:
+        return 0.0
+    return len(a & b) / len(a | b)
+
+
+def parse_published_date(value: Optional[str], now: Optional[datetime] = None) -> Optional[datetime]:
+    """
+    解析搜索结果的发布日期
+
+    支持 ISO 格式、"2026-01-05"/"2026年1月5日" 以及 "3小时前"/"2天前" 等相对时间
+    """
+    if not value:
+        return None
+    value = value.strip()
+    now = now or datetime.now()
+
+    relative = _RELATIVE_DATE_RE.search(value)
+    if relative:
+        amount, unit = int(relative.group(1)), relative.group(2)
+        delta = {'分钟': timedelta(minutes=amount), '小时': timedelta(hours=amount)}.get(unit, timedelta(days=amount))
+        return now - delta
+    if '昨天' in value:
+        return now - timedelta(days=1)
+
+    try:
+        parsed = datetime.fromisoformat(value.replace('Z', '+00:00'))
+        return parsed.replace(tzinfo=None)
+    except ValueError:
+        pass
+
+    match = _DATE_RE.search(value)
+    if match:
+        try:
+            return datetime(int(match.group(1)), int(match.group(2)), int(match.group(3)))
+        except ValueError:
+            return None
+    return None
+
+
+def compact_snippet(result: 'SearchResult', max_chars: int) -> str:
+    """压缩摘要：合并空白、去掉与标题重复的开头，按字符数截断"""
+    snippet = _WHITESPACE_RE.sub(' ', result.snippet or '').strip()
+    title = (result.title or '').strip()
+    if title and snippet.startswith(title):
+        snippet = snippet[len(title):].lstrip(' ,，。:：-')
+    if len(snippet) > max_chars:
+        snippet = snippet[:max_chars].rstrip() + '...'
+    return snippet
+
+
+class IntelCompactor:
+    """
+    单只股票的情报后处理器
+
+    使用方式：
+        compactor = IntelCompactor(stock_code, stock_name, token_budget=300)
+        items = compactor.process(response.results)
+    同一个实例内跨维度去重（先处理的维度优先保留）。
+    """
+
+    def __init__(
+        self,
+        stock_code: Optional[str],
+        stock_name: str,
+        token_budget: int = 300,
+        max_items: int = 3,
+        relevance_filter: bool = True,
+    ):
+        """
+        Args:
+            stock_code: 股票代码（为空时只按名称判断相关性）
+            stock_name: 股票名称
+            token_budget: 每个维度的 token 预算（0 表示不限制）
+            max_items: 每个维度最多保留条数
+            relevance_filter: 是否丢弃未提及股票代码/名称的结果
+        """
+        self.terms = [t.lower() for t in (stock_code, stock_name) if t and t.strip()]
+        self.token_budget = token_budget
+        self.max_items = max_items
+        self.relevance_filter = relevance_filter and bool(self.terms)
+        self._seen: List[Set[str]] = []
+        self.stats = {'input': 0, 'duplicates': 0, 'irrelevant': 0, 'kept': 0}
+
+    def is_relevant(self, result: 'SearchResult') -> bool:
+        text = f"{result.title or ''} {result.snippet or ''}".lower()
+        return any(term in text for term in self.terms)
+
+    @staticmethod
+    def _signature(result: 'SearchResult') -> Set[str]:
+        return shingles(f"{result.title or ''}{(result.snippet or '')[:200]}")
+
+    def _is_duplicate(self, signature: Set[str]) -> bool:
+        """是否与已写入提示词的结果重复（只检查，不记录）"""
+        return any(jaccard(signature, seen) >= DUPLICATE_THRESHOLD for seen in self._seen)
+
+    def process(self, results: Sequence['SearchResult']) -> List[Tuple['SearchResult', str]]:
+        """
+        过滤、去重、排序并按预算压缩一个维度的结果
+
+        Returns:
+            [(SearchResult, 压缩后的摘要), ...]
+        """
+        self.stats['input'] += len(results)
+        now = datetime.now()
+
+        candidates = []
+        for index, result in enumerate(results):
+            if self.relevance_filter and not self.is_relevant(result):
+                self.stats['irrelevant'] += 1
+                continue
+            candidates.append((parse_published_date(result.published_date, now), index, result))
+
+        # 有日期的按时间倒序，无日期的排在后面并保持搜索引擎原顺序
+        candidates.sort(key=lambda item: (item[0] is None, -(item[0].timestamp() if item[0] else 0), item[1]))
+
+        items: List[Tuple['SearchResult', str]] = []
+        remaining = self.token_budget if self.token_budget > 0 else None
+        for _, _, result in candidates:
+            if len(items) >= self.max_items:
+                break
+            signature = self._signature(result)
+            if self._is_duplicate(signature):
+                self.stats['duplicates'] += 1
+                continue
+
+            max_chars = SNIPPET_MAX_CHARS
+            if remaining is not None:
+                # 中文约 1 字 1 token，剩余预算先扣除标题，再决定摘要能放多少字
+                remaining -= estimate_tokens(result.title) + estimate_tokens(result.published_date)
+                max_chars = min(max_chars, remaining)
+                if max_chars < SNIPPET_MIN_CHARS and items:
+                    break
+                max_chars = max(max_chars, SNIPPET_MIN_CHARS)
+
+            snippet = compact_snippet(result, max_chars)
+            items.append((result, snippet))
+            # 只记录实际保留的结果，因预算截断的结果在后续维度中仍可使用
+            self._seen.append(signature)
+            if remaining is not None:
+                remaining -= estimate_tokens(snippet)
+
+        self.stats['kept'] += len(items)
+        return items
+
+    def summary(self) -> str:
+        stats = self.stats
+        return (
+            f"原始 {stats['input']} 条 → 保留 {stats['kept']} 条"
+            f"（重复 {stats['duplicates']}，不相关 {stats['irrelevant']}）"
+        )
@@ -11,14 +11,23 @@ A股自选股智能分析系统 - 搜索服务模块
 4. 搜索结果缓存和格式化
 """
 
+import hashlib
+import json
 import logging
 import random
+import threading
 import time
 from abc import ABC, abstractmethod
-from dataclasses import dataclass, field
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, as_completed, wait
+from contextlib import contextmanager
+from dataclasses import asdict, dataclass, field
 from datetime import datetime
-from typing import List, Dict, Any, Optional
-from itertools import cycle
+from typing import List, Dict, Any, Optional, Iterator, Tuple
+
+from src.news_index import NewsIndex
+from src.search_key_pool import SearchKeyPool, parse_quota_headers
+from src.search_postprocess import IntelCompactor
 
 logger = logging.getLogger(__name__)
 
@@ -47,6 +56,11 @@ class SearchResponse:
     success: bool = True
     error_message: Optional[str] = None
     search_time: float = 0.0  # 搜索耗时（秒）
+    from_cache: bool = False  # 是否来自本地缓存
+    # 响应头中的配额信息（供 Key 池使用，拿不到时为 None）
+    quota_remaining: Optional[float] = None
+    quota_reset_at: Optional[float] = None
+    retry_after: Optional[float] = None
     
     def to_context(self, max_results: int = 5) -> str:
         """将搜索结果转换为可用于 AI 分析的上下文"""
@@ -63,61 +77,43 @@ class SearchResponse:
 class BaseSearchProvider(ABC):
     """搜索引擎基类"""
     
-    def __init__(self, api_keys: List[str], name: str):
+    def __init__(self, api_keys: List[str], name: str, key_pool: Optional[SearchKeyPool] = None):
         """
         初始化搜索引擎
         
         Args:
             api_keys: API Key 列表（支持多个 key 负载均衡）
             name: 搜索引擎名称
+            key_pool: Key 池（默认按配置创建）
         """
         self._api_keys = api_keys
         self._name = name
-        self._key_cycle = cycle(api_keys) if api_keys else None
-        self._key_usage: Dict[str, int] = {key: 0 for key in api_keys}
-        self._key_errors: Dict[str, int] = {key: 0 for key in api_keys}
+        self._key_pool = key_pool if key_pool is not None else SearchKeyPool.from_config(name, api_keys)
     
     @property
     def name(self) -> str:
         return self._name
     
+    @property
+    def api_keys(self) -> List[str]:
+        return list(self._api_keys)
+    
     @property
     def is_available(self) -> bool:
         """检查是否有可用的 API Key"""
         return bool(self._api_keys)
     
+    @property
+    def key_pool(self) -> SearchKeyPool:
+        return self._key_pool
+    
     def _get_next_key(self) -> Optional[str]:
         """
         获取下一个可用的 API Key（负载均衡）
         
-        策略：轮询 + 跳过错误过多的 key
+        策略：跳过冷却中的 Key，按延迟、剩余配额、错误数加权选择
         """
-        if not self._key_cycle:
-            return None
-        
-        # 最多尝试所有 key
-        for _ in range(len(self._api_keys)):
-            key = next(self._key_cycle)
-            # 跳过错误次数过多的 key（超过 3 次）
-            if self._key_errors.get(key, 0) < 3:
-                return key
-        
-        # 所有 key 都有问题，重置错误计数并返回第一个
-        logger.warning(f"[{self._name}] 所有 API Key 都有错误记录，重置错误计数")
-        self._key_errors = {key: 0 for key in self._api_keys}
-        return self._api_keys[0] if self._api_keys else None
-    
-    def _record_success(self, key: str) -> None:
-        """记录成功使用"""
-        self._key_usage[key] = self._key_usage.get(key, 0) + 1
-        # 成功后减少错误计数
-        if key in self._key_errors and self._key_errors[key] > 0:
-            self._key_errors[key] -= 1
-    
-    def _record_error(self, key: str) -> None:
-        """记录错误"""
-        self._key_errors[key] = self._key_errors.get(key, 0) + 1
-        logger.warning(f"[{self._name}] API Key {key[:8]}... 错误计数: {self._key_errors[key]}")
+        return self._key_pool.acquire()
     
     @abstractmethod
     def _do_search(self, query: str, api_key: str, max_results: int) -> SearchResponse:
@@ -135,14 +131,25 @@ class BaseSearchProvider(ABC):
         Returns:
             SearchResponse 对象
         """
+        if not self._api_keys:
+            return SearchResponse(
+                query=query,
+                results=[],
+                provider=self._name,
+                success=False,
+                error_message=f"{self._name} 未配置 API Key"
+            )
+        
         api_key = self._get_next_key()
         if not api_key:
+            wait_seconds = self._key_pool.next_available_in()
+            logger.warning(f"[{self._name}] 所有 API Key 都在冷却中（{wait_seconds:.0f}s 后恢复），跳过")
             return SearchResponse(
                 query=query,
                 results=[],
                 provider=self._name,
                 success=False,
-                error_message=f"{self._name} 未配置 API Key"
+                error_message=f"{self._name} 所有 API Key 冷却中"
             )
         
         start_time = time.time()
@@ -151,16 +158,25 @@ class BaseSearchProvider(ABC):
             response.search_time = time.time() - start_time
             
             if response.success:
-                self._record_success(api_key)
+                self._key_pool.report_success(
+                    api_key, response.search_time,
+                    quota_remaining=response.quota_remaining,
+                    quota_reset_at=response.quota_reset_at,
+                )
                 logger.info(f"[{self._name}] 搜索 '{query}' 成功，返回 {len(response.results)} 条结果，耗时 {response.search_time:.2f}s")
             else:
-                self._record_error(api_key)
+                self._key_pool.report_failure(
+                    api_key, response.search_time, response.error_message,
+                    retry_after=response.retry_after,
+                    quota_remaining=response.quota_remaining,
+                    quota_reset_at=response.quota_reset_at,
+                )
             
             return response
             
         except Exception as e:
-            self._record_error(api_key)
             elapsed = time.time() - start_time
+            self._key_pool.report_failure(api_key, elapsed, str(e))
             logger.error(f"[{self._name}] 搜索 '{query}' 失败: {e}")
             return SearchResponse(
                 query=query,
@@ -303,6 +319,16 @@ class SerpAPISearchProvider(BaseSearchProvider):
             # 记录原始响应到日志
             logger.debug(f"[SerpAPI] 原始响应 keys: {response.keys()}")
             
+            # SerpAPI 出错时（如额度用完）返回 {"error": "..."}，而不是抛出异常
+            if response.get('error'):
+                return SearchResponse(
+                    query=query,
+                    results=[],
+                    provider=self.name,
+                    success=False,
+                    error_message=response['error']
+                )
+            
             # 解析结果
             results = []
             organic_results = response.get('organic_results', [])
@@ -364,6 +390,7 @@ class BochaSearchProvider(BaseSearchProvider):
         """执行博查搜索"""
         try:
             import requests
+            from src.http_client import get_http_session
         except ImportError:
             return SearchResponse(
                 query=query,
@@ -392,7 +419,8 @@ class BochaSearchProvider(BaseSearchProvider):
             }
             
             # 执行搜索
-            response = requests.post(url, headers=headers, json=payload, timeout=10)
+            response = get_http_session().post(url, headers=headers, json=payload, timeout=10)
+            quota = parse_quota_headers(response.headers)
             
             # 检查HTTP状态码
             if response.status_code != 200:
@@ -425,7 +453,10 @@ class BochaSearchProvider(BaseSearchProvider):
                     results=[],
                     provider=self.name,
                     success=False,
-                    error_message=error_msg
+                    error_message=error_msg,
+                    quota_remaining=quota['remaining'],
+                    quota_reset_at=quota['reset_at'],
+                    retry_after=quota['retry_after'],
                 )
             
             # 解析响应
@@ -485,6 +516,8 @@ class BochaSearchProvider(BaseSearchProvider):
                 results=results,
                 provider=self.name,
                 success=True,
+                quota_remaining=quota['remaining'],
+                quota_reset_at=quota['reset_at'],
             )
             
         except requests.exceptions.Timeout:
@@ -530,6 +563,208 @@ class BochaSearchProvider(BaseSearchProvider):
             return '未知来源'
 
 
+class SearchRateLimiter:
+    """
+    搜索请求共享限流器（进程内所有 SearchService 共享）
+    
+    按搜索引擎维度控制：
+    - 并发上限 = Key 数 × 单 Key 并发数
+    - 每分钟请求数上限 = Key 数 × 单 Key RPM（0 表示不限制）
+    """
+    
+    def __init__(self, per_key_concurrency: int = 2, per_key_rpm: int = 0):
+        self.per_key_concurrency = max(1, per_key_concurrency)
+        self.per_key_rpm = max(0, per_key_rpm)
+        self._lock = threading.Lock()
+        self._cond = threading.Condition(self._lock)
+        self._semaphores: Dict[str, threading.BoundedSemaphore] = {}
+        self._windows: Dict[str, deque] = {}
+    
+    def _semaphore(self, provider: 'BaseSearchProvider') -> threading.BoundedSemaphore:
+        with self._lock:
+            if provider.name not in self._semaphores:
+                limit = max(1, len(provider.api_keys)) * self.per_key_concurrency
+                self._semaphores[provider.name] = threading.BoundedSemaphore(limit)
+            return self._semaphores[provider.name]
+    
+    def _wait_rpm(self, provider: 'BaseSearchProvider') -> None:
+        if not self.per_key_rpm:
+            return
+        limit = max(1, len(provider.api_keys)) * self.per_key_rpm
+        with self._cond:
+            window = self._windows.setdefault(provider.name, deque())
+            while True:
+                now = time.time()
+                while window and now - window[0] >= 60:
+                    window.popleft()
+                if len(window) < limit:
+                    window.append(now)
+                    return
+                self._cond.wait(timeout=window[0] + 60 - now)
+    
+    @contextmanager
+    def slot(self, provider: 'BaseSearchProvider') -> Iterator[None]:
+        """占用一个搜索请求槽位（先等待 RPM 配额，再占用并发额度）"""
+        self._wait_rpm(provider)
+        semaphore = self._semaphore(provider)
+        semaphore.acquire()
+        try:
+            yield
+        finally:
+            semaphore.release()
+
+
+class SearchResultCache:
+    """
+    搜索结果持久化缓存
+    
+    位于各搜索引擎 search() 之前，键为 (搜索引擎, 规范化查询, 结果数)，
+    不同搜索维度使用独立 TTL（新闻变化快，业绩预期一周内几乎不变）。
+    缓存存放在 SQLite 数据库的 search_cache 表中，调度任务、机器人、WebUI 共享，重启后仍有效。
+    """
+    
+    # 搜索维度 -> TTL 配置项
+    DIMENSION_TTL_FIELDS = {
+        'latest_news': 'search_cache_ttl_news',
+        'stock_news': 'search_cache_ttl_news',
+        'risk_check': 'search_cache_ttl_risk',
+        'stock_events': 'search_cache_ttl_risk',
+        'earnings': 'search_cache_ttl_earnings',
+    }
+    
+    def __init__(self, ttls: Dict[str, int], default_ttl: int = 3600):
+        """
+        Args:
+            ttls: {搜索维度: TTL 秒数}，TTL <= 0 表示该维度不缓存
+            default_ttl: 未配置维度的默认 TTL（秒）
+        """
+        self._ttls = ttls
+        self._default_ttl = default_ttl
+        self._db = None
+        self._disabled = False
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+    
+    @classmethod
+    def from_config(cls, config=None) -> Optional['SearchResultCache']:
+        """根据配置创建缓存（未启用时返回 None）"""
+        if config is None:
+            from src.config import get_config
+            config = get_config()
+        
+        if not config.search_cache_enabled:
+            return None
+        
+        ttls = {dim: getattr(config, attr) for dim, attr in cls.DIMENSION_TTL_FIELDS.items()}
+        return cls(ttls, default_ttl=config.search_cache_ttl_news)
+    
+    @staticmethod
+    def normalize_query(query: str) -> str:
+        """规范化查询：忽略大小写与多余空白"""
+        return ' '.join(query.lower().split())
+    
+    @classmethod
+    def make_key(cls, provider: str, query: str, max_results: int) -> str:
+        raw = f"{provider}|{max_results}|{cls.normalize_query(query)}"
+        return hashlib.sha256(raw.encode('utf-8')).hexdigest()
+    
+    def ttl_for(self, dimension: Optional[str]) -> int:
+        """获取搜索维度的 TTL（秒）"""
+        if dimension is None:
+            return self._default_ttl
+        return self._ttls.get(dimension, self._default_ttl)
+    
+    def _get_db(self):
+        """懒加载数据库（失败后禁用缓存，不影响搜索）"""
+        if self._disabled:
+            return None
+        if self._db is None:
+            with self._lock:
+                if self._db is None and not self._disabled:
+                    try:
+                        from src.storage import get_db
+                        self._db = get_db()
+                        purged = self._db.purge_expired_search_cache()
+                        if purged:
+                            logger.debug(f"[搜索缓存] 清理过期缓存 {purged} 条")
+                    except Exception as e:
+                        self._disabled = True
+                        logger.warning(f"[搜索缓存] 数据库不可用，禁用搜索缓存: {e}")
+                        return None
+        return self._db
+    
+    def get(self, provider: str, query: str, max_results: int) -> Optional[SearchResponse]:
+        """读取缓存，未命中返回 None"""
+        return self.get_any([provider], query, max_results)
+    
+    def get_any(self, providers: List[str], query: str, max_results: int) -> Optional[SearchResponse]:
+        """
+        一次查询读取多个搜索引擎的缓存（按 providers 顺序取第一个命中），计一次命中/未命中
+        
+        Returns:
+            命中的缓存结果，都未命中返回 None
+        """
+        db = self._get_db()
+        if db is None or not providers:
+            return None
+        
+        keys = {self.make_key(provider, query, max_results): provider for provider in providers}
+        try:
+            found = db.get_search_cache(list(keys))
+        except Exception as e:
+            logger.warning(f"[搜索缓存] 读取失败: {e}")
+            return None
+        
+        if found is None:
+            self.misses += 1
+            return None
+        
+        cache_key, payload = found
+        provider = keys[cache_key]
+        
+        try:
+            data = json.loads(payload)
+            results = [SearchResult(**item) for item in data.get('results', [])]
+        except (ValueError, TypeError) as e:
+            logger.warning(f"[搜索缓存] 缓存内容损坏，忽略: {e}")
+            self.misses += 1
+            return None
+        
+        self.hits += 1
+        return SearchResponse(
+            query=query,
+            results=results,
+            provider=provider,
+            success=True,
+            from_cache=True,
+        )
+    
+    def put(self, response: SearchResponse, max_results: int, ttl: int) -> None:
+        """写入缓存（只缓存成功且有结果的响应）"""
+        if ttl <= 0 or not response.success or not response.results:
+            return
+        
+        db = self._get_db()
+        if db is None:
+            return
+        
+        payload = json.dumps(
+            {'results': [asdict(r) for r in response.results]},
+            ensure_ascii=False,
+        )
+        try:
+            db.save_search_cache(
+                self.make_key(response.provider, response.query, max_results),
+                provider=response.provider,
+                query=response.query,
+                payload=payload,
+                ttl_seconds=ttl,
+            )
+        except Exception as e:
+            logger.warning(f"[搜索缓存] 写入失败: {e}")
+
+
 class SearchService:
     """
     搜索服务
@@ -545,6 +780,10 @@ class SearchService:
         bocha_keys: Optional[List[str]] = None,
         tavily_keys: Optional[List[str]] = None,
         serpapi_keys: Optional[List[str]] = None,
+        cache: Optional[SearchResultCache] = None,
+        race_providers: Optional[bool] = None,
+        dimension_timeout: Optional[float] = None,
+        news_index: Optional[NewsIndex] = None,
     ):
         """
         初始化搜索服务
@@ -553,8 +792,39 @@ class SearchService:
             bocha_keys: 博查搜索 API Key 列表
             tavily_keys: Tavily API Key 列表
             serpapi_keys: SerpAPI Key 列表
+            cache: 搜索结果缓存（可选，默认按配置创建；SEARCH_CACHE_ENABLED=false 时不缓存）
+            race_providers: 多维度情报搜索时每个维度是否同时请求两个引擎、取先返回的结果（默认读取配置）
+            dimension_timeout: 单个搜索维度的超时时间（秒，默认读取配置）
+            news_index: 本地新闻索引（可选，默认按配置创建；NEWS_INDEX_ENABLED=false 时不使用）
         """
+        from src.config import get_config
+        config = get_config()
+        
         self._providers: List[BaseSearchProvider] = []
+        self._cache = cache if cache is not None else SearchResultCache.from_config(config)
+        self._race_providers = config.search_race_providers if race_providers is None else race_providers
+        self._dimension_timeout = config.search_dimension_timeout if dimension_timeout is None else dimension_timeout
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._executor_lock = threading.Lock()
+        self._limiter = get_search_limiter()
+        
+        # 本地新闻索引：每次运行批量拉取大盘/板块新闻，个股情报优先从索引命中
+        self._news_index = news_index
+        if self._news_index is None and config.news_index_enabled:
+            try:
+                self._news_index = NewsIndex(config.news_index_path)
+                self._news_index.purge(config.news_index_max_age_hours)
+            except Exception as e:
+                logger.warning(f"[新闻索引] 初始化失败，个股情报将全部实时搜索: {e}")
+        self._news_index_min_hits = config.news_index_min_hits
+        self._news_index_max_age = config.news_index_max_age_hours
+        self._ingest_max_results = config.news_ingest_max_results
+        self._ingest_interval = config.search_cache_ttl_news
+        self._ingest_lock = threading.Lock()
+        self._last_ingest_time = 0.0
+        self._market_news: List[SearchResult] = []
+        self._intel_token_budget = config.search_intel_token_budget
+        self._intel_relevance_filter = config.search_intel_relevance_filter
         
         # 初始化搜索引擎（按优先级排序）
         # 1. Bocha 优先（中文搜索优化，AI摘要）
@@ -580,6 +850,161 @@ class SearchService:
         """检查是否有可用的搜索引擎"""
         return any(p.is_available for p in self._providers)
     
+    @property
+    def executor(self) -> ThreadPoolExecutor:
+        """
+        搜索请求线程池（懒加载，服务内共享）
+        
+        只执行单次引擎请求，不在其中等待其他任务；竞速落败或超时的请求在后台完成，不阻塞调用方
+        """
+        if self._executor is None:
+            with self._executor_lock:
+                if self._executor is None:
+                    self._executor = ThreadPoolExecutor(
+                        max_workers=max(4, len(self._providers) * 3),
+                        thread_name_prefix="search_",
+                    )
+        return self._executor
+    
+    def _search(
+        self,
+        provider: BaseSearchProvider,
+        query: str,
+        max_results: int,
+        dimension: Optional[str] = None,
+        skip_cache_lookup: bool = False
+    ) -> SearchResponse:
+        """
+        带缓存的单引擎搜索
+        
+        Args:
+            provider: 搜索引擎
+            query: 搜索关键词
+            max_results: 最大返回结果数
+            dimension: 搜索维度（决定缓存 TTL）
+            skip_cache_lookup: 调用方已查过缓存（未命中）时跳过读取，结果仍写入缓存
+        """
+        if self._cache is not None and not skip_cache_lookup:
+            cached = self._cache.get(provider.name, query, max_results)
+            if cached is not None:
+                logger.info(f"[{provider.name}] 搜索 '{query}' 命中缓存，{len(cached.results)} 条结果")
+                return cached
+        
+        with self._limiter.slot(provider):
+            response = provider.search(query, max_results)
+        if self._cache is not None:
+            self._cache.put(response, max_results, self._cache.ttl_for(dimension))
+        if self._news_index is not None and response.success and response.results:
+            try:
+                self._news_index.add(response.results, topic=dimension or '')
+            except Exception as e:
+                logger.warning(f"[新闻索引] 写入失败: {e}")
+        return response
+    
+    # 大盘/板块新闻拉取查询（{month} 替换为当月，如 2026年1月）
+    MARKET_NEWS_QUERIES = [
+        "A股 大盘 复盘 {month}",
+        "股市 行情 分析 今日 {month}",
+        "A股 市场 热点 板块 {month}",
+        "A股 上市公司 公告 减持 业绩预告 {month}",
+    ]
+    
+    def ingest_market_news(self, force: bool = False) -> List[SearchResult]:
+        """
+        批量拉取大盘与板块新闻并写入本地索引（每个时间窗口只拉取一次）
+        
+        个股情报搜索会先查本地索引，大盘复盘也直接使用这里的结果，
+        自选股较多时大量个股搜索变为本地查询。
+        
+        Args:
+            force: 忽略拉取间隔强制重新拉取
+            
+        Returns:
+            本次（或最近一次）拉取到的新闻列表
+        """
+        with self._ingest_lock:
+            if not force and self._market_news and time.time() - self._last_ingest_time < self._ingest_interval:
+                return list(self._market_news)
+            
+            available_providers = [p for p in self._providers if p.is_available]
+            if not available_providers:
+                return []
+            
+            today = datetime.now()
+            month_str = f"{today.year}年{today.month}月"
+            dims = [
+                {'name': 'market_news', 'query': q.format(month=month_str), 'desc': '大盘新闻'}
+                for q in self.MARKET_NEWS_QUERIES
+            ]
+            
+            logger.info(f"[新闻索引] 开始拉取大盘/板块新闻（{len(dims)} 个查询）")
+            with ThreadPoolExecutor(max_workers=len(dims), thread_name_prefix="ingest_") as executor:
+                futures = [
+                    executor.submit(self._search_dimension, dim, available_providers, self._ingest_max_results)
+                    for dim in dims
+                ]
+                responses = [f.result() for f in futures]
+            
+            news: List[SearchResult] = []
+            seen = set()
+            for response in responses:
+                for r in response.results:
+                    key = r.url or r.title
+                    if key not in seen:
+                        seen.add(key)
+                        news.append(r)
+            
+            added = 0
+            if self._news_index is not None and news:
+                # 缓存命中的结果不会经过 _search 写入索引，这里统一写入（重复自动跳过）
+                added = self._news_index.add(news, topic='market')
+            
+            self._market_news = news
+            self._last_ingest_time = time.time()
+            logger.info(f"[新闻索引] 拉取完成：{len(news)} 条新闻，新增入库 {added} 条")
+            return list(news)
+    
+    # 各情报维度在本地索引中的过滤词（标题或摘要需包含其一）
+    INDEX_DIMENSION_FILTERS = {
+        'risk_check': ['减持', '处罚', '利空', '风险', '立案', '问询', '违规', '诉讼'],
+        'earnings': ['年报', '业绩', '预告', '快报', '净利润', '营收'],
+    }
+    
+    def _search_index(self, dim: Dict[str, Any]) -> Optional[SearchResponse]:
+        """从本地新闻索引回答单个情报维度，命中条数不足返回 None"""
+        if self._news_index is None or not dim.get('terms'):
+            return None
+        
+        # 新鲜度与该维度的缓存有效期保持一致（如最新消息只用 1 小时内入库的新闻）
+        max_age_hours = self._news_index_max_age
+        if self._cache is not None:
+            max_age_hours = min(max_age_hours, self._cache.ttl_for(dim['name']) / 3600)
+        
+        try:
+            rows = self._news_index.search(
+                dim['terms'],
+                max_age_hours=max_age_hours,
+                limit=3,
+                must_contain_any=self.INDEX_DIMENSION_FILTERS.get(dim['name']),
+            )
+        except Exception as e:
+            logger.warning(f"[新闻索引] 查询失败: {e}")
+            return None
+        
+        if len(rows) < self._news_index_min_hits:
+            return None
+        
+        return SearchResponse(
+            query=dim['query'],
+            results=[
+                SearchResult(title=title, snippet=snippet, url=url or '', source=source or '未知来源', published_date=published)
+                for title, snippet, url, source, published in rows
+            ],
+            provider="本地新闻库",
+            success=True,
+            from_cache=True,
+        )
+    
     def search_stock_news(
         self,
         stock_code: str,
@@ -620,7 +1045,7 @@ class SearchService:
             if not provider.is_available:
                 continue
             
-            response = provider.search(query, max_results)
+            response = self._search(provider, query, max_results, dimension='stock_news')
             
             if response.success and response.results:
                 logger.info(f"使用 {provider.name} 搜索成功")
@@ -670,7 +1095,7 @@ class SearchService:
             if not provider.is_available:
                 continue
             
-            response = provider.search(query, max_results=5)
+            response = self._search(provider, query, max_results=5, dimension='stock_events')
             
             if response.success:
                 return response
@@ -705,115 +1130,244 @@ class SearchService:
         Returns:
             {维度名称: SearchResponse} 字典
         """
-        results = {}
-        search_count = 0
-        
-        # 定义搜索维度
+        # 定义搜索维度（terms 用于本地新闻索引检索）
+        terms = [stock_code, stock_name]
         search_dimensions = [
             {
                 'name': 'latest_news',
                 'query': f"{stock_name} {stock_code} 最新 新闻 2026年1月",
-                'desc': '最新消息'
+                'desc': '最新消息',
+                'terms': terms,
             },
             {
                 'name': 'risk_check', 
                 'query': f"{stock_name} 减持 处罚 利空 风险",
-                'desc': '风险排查'
+                'desc': '风险排查',
+                'terms': terms,
             },
             {
                 'name': 'earnings',
                 'query': f"{stock_name} 年报预告 业绩预告 业绩快报 2025年报",
-                'desc': '业绩预期'
+                'desc': '业绩预期',
+                'terms': terms,
             },
-        ]
+        ][:max_searches]
         
-        logger.info(f"开始多维度情报搜索: {stock_name}({stock_code})")
+        available_providers = [p for p in self._providers if p.is_available]
+        if not available_providers or not search_dimensions:
+            return {}
         
-        # 轮流使用不同的搜索引擎
-        provider_index = 0
+        logger.info(
+            f"开始多维度情报搜索: {stock_name}({stock_code})，{len(search_dimensions)} 个维度并发"
+            f"{'（引擎竞速）' if self._race_providers and len(available_providers) > 1 else ''}"
+        )
+        
+        # 各维度并发执行；每个维度的首选引擎轮流分配，失败时立即换下一个引擎
+        # 维度协调线程与实际搜索请求使用不同线程池，避免协调线程占满共享线程池导致互相等待
+        with ThreadPoolExecutor(max_workers=len(search_dimensions), thread_name_prefix="intel_") as executor:
+            futures = {}
+            for i, dim in enumerate(search_dimensions):
+                start = i % len(available_providers)
+                ordered = available_providers[start:] + available_providers[:start]
+                futures[dim['name']] = executor.submit(self._search_dimension, dim, ordered, 3)
         
+        results: Dict[str, SearchResponse] = {}
         for dim in search_dimensions:
-            if search_count >= max_searches:
-                break
-            
-            # 选择搜索引擎（轮流使用）
-            available_providers = [p for p in self._providers if p.is_available]
-            if not available_providers:
-                break
-            
-            provider = available_providers[provider_index % len(available_providers)]
-            provider_index += 1
-            
-            logger.info(f"[情报搜索] {dim['desc']}: 使用 {provider.name}")
-            
-            response = provider.search(dim['query'], max_results=3)
+            response = futures[dim['name']].result()
             results[dim['name']] = response
-            search_count += 1
             
             if response.success:
-                logger.info(f"[情报搜索] {dim['desc']}: 获取 {len(response.results)} 条结果")
+                logger.info(f"[情报搜索] {dim['desc']}: 使用 {response.provider} 获取 {len(response.results)} 条结果")
             else:
                 logger.warning(f"[情报搜索] {dim['desc']}: 搜索失败 - {response.error_message}")
-            
-            # 短暂延迟避免请求过快
-            time.sleep(0.5)
         
         return results
     
-    def format_intel_report(self, intel_results: Dict[str, SearchResponse], stock_name: str) -> str:
+    def _search_dimension(
+        self,
+        dim: Dict[str, Any],
+        providers: List[BaseSearchProvider],
+        max_results: int
+    ) -> SearchResponse:
+        """
+        搜索单个维度（故障转移 + 可选竞速）
+        
+        1. 任一引擎已有缓存则直接返回
+        2. 本地新闻索引命中足够条数则直接返回
+        3. 竞速模式下同时请求前两个引擎，取截止时间内最先成功的结果
+        4. 失败的引擎立即换下一个重试，不会丢掉整个维度
+        
+        Args:
+            dim: 维度定义 {'name', 'query', 'desc', 'terms'(可选，本地索引检索词)}
+            providers: 按优先顺序排列的可用引擎
+            max_results: 最大返回结果数
+        """
+        query = dim['query']
+        deadline = time.time() + self._dimension_timeout
+        
+        if self._cache is not None:
+            cached = self._cache.get_any([provider.name for provider in providers], query, max_results)
+            if cached is not None:
+                logger.info(f"[情报搜索] {dim['desc']}: 命中 {cached.provider} 缓存")
+                return cached
+        
+        indexed = self._search_index(dim)
+        if indexed is not None:
+            logger.info(f"[情报搜索] {dim['desc']}: 本地新闻库命中 {len(indexed.results)} 条")
+            return indexed
+        
+        race_size = 2 if self._race_providers else 1
+        pending = {}
+        remaining = list(providers)
+        errors = []
+        
+        def launch() -> None:
+            while remaining and len(pending) < race_size:
+                provider = remaining.pop(0)
+                future = self.executor.submit(
+                    self._search, provider, query, max_results, dim['name'], skip_cache_lookup=True
+                )
+                pending[future] = provider
+        
+        launch()
+        while pending:
+            timeout = deadline - time.time()
+            if timeout <= 0:
+                break
+            
+            done, _ = wait(list(pending), timeout=timeout, return_when=FIRST_COMPLETED)
+            if not done:
+                break
+            
+            for future in done:
+                provider = pending.pop(future)
+                try:
+                    response = future.result()
+                except Exception as e:
+                    response = SearchResponse(
+                        query=query, results=[], provider=provider.name,
+                        success=False, error_message=str(e)
+                    )
+                
+                if response.success and response.results:
+                    return response
+                
+                errors.append(f"{provider.name}: {response.error_message or '无结果'}")
+                if remaining:
+                    logger.info(f"[情报搜索] {dim['desc']}: {provider.name} 失败，立即切换 {remaining[0].name}")
+            
+            launch()
+        
+        if pending:
+            errors.append(f"超时 {self._dimension_timeout:.0f}s")
+        
+        return SearchResponse(
+            query=query,
+            results=[],
+            provider=providers[0].name if providers else "None",
+            success=False,
+            error_message='; '.join(errors) or "所有搜索引擎都不可用或搜索失败"
+        )
+    
+    # 情报报告各维度的标题与无结果提示
+    INTEL_REPORT_SECTIONS = [
+        ('latest_news', '📰 最新消息', '未找到相关消息'),
+        ('risk_check', '⚠️ 风险排查', '未发现明显风险信号'),
+        ('earnings', '📊 业绩预期', '未找到业绩相关信息'),
+    ]
+    
+    def format_intel_report(
+        self,
+        intel_results: Dict[str, SearchResponse],
+        stock_name: str,
+        stock_code: Optional[str] = None
+    ) -> str:
         """
         格式化情报搜索结果为报告
         
+        写入提示词前先做本地后处理：跨维度去重、丢弃未提及该股票的结果、
+        按发布时间倒序，并按每个维度的 token 预算压缩摘要。
+        
         Args:
             intel_results: 多维度搜索结果
             stock_name: 股票名称
+            stock_code: 股票代码（用于相关性过滤）
             
         Returns:
             格式化的情报报告文本
         """
+        compactor = IntelCompactor(
+            stock_code,
+            stock_name,
+            token_budget=self._intel_token_budget,
+            relevance_filter=self._intel_relevance_filter,
+        )
         lines = [f"【{stock_name} 情报搜索结果】"]
         
-        # 最新消息
-        if 'latest_news' in intel_results:
-            resp = intel_results['latest_news']
-            lines.append(f"\n📰 最新消息 (来源: {resp.provider}):")
-            if resp.success and resp.results:
-                for i, r in enumerate(resp.results[:3], 1):
-                    date_str = f" [{r.published_date}]" if r.published_date else ""
-                    lines.append(f"  {i}. {r.title}{date_str}")
-                    lines.append(f"     {r.snippet[:100]}...")
-            else:
-                lines.append("  未找到相关消息")
-        
-        # 风险排查
-        if 'risk_check' in intel_results:
-            resp = intel_results['risk_check']
-            lines.append(f"\n⚠️ 风险排查 (来源: {resp.provider}):")
-            if resp.success and resp.results:
-                for i, r in enumerate(resp.results[:3], 1):
-                    lines.append(f"  {i}. {r.title}")
-                    lines.append(f"     {r.snippet[:100]}...")
-            else:
-                lines.append("  未发现明显风险信号")
-        
-        # 业绩预期
-        if 'earnings' in intel_results:
-            resp = intel_results['earnings']
-            lines.append(f"\n📊 业绩预期 (来源: {resp.provider}):")
-            if resp.success and resp.results:
-                for i, r in enumerate(resp.results[:3], 1):
-                    lines.append(f"  {i}. {r.title}")
-                    lines.append(f"     {r.snippet[:100]}...")
-            else:
-                lines.append("  未找到业绩相关信息")
+        for name, title, empty_text in self.INTEL_REPORT_SECTIONS:
+            if name not in intel_results:
+                continue
+            resp = intel_results[name]
+            lines.append(f"\n{title} (来源: {resp.provider}):")
+            items = compactor.process(resp.results) if resp.success else []
+            if not items:
+                lines.append(f"  {empty_text}")
+                continue
+            for i, (r, snippet) in enumerate(items, 1):
+                date_str = f" [{r.published_date}]" if r.published_date else ""
+                lines.append(f"  {i}. {r.title}{date_str}")
+                if snippet:
+                    lines.append(f"     {snippet}")
         
+        logger.info(f"[情报精简] {stock_code or stock_name}: {compactor.summary()}")
         return "\n".join(lines)
     
+    def iter_batch_search(
+        self,
+        stocks: List[Dict[str, str]],
+        max_results_per_stock: int = 3
+    ) -> Iterator[Tuple[str, SearchResponse]]:
+        """
+        批量搜索多只股票新闻（并发执行，按完成顺序逐个返回）
+        
+        并发度与请求速率由共享限流器按各搜索引擎的 Key 数控制，
+        调用方可以在早完成的股票上先开始后续处理。
+        
+        Args:
+            stocks: 股票列表 [{"code": "300389", "name": "艾比森"}, ...]
+            max_results_per_stock: 每只股票的最大结果数
+            
+        Yields:
+            (股票代码, SearchResponse)
+        """
+        if not stocks:
+            return
+        
+        futures = {
+            self.executor.submit(
+                self.search_stock_news,
+                stock.get('code', ''),
+                stock.get('name', ''),
+                max_results_per_stock,
+            ): stock.get('code', '')
+            for stock in stocks
+        }
+        
+        for future in as_completed(futures):
+            code = futures[future]
+            try:
+                yield code, future.result()
+            except Exception as e:
+                logger.error(f"[批量搜索] {code} 搜索异常: {e}")
+                yield code, SearchResponse(
+                    query=code, results=[], provider="None", success=False, error_message=str(e)
+                )
+    
     def batch_search(
         self,
         stocks: List[Dict[str, str]],
         max_results_per_stock: int = 3,
-        delay_between: float = 1.0
+        delay_between: float = 0.0
     ) -> Dict[str, SearchResponse]:
         """
         批量搜索多只股票新闻
@@ -821,28 +1375,35 @@ class SearchService:
         Args:
             stocks: 股票列表 [{"code": "300389", "name": "艾比森"}, ...]
             max_results_per_stock: 每只股票的最大结果数
-            delay_between: 每次搜索之间的延迟（秒）
+            delay_between: 已废弃（请求速率改由共享限流器控制），保留以兼容旧调用
             
         Returns:
             {股票代码: SearchResponse} 字典
         """
-        results = {}
-        
-        for i, stock in enumerate(stocks):
-            if i > 0:
-                time.sleep(delay_between)
-            
-            code = stock.get('code', '')
-            name = stock.get('name', '')
-            
-            response = self.search_stock_news(code, name, max_results_per_stock)
-            results[code] = response
-        
-        return results
+        return dict(self.iter_batch_search(stocks, max_results_per_stock))
 
 
 # === 便捷函数 ===
 _search_service: Optional[SearchService] = None
+_search_limiter: Optional[SearchRateLimiter] = None
+_search_limiter_lock = threading.Lock()
+
+
+def get_search_limiter() -> SearchRateLimiter:
+    """获取搜索限流器单例（进程内所有搜索服务共享）"""
+    global _search_limiter
+    
+    if _search_limiter is None:
+        with _search_limiter_lock:
+            if _search_limiter is None:
+                from src.config import get_config
+                config = get_config()
+                _search_limiter = SearchRateLimiter(
+                    per_key_concurrency=config.search_concurrency_per_key,
+                    per_key_rpm=config.search_rpm_per_key,
+                )
+    
+    return _search_limiter
 
 
 def get_search_service() -> SearchService:
@@ -12,9 +12,10 @@ A股自选股智能分析系统 - 存储层
 """
 
 import atexit
+import json
 import logging
 from datetime import datetime, date, timedelta
-from typing import Optional, List, Dict, Any
+from typing import Optional, List, Dict, Any, Tuple
 from pathlib import Path
 
 import pandas as pd
@@ -27,10 +28,15 @@ from sqlalchemy import (
     DateTime,
     Integer,
     Index,
+    Text,
+    delete,
+    func,
+    update,
     UniqueConstraint,
     select,
     and_,
     desc,
+    or_,
 )
 from sqlalchemy.orm import (
     declarative_base,
@@ -120,6 +126,152 @@ class StockDaily(Base):
         }
 
 
+class SearchCache(Base):
+    """
+    搜索结果缓存模型
+    
+    按 (搜索引擎, 规范化查询, 结果数) 缓存搜索响应，过期时间由各搜索维度的 TTL 决定
+    """
+    __tablename__ = 'search_cache'
+    
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    
+    # 缓存键（搜索引擎 + 规范化查询 + 结果数 的哈希）
+    cache_key = Column(String(64), nullable=False, unique=True)
+    
+    provider = Column(String(20))
+    query = Column(Text)
+    
+    # 序列化后的搜索结果（JSON）
+    payload = Column(Text, nullable=False)
+    
+    created_at = Column(DateTime, default=datetime.now)
+    expires_at = Column(DateTime, nullable=False, index=True)
+    
+    def __repr__(self):
+        return f"<SearchCache(provider={self.provider}, query={self.query}, expires_at={self.expires_at})>"
+
+
+class SearchKeyState(Base):
+    """
+    搜索 API Key 状态模型
+    
+    记录每个 Key 的延迟、剩余配额与冷却时间，重启后恢复，避免继续使用已耗尽的 Key
+    """
+    __tablename__ = 'search_key_state'
+    
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    
+    provider = Column(String(20), nullable=False)
+    # Key 的哈希标识（不保存明文 Key）
+    key_id = Column(String(16), nullable=False)
+    
+    requests = Column(Integer, default=0)
+    errors = Column(Integer, default=0)
+    latency_ewma = Column(Float)
+    quota_remaining = Column(Integer)
+    quota_reset_at = Column(DateTime)
+    cooldown_until = Column(DateTime)
+    
+    updated_at = Column(DateTime, default=datetime.now, onupdate=datetime.now)
+    
+    __table_args__ = (
+        UniqueConstraint('provider', 'key_id', name='uix_provider_key'),
+    )
+    
+    def __repr__(self):
+        return f"<SearchKeyState(provider={self.provider}, key_id={self.key_id}, cooldown_until={self.cooldown_until})>"
+
+
+class NotificationOutbox(Base):
+    """
+    通知推送队列（Outbox）模型
+    
+    分析流程只负责入队，由后台投递线程按渠道发送；进程重启后未投递的消息继续发送
+    """
+    __tablename__ = 'notification_outbox'
+    
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    
+    # 幂等键（渠道 + 内容的哈希）：相同消息待投递/投递中时只保留一条，
+    # 已投递或已放弃的记录再次入队时重新置为待投递
+    idempotency_key = Column(String(64), nullable=False, unique=True)
+    
+    channel = Column(String(20), nullable=False)
+    content = Column(Text, nullable=False)
+    
+    # 状态：pending / sending / sent / failed
+    status = Column(String(10), nullable=False, default='pending')
+    attempts = Column(Integer, default=0)
+    last_error = Column(Text)
+    
+    next_attempt_at = Column(DateTime, default=datetime.now)
+    created_at = Column(DateTime, default=datetime.now)
+    sent_at = Column(DateTime)
+    
+    # 领取（置为 sending）或续租的时间，超过租约仍未完成的视为投递进程已退出
+    claimed_at = Column(DateTime)
+    
+    __table_args__ = (
+        Index('ix_outbox_status_next', 'status', 'next_attempt_at'),
+    )
+    
+    def __repr__(self):
+        return f"<NotificationOutbox(channel={self.channel}, status={self.status}, attempts={self.attempts})>"
+
+
+class AnalysisTask(Base):
+    """
+    分析任务记录模型
+    
+    WebUI/机器人提交的单股分析任务完成后写入，内存中只保留最近的任务
+    """
+    __tablename__ = 'analysis_task'
+    
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    
+    task_id = Column(String(64), nullable=False, unique=True)
+    code = Column(String(10), nullable=False)
+    report_type = Column(String(10))
+    
+    # 状态：completed / failed
+    status = Column(String(10), nullable=False)
+    # 提交时间（列表排序依据）与开始执行时间
+    submit_time = Column(DateTime, nullable=False)
+    start_time = Column(DateTime, nullable=False)
+    end_time = Column(DateTime)
+    
+    # 结果摘要（JSON）
+    result = Column(Text)
+    error = Column(Text)
+    # 合并到该任务的重复请求数
+    coalesced = Column(Integer, default=0)
+    
+    __table_args__ = (
+        Index('ix_task_submit', 'submit_time'),
+        Index('ix_task_code_submit', 'code', 'submit_time'),
+        Index('ix_task_status_submit', 'status', 'submit_time'),
+    )
+    
+    def __repr__(self):
+        return f"<AnalysisTask(task_id={self.task_id}, code={self.code}, status={self.status})>"
+    
+    def to_dict(self) -> Dict[str, Any]:
+        """转换为与 AnalysisService 任务状态相同的字典"""
+        return {
+            'task_id': self.task_id,
+            'code': self.code,
+            'status': self.status,
+            'submit_time': self.submit_time.isoformat() if self.submit_time else None,
+            'start_time': self.start_time.isoformat() if self.start_time else None,
+            'end_time': self.end_time.isoformat() if self.end_time else None,
+            'result': json.loads(self.result) if self.result else None,
+            'error': self.error,
+            'report_type': self.report_type,
+            'coalesced': self.coalesced or 0,
+        }
+
+
 class DatabaseManager:
     """
     数据库管理器 - 单例模式
@@ -460,6 +612,439 @@ class DatabaseManager:
         
         return context
     
+    def get_search_cache(self, cache_keys: List[str]) -> Optional[Tuple[str, str]]:
+        """
+        读取未过期的搜索缓存（一次查询多个候选键）
+        
+        Args:
+            cache_keys: 按优先顺序排列的缓存键
+            
+        Returns:
+            (命中的缓存键, 序列化的搜索结果)，按 cache_keys 顺序取第一个命中；都不存在或已过期返回 None
+        """
+        with self.get_session() as session:
+            rows = session.execute(
+                select(SearchCache.cache_key, SearchCache.payload).where(
+                    and_(
+                        SearchCache.cache_key.in_(cache_keys),
+                        SearchCache.expires_at > datetime.now()
+                    )
+                )
+            ).all()
+        
+        payloads = {cache_key: payload for cache_key, payload in rows}
+        for cache_key in cache_keys:
+            if cache_key in payloads:
+                return cache_key, payloads[cache_key]
+        return None
+    
+    def save_search_cache(
+        self,
+        cache_key: str,
+        provider: str,
+        query: str,
+        payload: str,
+        ttl_seconds: int
+    ) -> None:
+        """
+        写入搜索缓存（已存在则覆盖）
+        
+        Args:
+            cache_key: 缓存键
+            provider: 搜索引擎名称
+            query: 搜索查询
+            payload: 序列化的搜索结果
+            ttl_seconds: 有效期（秒）
+        """
+        now = datetime.now()
+        expires_at = now + timedelta(seconds=ttl_seconds)
+        
+        with self.get_session() as session:
+            try:
+                row = session.execute(
+                    select(SearchCache).where(SearchCache.cache_key == cache_key)
+                ).scalar_one_or_none()
+                
+                if row:
+                    row.payload = payload
+                    row.created_at = now
+                    row.expires_at = expires_at
+                else:
+                    session.add(SearchCache(
+                        cache_key=cache_key,
+                        provider=provider,
+                        query=query,
+                        payload=payload,
+                        created_at=now,
+                        expires_at=expires_at,
+                    ))
+                
+                session.commit()
+            except IntegrityError:
+                # 并发写入同一个键，保留先写入的结果即可
+                session.rollback()
+    
+    def get_search_key_states(self, provider: str) -> List[Dict[str, Any]]:
+        """
+        读取搜索引擎的 Key 状态
+        
+        Args:
+            provider: 搜索引擎名称
+            
+        Returns:
+            Key 状态字典列表
+        """
+        with self.get_session() as session:
+            rows = session.execute(
+                select(SearchKeyState).where(SearchKeyState.provider == provider)
+            ).scalars().all()
+            
+            return [
+                {
+                    'key_id': row.key_id,
+                    'requests': row.requests,
+                    'errors': row.errors,
+                    'latency_ewma': row.latency_ewma,
+                    'quota_remaining': row.quota_remaining,
+                    'quota_reset_at': row.quota_reset_at,
+                    'cooldown_until': row.cooldown_until,
+                }
+                for row in rows
+            ]
+    
+    def save_search_key_states(self, provider: str, states: List[Dict[str, Any]]) -> None:
+        """
+        保存搜索引擎的 Key 状态（按 key_id 覆盖）
+        
+        Args:
+            provider: 搜索引擎名称
+            states: Key 状态字典列表（字段同 get_search_key_states）
+        """
+        with self.get_session() as session:
+            try:
+                existing = {
+                    row.key_id: row
+                    for row in session.execute(
+                        select(SearchKeyState).where(SearchKeyState.provider == provider)
+                    ).scalars().all()
+                }
+                
+                for state in states:
+                    row = existing.get(state['key_id'])
+                    if row is None:
+                        row = SearchKeyState(provider=provider, key_id=state['key_id'])
+                        session.add(row)
+                    for field_name in ('requests', 'errors', 'latency_ewma', 'quota_remaining',
+                                       'quota_reset_at', 'cooldown_until'):
+                        setattr(row, field_name, state.get(field_name))
+                
+                session.commit()
+            except IntegrityError:
+                # 多个进程同时首次写入，下次保存时覆盖即可
+                session.rollback()
+    
+    def enqueue_notification(self, idempotency_key: str, channel: str, content: str) -> bool:
+        """
+        通知入队
+        
+        Args:
+            idempotency_key: 幂等键
+            channel: 渠道标识（NotificationChannel.value）
+            content: 消息内容
+            
+        Returns:
+            是否入队（相同消息仍在待投递/投递中时返回 False）
+        """
+        now = datetime.now()
+        with self.get_session() as session:
+            try:
+                session.add(NotificationOutbox(
+                    idempotency_key=idempotency_key,
+                    channel=channel,
+                    content=content,
+                    status='pending',
+                    next_attempt_at=now,
+                    created_at=now,
+                ))
+                session.commit()
+                return True
+            except IntegrityError:
+                session.rollback()
+            
+            # 幂等键已存在：只对已结束（sent/failed）的记录重新入队，条件更新避免与投递线程冲突
+            result = session.execute(
+                update(NotificationOutbox)
+                .where(
+                    and_(
+                        NotificationOutbox.idempotency_key == idempotency_key,
+                        NotificationOutbox.status.in_(('sent', 'failed'))
+                    )
+                )
+                .values(
+                    content=content,
+                    status='pending',
+                    attempts=0,
+                    last_error=None,
+                    next_attempt_at=now,
+                    created_at=now,
+                    sent_at=None,
+                    claimed_at=None,
+                )
+            )
+            session.commit()
+            return bool(result.rowcount)
+    
+    def claim_due_notifications(self, limit: int = 50) -> List[Dict[str, Any]]:
+        """
+        领取到期待投递的通知（状态置为 sending）
+        
+        Args:
+            limit: 最大领取条数
+            
+        Returns:
+            [{'id', 'channel', 'content', 'attempts'}, ...]
+        """
+        now = datetime.now()
+        claimed = []
+        with self.get_session() as session:
+            rows = session.execute(
+                select(NotificationOutbox)
+                .where(
+                    and_(
+                        NotificationOutbox.status == 'pending',
+                        NotificationOutbox.next_attempt_at <= now
+                    )
+                )
+                .order_by(NotificationOutbox.id)
+                .limit(limit)
+            ).scalars().all()
+            
+            for row in rows:
+                # 条件更新，避免多个进程重复领取同一条
+                result = session.execute(
+                    update(NotificationOutbox)
+                    .where(and_(NotificationOutbox.id == row.id, NotificationOutbox.status == 'pending'))
+                    .values(status='sending', claimed_at=now)
+                )
+                if result.rowcount:
+                    claimed.append({
+                        'id': row.id,
+                        'channel': row.channel,
+                        'content': row.content,
+                        'attempts': row.attempts or 0,
+                    })
+            session.commit()
+        return claimed
+    
+    def mark_notification_sent(self, outbox_id: int) -> None:
+        """标记通知已投递"""
+        with self.get_session() as session:
+            session.execute(
+                update(NotificationOutbox)
+                .where(NotificationOutbox.id == outbox_id)
+                .values(status='sent', sent_at=datetime.now(), attempts=NotificationOutbox.attempts + 1)
+            )
+            session.commit()
+    
+    def mark_notification_failed(
+        self,
+        outbox_id: int,
+        error: str,
+        next_attempt_at: Optional[datetime]
+    ) -> None:
+        """
+        记录一次投递失败
+        
+        Args:
+            outbox_id: 队列记录 ID
+            error: 错误信息
+            next_attempt_at: 下次重试时间，None 表示不再重试
+        """
+        values: Dict[str, Any] = {
+            'attempts': NotificationOutbox.attempts + 1,
+            'last_error': error[:2000],
+        }
+        if next_attempt_at is None:
+            values['status'] = 'failed'
+        else:
+            values['status'] = 'pending'
+            values['next_attempt_at'] = next_attempt_at
+        
+        with self.get_session() as session:
+            session.execute(
+                update(NotificationOutbox).where(NotificationOutbox.id == outbox_id).values(**values)
+            )
+            session.commit()
+    
+    def renew_notification_claim(self, outbox_id: int) -> bool:
+        """
+        续租已领取的通知（投递前调用，避免排队等待期间被其他进程当作过期领取）
+        
+        Returns:
+            是否仍由当前进程持有（已被重新入队时返回 False，不应再投递）
+        """
+        with self.get_session() as session:
+            result = session.execute(
+                update(NotificationOutbox)
+                .where(and_(NotificationOutbox.id == outbox_id, NotificationOutbox.status == 'sending'))
+                .values(claimed_at=datetime.now())
+            )
+            session.commit()
+            return bool(result.rowcount)
+    
+    def requeue_stale_notifications(self, lease_seconds: float) -> int:
+        """
+        将领取后超过租约仍未完成的通知重新置为待投递（投递进程异常退出的情况）
+        
+        WebUI/机器人进程与定时任务可能共用同一个数据库，仍在租约内的 sending
+        记录可能正由其他进程投递，不能重新入队。
+        
+        Args:
+            lease_seconds: 领取租约（秒）
+            
+        Returns:
+            重新入队的条数
+        """
+        now = datetime.now()
+        expired_before = now - timedelta(seconds=lease_seconds)
+        with self.get_session() as session:
+            result = session.execute(
+                update(NotificationOutbox)
+                .where(
+                    and_(
+                        NotificationOutbox.status == 'sending',
+                        or_(
+                            NotificationOutbox.claimed_at.is_(None),
+                            NotificationOutbox.claimed_at < expired_before,
+                        )
+                    )
+                )
+                .values(status='pending', next_attempt_at=now, claimed_at=None)
+            )
+            session.commit()
+            return result.rowcount or 0
+    
+    def purge_finished_notifications(self, retention_days: int) -> int:
+        """
+        清理超过保留期的已投递/已放弃通知
+        
+        Args:
+            retention_days: 保留天数
+            
+        Returns:
+            删除的记录数
+        """
+        cutoff = datetime.now() - timedelta(days=retention_days)
+        with self.get_session() as session:
+            result = session.execute(
+                delete(NotificationOutbox).where(
+                    and_(
+                        NotificationOutbox.status.in_(('sent', 'failed')),
+                        func.coalesce(NotificationOutbox.sent_at, NotificationOutbox.created_at) < cutoff
+                    )
+                )
+            )
+            session.commit()
+            return result.rowcount or 0
+    
+    def count_pending_notifications(self) -> int:
+        """待投递（含投递中）的通知条数"""
+        with self.get_session() as session:
+            return session.execute(
+                select(func.count(NotificationOutbox.id)).where(
+                    NotificationOutbox.status.in_(('pending', 'sending'))
+                )
+            ).scalar() or 0
+    
+    def save_analysis_task(self, task: Dict[str, Any]) -> None:
+        """
+        保存已结束的分析任务（按 task_id 覆盖）
+        
+        Args:
+            task: AnalysisService 的任务状态字典
+        """
+        def _parse_time(value: Optional[str]) -> Optional[datetime]:
+            return datetime.fromisoformat(value) if value else None
+        
+        start_time = _parse_time(task.get('start_time')) or datetime.now()
+        values = {
+            'code': task['code'],
+            'report_type': task.get('report_type'),
+            'status': task['status'],
+            'submit_time': _parse_time(task.get('submit_time')) or start_time,
+            'start_time': start_time,
+            'end_time': _parse_time(task.get('end_time')),
+            'result': json.dumps(task['result'], ensure_ascii=False) if task.get('result') else None,
+            'error': task.get('error'),
+            'coalesced': task.get('coalesced', 0),
+        }
+        
+        with self.get_session() as session:
+            row = session.execute(
+                select(AnalysisTask).where(AnalysisTask.task_id == task['task_id'])
+            ).scalar_one_or_none()
+            if row is None:
+                session.add(AnalysisTask(task_id=task['task_id'], **values))
+            else:
+                for field_name, value in values.items():
+                    setattr(row, field_name, value)
+            try:
+                session.commit()
+            except IntegrityError:
+                session.rollback()
+    
+    def get_analysis_task(self, task_id: str) -> Optional[Dict[str, Any]]:
+        """按 task_id 查询分析任务"""
+        with self.get_session() as session:
+            row = session.execute(
+                select(AnalysisTask).where(AnalysisTask.task_id == task_id)
+            ).scalar_one_or_none()
+            return row.to_dict() if row else None
+    
+    def list_analysis_tasks(
+        self,
+        limit: int = 20,
+        code: Optional[str] = None,
+        status: Optional[str] = None
+    ) -> List[Dict[str, Any]]:
+        """
+        按提交时间倒序查询分析任务
+        
+        Args:
+            limit: 返回条数
+            code: 股票代码过滤
+            status: 状态过滤
+        """
+        conditions = []
+        if code:
+            conditions.append(AnalysisTask.code == code)
+        if status:
+            conditions.append(AnalysisTask.status == status)
+        
+        query = select(AnalysisTask)
+        if conditions:
+            query = query.where(and_(*conditions))
+        
+        with self.get_session() as session:
+            rows = session.execute(
+                query.order_by(desc(AnalysisTask.submit_time)).limit(limit)
+            ).scalars().all()
+            return [row.to_dict() for row in rows]
+    
+    def purge_expired_search_cache(self) -> int:
+        """
+        清理过期的搜索缓存
+        
+        Returns:
+            删除的记录数
+        """
+        with self.get_session() as session:
+            result = session.execute(
+                delete(SearchCache).where(SearchCache.expires_at <= datetime.now())
+            )
+            session.commit()
+            return result.rowcount or 0
+    
     def _analyze_ma_status(self, data: StockDaily) -> str:
         """
         分析均线形态
@@ -5,11 +5,13 @@ Web 服务模块
 ===================================
 
 分层架构：
-- server.py    - HTTP 服务器核心
+- server.py    - HTTP 服务器核心（线程模式）
+- async_server.py - HTTP 服务器（asyncio 模式，WEBUI_SERVER=asyncio）
 - router.py    - 路由分发
 - handlers.py  - 请求处理器
 - services.py  - 业务服务层
 - templates.py - HTML 模板
+- assets.py    - 静态资源（CSS/JS）、ETag 协商缓存与响应压缩
 
 使用方式：
     from web import run_server_in_thread, WebServer
@@ -0,0 +1,203 @@
+# -*- coding: utf-8 -*-
+"""
+===================================
+Web 静态资源与 HTTP 缓存
+===================================
+
+职责：
+1. 页面共用的 CSS/JS 作为独立静态资源提供（/static/<name>），页面通过带版本号的 URL 引用，
+   浏览器长期缓存，页面本身只传输数据相关的 HTML
+2. ETag / If-None-Match 协商缓存，内容未变化时返回 304
+3. 按 Accept-Encoding 压缩响应（优先 brotli，未安装时使用 gzip）
+
+使用方式：
+    register_asset("base.css", BASE_CSS, "text/css; charset=utf-8")   # 模板模块导入时注册
+    f'<link rel="stylesheet" href="{asset_url("base.css")}">'         # 页面引用
+"""
+
+from __future__ import annotations
+
+import gzip
+import hashlib
+import threading
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, TYPE_CHECKING
+
+try:
+    import brotli
+    BROTLI_AVAILABLE = True
+except ImportError:
+    brotli = None
+    BROTLI_AVAILABLE = False
+
+if TYPE_CHECKING:
+    from web.handlers import Response
+
+# 小于该长度的响应不压缩（压缩收益小于头部开销）
+MIN_COMPRESS_BYTES = 1024
+
+# 可压缩的内容类型前缀
+COMPRESSIBLE_TYPES = ("text/", "application/json", "application/javascript")
+
+# 带版本号的静态资源缓存一年
+IMMUTABLE_CACHE_CONTROL = "public, max-age=31536000, immutable"
+
+# 动态页面每次都向服务器验证（命中 ETag 时返回 304）
+REVALIDATE_CACHE_CONTROL = "no-cache"
+
+
+@dataclass
+class StaticAsset:
+    """静态资源（内容在进程内不变，压缩结果只计算一次）"""
+    name: str
+    body: bytes
+    content_type: str
+    version: str = ""
+    _encoded: Dict[str, bytes] = field(default_factory=dict, repr=False)
+
+    def __post_init__(self):
+        self.version = hashlib.sha1(self.body).hexdigest()[:12]
+
+    @property
+    def path(self) -> str:
+        return f"/static/{self.name}"
+
+    @property
+    def url(self) -> str:
+        return f"{self.path}?v={self.version}"
+
+    @property
+    def etag(self) -> str:
+        return f'W/"{self.version}"'
+
+    def encoded(self, encoding: str) -> bytes:
+        """获取指定编码的资源内容（按需压缩并缓存）"""
+        body = self._encoded.get(encoding)
+        if body is None:
+            body = self._encoded[encoding] = _compress(self.body, encoding)
+        return body
+
+
+_assets: Dict[str, StaticAsset] = {}
+_assets_lock = threading.Lock()
+
+
+def register_asset(name: str, content: str, content_type: str) -> StaticAsset:
+    """注册静态资源（模板模块导入时调用）"""
+    asset = StaticAsset(name=name, body=content.encode("utf-8"), content_type=content_type)
+    with _assets_lock:
+        _assets[name] = asset
+    return asset
+
+
+def asset_url(name: str) -> str:
+    """带版本号的资源 URL（内容变化时 URL 随之变化，浏览器可长期缓存）"""
+    return _assets[name].url
+
+
+def list_assets() -> List[StaticAsset]:
+    """已注册的静态资源"""
+    with _assets_lock:
+        return list(_assets.values())
+
+
+# ============================================================
+# 协商缓存与压缩
+# ============================================================
+
+def make_etag(body: bytes) -> str:
+    """根据响应内容生成 ETag（弱校验，压缩与未压缩的表示共用）"""
+    return f'W/"{hashlib.sha1(body).hexdigest()[:16]}"'
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """If-None-Match 是否命中（按弱比较，忽略 W/ 前缀）"""
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    target = etag[2:] if etag.startswith("W/") else etag
+    for candidate in if_none_match.split(","):
+        candidate = candidate.strip()
+        if candidate.startswith("W/"):
+            candidate = candidate[2:]
+        if candidate == target:
+            return True
+    return False
+
+
+def choose_encoding(accept_encoding: Optional[str]) -> Optional[str]:
+    """根据 Accept-Encoding 选择压缩方式（br > gzip），不支持时返回 None"""
+    if not accept_encoding:
+        return None
+    accepted = set()
+    for item in accept_encoding.lower().split(","):
+        coding, _, params = item.partition(";")
+        params = params.replace(" ", "")
+        if params.startswith("q="):
+            try:
+                if float(params[2:]) <= 0:
+                    continue
+            except ValueError:
+                continue
+        accepted.add(coding.strip())
+    if BROTLI_AVAILABLE and "br" in accepted:
+        return "br"
+    if "gzip" in accepted or "*" in accepted:
+        return "gzip"
+    return None
+
+
+def is_compressible(response: 'Response') -> bool:
+    """响应是否值得压缩"""
+    return (
+        len(response.body) >= MIN_COMPRESS_BYTES
+        and "Content-Encoding" not in response.headers
+        and response.content_type.startswith(COMPRESSIBLE_TYPES)
+    )
+
+
+def compress_response(response: 'Response', encoding: Optional[str]) -> 'Response':
+    """按选定的编码压缩响应体（原地修改并返回）"""
+    if encoding is None or not is_compressible(response):
+        return response
+    response.body = _compress(response.body, encoding)
+    response.headers["Content-Encoding"] = encoding
+    _add_vary(response)
+    return response
+
+
+def _add_vary(response: 'Response') -> None:
+    vary = response.headers.get("Vary")
+    if not vary:
+        response.headers["Vary"] = "Accept-Encoding"
+    elif "accept-encoding" not in vary.lower():
+        response.headers["Vary"] = f"{vary}, Accept-Encoding"
+
+
+def _compress(body: bytes, encoding: str) -> bytes:
+    if encoding == "br":
+        return brotli.compress(body)
+    if encoding == "gzip":
+        # mtime=0：相同内容的压缩结果一致
+        return gzip.compress(body, compresslevel=6, mtime=0)
+    return body
+
+
+def asset_response(asset: StaticAsset, query: Dict[str, list], encoding: Optional[str]) -> 'Response':
+    """静态资源响应（URL 带当前版本号时允许长期缓存）"""
+    from web.handlers import Response
+
+    versioned = query.get("v", [""])[0] == asset.version
+    headers = {
+        "ETag": asset.etag,
+        "Cache-Control": IMMUTABLE_CACHE_CONTROL if versioned else REVALIDATE_CACHE_CONTROL,
+    }
+    if encoding is not None and len(asset.body) >= MIN_COMPRESS_BYTES:
+        headers["Content-Encoding"] = encoding
+        headers["Vary"] = "Accept-Encoding"
+        body = asset.encoded(encoding)
+    else:
+        body = asset.body
+    return Response(body, content_type=asset.content_type, headers=headers)
+
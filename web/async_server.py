@@ -0,0 +1,268 @@
+# -*- coding: utf-8 -*-
+"""
+===================================
+Web 服务器 - asyncio 模式
+===================================
+
+职责：
+1. 单线程事件循环接收连接，支持 HTTP/1.1 Keep-Alive（连接空闲不占用线程）
+2. 路由处理函数（模板渲染、读取数据、Webhook 解析）在有界线程池中执行，并发请求数与连接数解耦
+3. 请求头/请求体大小上限、读取超时，慢连接和超大请求不会拖垮服务
+
+说明：
+- 与线程模式共用同一个 Router（注册 API 不变），通过 WEBUI_SERVER=asyncio 启用
+- 分析任务由 AnalysisService 交给任务调度器执行，处理函数只负责提交，立即返回
+"""
+
+from __future__ import annotations
+
+import asyncio
+import io
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from email.utils import formatdate
+from http import HTTPStatus
+from http.client import parse_headers
+from typing import Dict, Optional, Tuple
+
+from web.handlers import JsonResponse, Response
+from web.router import Router, get_router
+
+logger = logging.getLogger(__name__)
+
+# 请求行 + 请求头的最大字节数
+MAX_HEADER_BYTES = 64 * 1024
+
+
+class _BadRequest(Exception):
+    """无法解析的请求（返回错误响应后关闭连接）"""
+
+    def __init__(self, status: HTTPStatus, message: str):
+        super().__init__(message)
+        self.status = status
+
+
+class AsyncWebServer:
+    """
+    asyncio Web 服务器
+
+    使用方式与 WebServer 相同：
+        server = AsyncWebServer(host="127.0.0.1", port=8000)
+        server.start_background()
+    """
+
+    def __init__(
+        self,
+        host: str = "127.0.0.1",
+        port: int = 8000,
+        router: Optional[Router] = None,
+        handler_threads: int = 8,
+        keepalive_timeout: float = 15.0,
+    ):
+        """
+        Args:
+            host: 监听地址
+            port: 监听端口
+            router: 路由器实例（可选，默认使用全局路由）
+            handler_threads: 执行路由处理函数的线程数
+            keepalive_timeout: 连接空闲超时，也是读取单个请求的超时（秒）
+        """
+        self.host = host
+        self.port = port
+        self.router = router or get_router()
+        self.handler_threads = max(1, handler_threads)
+        self.keepalive_timeout = keepalive_timeout
+
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._server: Optional[asyncio.AbstractServer] = None
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def address(self) -> str:
+        """服务器地址"""
+        return f"http://{self.host}:{self.port}"
+
+    # ========== 启动/停止 ==========
+
+    async def _serve(self, started: Optional[threading.Event] = None) -> None:
+        self._loop = asyncio.get_running_loop()
+        try:
+            self._server = await asyncio.start_server(
+                self._handle_connection, self.host, self.port, limit=MAX_HEADER_BYTES
+            )
+        finally:
+            if started is not None:
+                started.set()
+        self._executor = ThreadPoolExecutor(max_workers=self.handler_threads, thread_name_prefix="webui")
+
+        logger.info(f"WebUI 已启动 (asyncio): {self.address}")
+        print(f"WebUI 已启动: {self.address}")
+        try:
+            async with self._server:
+                await self._server.serve_forever()
+        except asyncio.CancelledError:
+            pass
+        finally:
+            self._executor.shutdown(wait=False)
+            self._server = None
+
+    def run(self) -> None:
+        """前台运行服务器（阻塞），按 Ctrl+C 退出"""
+        routes = self.router.list_routes()
+        if routes:
+            logger.info("已注册路由:")
+            for method, path, desc in routes:
+                logger.info(f"  {method:6} {path:20} - {desc}")
+
+        try:
+            asyncio.run(self._serve())
+        except KeyboardInterrupt:
+            logger.info("收到退出信号，服务器关闭")
+
+    def start_background(self) -> threading.Thread:
+        """
+        后台运行服务器（非阻塞，事件循环运行在独立线程中）
+
+        Returns:
+            服务器线程
+        """
+        started = threading.Event()
+
+        def serve():
+            try:
+                asyncio.run(self._serve(started))
+            except Exception as e:
+                logger.error(f"WebUI 发生错误: {e}")
+                started.set()
+
+        self._thread = threading.Thread(target=serve, name="webui-asyncio", daemon=True)
+        self._thread.start()
+        # 等待端口绑定完成，绑定失败（端口占用等）时错误已写入日志
+        started.wait(timeout=10)
+        return self._thread
+
+    def stop(self) -> None:
+        """停止服务器"""
+        if self._loop is not None and self._server is not None:
+            self._loop.call_soon_threadsafe(self._server.close)
+            logger.info("WebUI 服务已停止")
+
+    def is_running(self) -> bool:
+        """检查服务器是否运行中"""
+        return self._server is not None
+
+    # ========== 连接处理 ==========
+
+    async def _handle_connection(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        try:
+            while True:
+                try:
+                    request = await self._read_request(reader, writer)
+                except _BadRequest as e:
+                    await self._write(writer, JsonResponse({"error": str(e)}, status=e.status), keep_alive=False)
+                    break
+                if request is None:
+                    break
+
+                method, target, headers, body, keep_alive = request
+                if method not in ("GET", "POST"):
+                    response: Response = JsonResponse(
+                        {"error": f"Method {method} not allowed"}, status=HTTPStatus.METHOD_NOT_ALLOWED
+                    )
+                else:
+                    response = await self._loop.run_in_executor(
+                        self._executor, self.router.handle, method, target, headers, body
+                    )
+                await self._write(writer, response, keep_alive)
+                if not keep_alive:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        except asyncio.CancelledError:
+            # 服务器关闭时取消空闲的 Keep-Alive 连接
+            pass
+        except Exception as e:
+            logger.error(f"[AsyncWebServer] 处理连接失败: {e}")
+        finally:
+            writer.close()
+            try:
+                await writer.wait_closed()
+            except Exception:
+                pass
+
+    async def _read_request(
+        self,
+        reader: asyncio.StreamReader,
+        writer: asyncio.StreamWriter
+    ) -> Optional[Tuple[str, str, Dict[str, str], bytes, bool]]:
+        """
+        读取一个请求
+
+        Returns:
+            (method, target, headers, body, keep_alive)，连接关闭或空闲超时返回 None
+        """
+        try:
+            head = await asyncio.wait_for(reader.readuntil(b"\r\n\r\n"), timeout=self.keepalive_timeout)
+        except asyncio.TimeoutError:
+            return None
+        except asyncio.IncompleteReadError as e:
+            if e.partial.strip():
+                raise _BadRequest(HTTPStatus.BAD_REQUEST, "Incomplete request")
+            return None
+        except asyncio.LimitOverrunError:
+            raise _BadRequest(HTTPStatus.REQUEST_HEADER_FIELDS_TOO_LARGE, "Request header too large")
+
+        request_line, _, header_bytes = head.partition(b"\r\n")
+        try:
+            method, target, version = request_line.decode("latin-1").split()
+        except ValueError:
+            raise _BadRequest(HTTPStatus.BAD_REQUEST, "Malformed request line")
+        message = parse_headers(io.BytesIO(header_bytes))
+        headers = {key: value for key, value in message.items()}
+
+        connection = (message.get("Connection") or "").lower()
+        if version == "HTTP/1.1":
+            keep_alive = connection != "close"
+        else:
+            keep_alive = connection == "keep-alive"
+
+        if (message.get("Transfer-Encoding") or "").lower() == "chunked":
+            raise _BadRequest(HTTPStatus.LENGTH_REQUIRED, "Chunked request body is not supported")
+        try:
+            content_length = int(message.get("Content-Length") or 0)
+        except ValueError:
+            raise _BadRequest(HTTPStatus.BAD_REQUEST, "Invalid Content-Length")
+        if content_length > self.router.max_body_bytes:
+            raise _BadRequest(
+                HTTPStatus.REQUEST_ENTITY_TOO_LARGE,
+                f"Request body too large (limit {self.router.max_body_bytes} bytes)"
+            )
+
+        body = b""
+        if content_length > 0:
+            if (message.get("Expect") or "").lower() == "100-continue":
+                writer.write(b"HTTP/1.1 100 Continue\r\n\r\n")
+                await writer.drain()
+            try:
+                body = await asyncio.wait_for(reader.readexactly(content_length), timeout=self.keepalive_timeout)
+            except asyncio.TimeoutError:
+                raise _BadRequest(HTTPStatus.REQUEST_TIMEOUT, "Timed out reading request body")
+
+        return method.upper(), target, headers, body, keep_alive
+
+    @staticmethod
+    async def _write(writer: asyncio.StreamWriter, response: Response, keep_alive: bool) -> None:
+        status = HTTPStatus(response.status)
+        head = (
+            f"HTTP/1.1 {status.value} {status.phrase}\r\n"
+            f"Date: {formatdate(usegmt=True)}\r\n"
+            f"Content-Type: {response.content_type}\r\n"
+            f"Content-Length: {len(response.body)}\r\n"
+            f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n"
+            + "".join(f"{key}: {value}\r\n" for key, value in response.headers.items())
+            + "\r\n"
+        )
+        writer.write(head.encode("latin-1") + response.body)
+        await writer.drain()
@@ -21,11 +21,12 @@ import re
 import logging
 from http import HTTPStatus
 from datetime import datetime
-from typing import Dict, Any, TYPE_CHECKING
+from typing import Dict, Any, Optional, TYPE_CHECKING
 
 from web.services import get_config_service, get_analysis_service
 from web.templates import render_config_page
 from src.enums import ReportType
+from src.job_scheduler import get_job_scheduler
 
 if TYPE_CHECKING:
     from http.server import BaseHTTPRequestHandler
@@ -44,17 +45,21 @@ class Response:
         self,
         body: bytes,
         status: HTTPStatus = HTTPStatus.OK,
-        content_type: str = "text/html; charset=utf-8"
+        content_type: str = "text/html; charset=utf-8",
+        headers: Optional[Dict[str, str]] = None
     ):
         self.body = body
         self.status = status
         self.content_type = content_type
+        self.headers: Dict[str, str] = dict(headers or {})  # 额外响应头（ETag、Cache-Control 等）
     
     def send(self, handler: 'BaseHTTPRequestHandler') -> None:
         """发送响应到客户端"""
         handler.send_response(self.status)
         handler.send_header("Content-Type", self.content_type)
         handler.send_header("Content-Length", str(len(self.body)))
+        for key, value in self.headers.items():
+            handler.send_header(key, value)
         handler.end_headers()
         handler.wfile.write(self.body)
 
@@ -139,13 +144,15 @@ class ApiHandler:
             {
                 "status": "ok",
                 "timestamp": "2026-01-19T10:30:00",
-                "service": "stock-analysis-webui"
+                "service": "stock-analysis-webui",
+                "jobs": {"running": 1, "queued": 0, "wait_seconds": {...}, ...}
             }
         """
         data = {
             "status": "ok",
             "timestamp": datetime.now().isoformat(),
-            "service": "stock-analysis-webui"
+            "service": "stock-analysis-webui",
+            "jobs": get_job_scheduler().stats()
         }
         return JsonResponse(data)
     
@@ -193,6 +200,9 @@ class ApiHandler:
         # 提交异步分析任务
         try:
             result = self.analysis_service.submit_analysis(code, report_type=report_type)
+            if not result.get("success"):
+                # 任务调度器准入控制拒绝（队列已满）
+                return JsonResponse(result, status=HTTPStatus.SERVICE_UNAVAILABLE)
             return JsonResponse(result)
         except Exception as e:
             logger.error(f"[ApiHandler] 提交分析任务失败: {e}")
@@ -206,7 +216,7 @@ class ApiHandler:
         查询任务列表 GET /tasks
         
         Args:
-            query: URL 查询参数 (可选 limit)
+            query: URL 查询参数 (可选 limit、code、status)
             
         返回:
             {
@@ -220,7 +230,9 @@ class ApiHandler:
         except ValueError:
             limit = 20
         
-        tasks = self.analysis_service.list_tasks(limit=limit)
+        code = (query.get("code", [""])[0] or "").strip() or None
+        status = (query.get("status", [""])[0] or "").strip() or None
+        tasks = self.analysis_service.list_tasks(limit=limit, code=code, status=status)
         return JsonResponse({"success": True, "tasks": tasks})
     
     def handle_task_status(self, query: Dict[str, list]) -> Response:
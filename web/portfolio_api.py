@@ -9,33 +9,118 @@
 2. 交易记录
 3. AI 准确度分析
 4. 收益统计
+
+性能：
+- JSON 文件按 (mtime, size) 校验缓存解析结果，文件未变化时不重复读取
+- 交易统计、快照日期排序、准确度记录与按月统计随文件追加增量维护，
+  页面访问的开销只与持仓数相关，不随交易/快照历史增长
 """
 
+import hashlib
 import json
 import logging
-from datetime import datetime, timedelta
+import threading
+from collections import deque
+from dataclasses import dataclass, field
+from datetime import datetime
 from pathlib import Path
-from typing import Dict, List, Any, Optional
+from typing import Deque, Dict, List, Any, Optional, Tuple
 
 logger = logging.getLogger(__name__)
 
+# 准确度页面展示的最近记录数
+ACCURACY_RECORD_LIMIT = 30
+
+
+@dataclass
+class _CachedFile:
+    """已解析的 JSON 文件"""
+    stamp: Tuple[int, int]  # (mtime_ns, size)
+    data: Dict
+    derived: Dict[str, Any] = field(default_factory=dict)  # 随文件版本缓存的派生数据
+
+
+@dataclass
+class _TradeStats:
+    """交易统计（trades.json 只追加，新增部分增量计数）"""
+    count: int = 0
+    last: Optional[Dict] = None
+    buy: int = 0
+    sell: int = 0
+
+
+@dataclass
+class _AccuracyStats:
+    """
+    AI 准确度统计
+
+    最新一天的快照当天可能被多次覆盖，只有之前的日期是稳定的：
+    以稳定日期结尾的记录累加到统计中，涉及最新一天的记录每次单独计算。
+    """
+    dates: List[str] = field(default_factory=list)  # 已处理的稳定日期
+    records: Deque[Dict] = field(default_factory=lambda: deque(maxlen=ACCURACY_RECORD_LIMIT))
+    monthly: Dict[str, List[int]] = field(default_factory=dict)  # 月份 -> [total, correct]
+    total: int = 0
+    correct: int = 0
+
 
 class PortfolioAPI:
     """模拟盘 API 服务"""
     
     def __init__(self, data_dir: str = "./data"):
         self.data_dir = Path(data_dir)
+        self._lock = threading.RLock()
+        self._files: Dict[str, _CachedFile] = {}
+        self._trade_stats = _TradeStats()
+        self._accuracy = _AccuracyStats()
     
-    def _load_json(self, filename: str) -> Dict:
-        """加载 JSON 文件"""
+    def _load_file(self, filename: str) -> Optional[_CachedFile]:
+        """加载 JSON 文件（文件 mtime/size 未变化时直接返回缓存）"""
         filepath = self.data_dir / filename
-        if filepath.exists():
+        try:
+            stat = filepath.stat()
+        except OSError:
+            with self._lock:
+                self._files.pop(filename, None)
+            return None
+        stamp = (stat.st_mtime_ns, stat.st_size)
+        
+        with self._lock:
+            cached = self._files.get(filename)
+            if cached is not None and cached.stamp == stamp:
+                return cached
+        
+        try:
+            with open(filepath, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+        except Exception as e:
+            logger.error(f"加载 {filename} 失败: {e}")
+            return None
+        
+        cached = _CachedFile(stamp=stamp, data=data if isinstance(data, dict) else {})
+        with self._lock:
+            self._files[filename] = cached
+        return cached
+    
+    def _load_json(self, filename: str) -> Dict:
+        """加载 JSON 文件（返回缓存对象，调用方不要修改）"""
+        cached = self._load_file(filename)
+        return cached.data if cached is not None else {}
+    
+    def data_version(self) -> str:
+        """
+        数据版本（各数据文件的 mtime/size + 当天日期）
+        
+        只读取文件元数据，用作页面 ETag：版本未变化时页面内容不变。
+        """
+        parts = [datetime.now().strftime('%Y-%m-%d')]
+        for filename in ("portfolio.json", "daily_snapshots.json", "trades.json"):
             try:
-                with open(filepath, 'r', encoding='utf-8') as f:
-                    return json.load(f)
-            except Exception as e:
-                logger.error(f"加载 {filename} 失败: {e}")
-        return {}
+                stat = (self.data_dir / filename).stat()
+                parts.append(f"{stat.st_mtime_ns:x}.{stat.st_size:x}")
+            except OSError:
+                parts.append("-")
+        return hashlib.sha1("|".join(parts).encode("utf-8")).hexdigest()[:16]
     
     def get_portfolio(self) -> Dict[str, Any]:
         """获取当前持仓"""
@@ -51,11 +136,40 @@ class PortfolioAPI:
         data = self._load_json("daily_snapshots.json")
         return data.get("snapshots", {})
     
+    def _get_sorted_snapshots(self) -> Tuple[Dict[str, Dict], List[str]]:
+        """获取每日快照及升序日期列表（日期排序随文件版本缓存）"""
+        cached = self._load_file("daily_snapshots.json")
+        if cached is None:
+            return {}, []
+        snapshots = cached.data.get("snapshots", {})
+        with self._lock:
+            dates = cached.derived.get("sorted_dates")
+            if dates is None:
+                dates = cached.derived["sorted_dates"] = sorted(snapshots.keys())
+        return snapshots, dates
+    
+    def _get_trade_stats(self) -> Dict[str, int]:
+        """交易统计（只处理上次统计之后追加的交易）"""
+        trades = self.get_trades()
+        with self._lock:
+            stats = self._trade_stats
+            if stats.count > len(trades) or (stats.count and trades[stats.count - 1] != stats.last):
+                # 文件被改写（非追加），重新统计
+                stats = self._trade_stats = _TradeStats()
+            for trade in trades[stats.count:]:
+                action = trade.get("action")
+                if action in ("buy", "add"):
+                    stats.buy += 1
+                elif action in ("sell", "reduce"):
+                    stats.sell += 1
+            stats.count = len(trades)
+            stats.last = trades[-1] if trades else None
+            return {"total": stats.count, "buy": stats.buy, "sell": stats.sell}
+    
     def get_dashboard_data(self) -> Dict[str, Any]:
         """获取仪表盘数据"""
         portfolio = self.get_portfolio()
-        snapshots = self.get_snapshots()
-        trades = self.get_trades()
+        snapshots, sorted_dates = self._get_sorted_snapshots()
         
         # 计算基础数据
         positions = portfolio.get("positions", {})
@@ -103,9 +217,8 @@ class PortfolioAPI:
         daily_return_pct = today_snapshot.get("daily_return_pct", 0)
         
         # 获取最近7天收益趋势
-        sorted_dates = sorted(snapshots.keys(), reverse=True)[:7]
         daily_returns = []
-        for date in reversed(sorted_dates):
+        for date in sorted_dates[-7:]:
             snap = snapshots[date]
             daily_returns.append({
                 "date": date,
@@ -115,9 +228,7 @@ class PortfolioAPI:
             })
         
         # 统计交易数据
-        total_trades = len(trades)
-        buy_trades = len([t for t in trades if t.get("action") in ["buy", "add"]])
-        sell_trades = len([t for t in trades if t.get("action") in ["sell", "reduce"]])
+        trade_stats = self._get_trade_stats()
         
         return {
             "summary": {
@@ -134,11 +245,7 @@ class PortfolioAPI:
             },
             "positions": position_list,
             "daily_returns": daily_returns,
-            "trade_stats": {
-                "total": total_trades,
-                "buy": buy_trades,
-                "sell": sell_trades,
-            },
+            "trade_stats": trade_stats,
             "risk_params": {
                 "stop_loss_pct": portfolio.get("stop_loss_pct", 8),
                 "take_profit_pct": portfolio.get("take_profit_pct", 20),
@@ -157,73 +264,55 @@ class PortfolioAPI:
         3. 如果建议买入/加仓且第二天涨了，算准确
         4. 如果建议卖出/减仓且第二天跌了，算准确
         """
-        reports_dir = Path("./reports")
-        snapshots = self.get_snapshots()
-        
-        # 分析结果
-        accuracy_records = []
-        total_predictions = 0
-        correct_predictions = 0
+        snapshots, sorted_dates = self._get_sorted_snapshots()
         
-        # 按日期排序快照
-        sorted_dates = sorted(snapshots.keys())
-        
-        for i, date in enumerate(sorted_dates[:-1]):  # 排除最后一天（没有第二天数据）
-            current_snap = snapshots[date]
-            next_date = sorted_dates[i + 1]
-            next_snap = snapshots[next_date]
+        with self._lock:
+            stats = self._accuracy
+            # 稳定日期：除最新一天以外的日期
+            settled = sorted_dates[:-1]
+            if stats.dates != settled[:len(stats.dates)]:
+                # 历史快照被改写，重新统计
+                stats = self._accuracy = _AccuracyStats()
             
-            # 计算第二天的涨跌
-            current_assets = current_snap.get("total_assets", 0)
-            next_assets = next_snap.get("total_assets", 0)
+            for i in range(max(1, len(stats.dates)), len(settled)):
+                record = self._accuracy_record(snapshots, settled[i - 1], settled[i])
+                if record:
+                    stats.records.append(record)
+                    bucket = stats.monthly.setdefault(record["date"][:7], [0, 0])
+                    bucket[0] += 1
+                    stats.total += 1
+                    if record["is_correct"]:
+                        bucket[1] += 1
+                        stats.correct += 1
+            stats.dates = settled
             
-            if current_assets > 0:
-                next_day_return = (next_assets - current_assets) / current_assets * 100
-                is_up = next_day_return > 0
-                
-                # 简化逻辑：假设每天都有 AI 建议
-                # 实际应该从报告中读取，这里用持仓变化推断
-                positions_today = current_snap.get("positions_snapshot", {})
-                positions_next = next_snap.get("positions_snapshot", {})
-                
-                # 检查是否有持仓（有持仓说明 AI 建议持有/买入）
-                had_position = len(positions_today) > 0
-                
-                if had_position:
-                    total_predictions += 1
-                    # 持有时，涨了算准确
-                    is_correct = is_up
-                    if is_correct:
-                        correct_predictions += 1
-                    
-                    accuracy_records.append({
-                        "date": date,
-                        "next_date": next_date,
-                        "prediction": "持有" if had_position else "空仓",
-                        "next_day_return": next_day_return,
-                        "is_correct": is_correct,
-                        "total_assets": current_assets,
-                    })
+            records = list(stats.records)
+            monthly_stats = {month: list(bucket) for month, bucket in stats.monthly.items()}
+            total_predictions = stats.total
+            correct_predictions = stats.correct
+        
+        # 涉及最新一天的记录单独计算
+        if len(sorted_dates) >= 2:
+            record = self._accuracy_record(snapshots, sorted_dates[-2], sorted_dates[-1])
+            if record:
+                records = (records + [record])[-ACCURACY_RECORD_LIMIT:]
+                bucket = monthly_stats.setdefault(record["date"][:7], [0, 0])
+                bucket[0] += 1
+                total_predictions += 1
+                if record["is_correct"]:
+                    bucket[1] += 1
+                    correct_predictions += 1
         
         accuracy_rate = (correct_predictions / total_predictions * 100) if total_predictions > 0 else 0
         
         # 按月统计
-        monthly_stats = {}
-        for record in accuracy_records:
-            month = record["date"][:7]  # YYYY-MM
-            if month not in monthly_stats:
-                monthly_stats[month] = {"total": 0, "correct": 0}
-            monthly_stats[month]["total"] += 1
-            if record["is_correct"]:
-                monthly_stats[month]["correct"] += 1
-        
         monthly_accuracy = []
-        for month, stats in sorted(monthly_stats.items()):
-            rate = (stats["correct"] / stats["total"] * 100) if stats["total"] > 0 else 0
+        for month, (total, correct) in sorted(monthly_stats.items()):
+            rate = (correct / total * 100) if total > 0 else 0
             monthly_accuracy.append({
                 "month": month,
-                "total": stats["total"],
-                "correct": stats["correct"],
+                "total": total,
+                "correct": correct,
                 "accuracy": rate,
             })
         
@@ -233,10 +322,44 @@ class PortfolioAPI:
                 "correct_predictions": correct_predictions,
                 "accuracy_rate": accuracy_rate,
             },
-            "records": accuracy_records[-30:],  # 最近30条
+            "records": records,  # 最近30条
             "monthly_accuracy": monthly_accuracy,
         }
     
+    @staticmethod
+    def _accuracy_record(snapshots: Dict[str, Dict], date: str, next_date: str) -> Optional[Dict[str, Any]]:
+        """根据相邻两天的快照生成一条准确度记录（当天无持仓时返回 None）"""
+        current_snap = snapshots[date]
+        next_snap = snapshots[next_date]
+        
+        # 计算第二天的涨跌
+        current_assets = current_snap.get("total_assets", 0)
+        next_assets = next_snap.get("total_assets", 0)
+        if current_assets <= 0:
+            return None
+        
+        next_day_return = (next_assets - current_assets) / current_assets * 100
+        is_up = next_day_return > 0
+        
+        # 简化逻辑：假设每天都有 AI 建议
+        # 实际应该从报告中读取，这里用持仓变化推断
+        positions_today = current_snap.get("positions_snapshot", {})
+        
+        # 检查是否有持仓（有持仓说明 AI 建议持有/买入）
+        had_position = len(positions_today) > 0
+        if not had_position:
+            return None
+        
+        # 持有时，涨了算准确
+        return {
+            "date": date,
+            "next_date": next_date,
+            "prediction": "持有",
+            "next_day_return": next_day_return,
+            "is_correct": is_up,
+            "total_assets": current_assets,
+        }
+    
     def get_trade_history(self, limit: int = 50) -> List[Dict]:
         """获取交易历史"""
         trades = self.get_trades()
@@ -8,8 +8,12 @@
 1. 仪表盘页面
 2. 交易记录页面
 3. AI 准确度分析页面
+
+样式与脚本注册为静态资源，页面只包含数据相关的 HTML。
 """
 
+from web.assets import asset_url, register_asset
+
 PORTFOLIO_CSS = """
 :root {
     --primary: #3b82f6;
@@ -323,6 +327,10 @@ setInterval(refreshData, 60000);
 """
 
 
+register_asset("portfolio.css", PORTFOLIO_CSS, "text/css; charset=utf-8")
+register_asset("portfolio.js", PORTFOLIO_JS, "application/javascript; charset=utf-8")
+
+
 def render_portfolio_dashboard(data: dict) -> str:
     """渲染仪表盘页面"""
     summary = data.get("summary", {})
@@ -376,7 +384,7 @@ def render_portfolio_dashboard(data: dict) -> str:
     <meta charset="UTF-8">
     <meta name="viewport" content="width=device-width, initial-scale=1.0">
     <title>模拟盘仪表盘</title>
-    <style>{PORTFOLIO_CSS}</style>
+    <link rel="stylesheet" href="{asset_url('portfolio.css')}">
 </head>
 <body>
     <nav class="navbar">
@@ -498,7 +506,7 @@ def render_portfolio_dashboard(data: dict) -> str:
         </div>
     </div>
     
-    <script>{PORTFOLIO_JS}</script>
+    <script src="{asset_url('portfolio.js')}"></script>
 </body>
 </html>
 """
@@ -535,7 +543,7 @@ def render_trades_page(trades: list) -> str:
     <meta charset="UTF-8">
     <meta name="viewport" content="width=device-width, initial-scale=1.0">
     <title>交易记录</title>
-    <style>{PORTFOLIO_CSS}</style>
+    <link rel="stylesheet" href="{asset_url('portfolio.css')}">
 </head>
 <body>
     <nav class="navbar">
@@ -630,7 +638,7 @@ def render_accuracy_page(data: dict) -> str:
     <meta charset="UTF-8">
     <meta name="viewport" content="width=device-width, initial-scale=1.0">
     <title>AI 准确度分析</title>
-    <style>{PORTFOLIO_CSS}</style>
+    <link rel="stylesheet" href="{asset_url('portfolio.css')}">
 </head>
 <body>
     <nav class="navbar">
@@ -8,11 +8,13 @@ Web 路由层 - 请求分发
 1. 解析请求路径
 2. 分发到对应的处理器
 3. 支持路由注册和扩展
+4. 静态资源、ETag 协商缓存（304）与响应压缩
 """
 
 from __future__ import annotations
 
 import logging
+import time
 from http import HTTPStatus
 from typing import Callable, Dict, List, Optional, TYPE_CHECKING, Tuple
 from urllib.parse import parse_qs, urlparse
@@ -22,6 +24,10 @@ from web.handlers import (
     get_page_handler, get_api_handler, get_bot_handler
 )
 from web.templates import render_error_page
+from web.assets import (
+    REVALIDATE_CACHE_CONTROL, asset_response, choose_encoding, compress_response,
+    etag_matches, list_assets, make_etag, StaticAsset,
+)
 
 if TYPE_CHECKING:
     from http.server import BaseHTTPRequestHandler
@@ -36,6 +42,21 @@ logger = logging.getLogger(__name__)
 # 路由处理函数类型: (query_params) -> Response
 RouteHandler = Callable[[Dict[str, list]], Response]
 
+# 数据版本函数类型: () -> str（版本未变化时页面内容不变，可直接返回 304）
+VersionFunc = Callable[[], str]
+
+
+def _get_header(headers: Dict[str, str], name: str) -> Optional[str]:
+    """按名称读取请求头（不区分大小写）"""
+    value = headers.get(name)
+    if value is not None:
+        return value
+    name = name.lower()
+    for key, value in headers.items():
+        if key.lower() == name:
+            return value
+    return None
+
 
 class Route:
     """路由定义"""
@@ -45,12 +66,14 @@ class Route:
         path: str,
         method: str,
         handler: RouteHandler,
-        description: str = ""
+        description: str = "",
+        version: Optional[VersionFunc] = None
     ):
         self.path = path
         self.method = method.upper()
         self.handler = handler
         self.description = description
+        self.version = version
 
 
 class Router:
@@ -63,15 +86,24 @@ class Router:
     3. 分发到处理器
     """
     
-    def __init__(self):
+    def __init__(self, max_body_bytes: int = 1024 * 1024):
+        """
+        Args:
+            max_body_bytes: POST 请求体上限（字节）
+        """
         self._routes: Dict[str, Dict[str, Route]] = {}  # {path: {method: Route}}
+        self.max_body_bytes = max_body_bytes
+        # 进程启动标识：拼入数据版本 ETag，重启（模板可能变化）后旧缓存失效
+        self._boot_id = format(time.time_ns() & 0xFFFFFFFF, "x")
+        self._assets: Dict[str, StaticAsset] = {}  # {path: StaticAsset}
     
     def register(
         self,
         path: str,
         method: str,
         handler: RouteHandler,
-        description: str = ""
+        description: str = "",
+        version: Optional[VersionFunc] = None
     ) -> None:
         """
         注册路由
@@ -81,12 +113,13 @@ class Router:
             method: HTTP 方法 (GET, POST, etc.)
             handler: 处理函数
             description: 路由描述
+            version: 数据版本函数（可选，GET 路由使用；版本未变化时不调用处理函数，直接返回 304）
         """
         method = method.upper()
         if path not in self._routes:
             self._routes[path] = {}
         
-        self._routes[path][method] = Route(path, method, handler, description)
+        self._routes[path][method] = Route(path, method, handler, description, version)
         logger.debug(f"[Router] 注册路由: {method} {path}")
     
     def get(self, path: str, description: str = "") -> Callable:
@@ -122,43 +155,95 @@ class Router:
         
         return routes_for_path.get(method)
     
-    def dispatch(
+    def handle(
         self,
-        request_handler: 'BaseHTTPRequestHandler',
-        method: str
-    ) -> None:
+        method: str,
+        target: str,
+        headers: Dict[str, str],
+        body: bytes = b""
+    ) -> Response:
         """
-        分发请求
+        处理请求并返回响应（与传输层无关，线程模式和 asyncio 模式共用）
         
         Args:
-            request_handler: HTTP 请求处理器
             method: HTTP 方法
+            target: 请求路径（含查询字符串）
+            headers: 请求头
+            body: 原始请求体字节
+            
+        Returns:
+            Response 对象
         """
-        # 解析 URL
-        parsed = urlparse(request_handler.path)
-        path = parsed.path
-        query = parse_qs(parsed.query)
+        method = method.upper()
+        parsed = urlparse(target)
+        path = parsed.path or "/"
+        encoding = choose_encoding(_get_header(headers, "Accept-Encoding"))
+        if_none_match = _get_header(headers, "If-None-Match")
         
-        # 处理根路径
-        if path == "":
-            path = "/"
+        if method == "POST":
+            # Bot Webhook 需要原始 body 和 headers，与普通路由处理不同
+            if path.startswith("/bot/"):
+                return self._handle_bot_webhook(path, headers, body)
+            # 普通 POST 请求：解析表单
+            params = parse_qs(body.decode("utf-8", errors="replace"))
+        else:
+            params = parse_qs(parsed.query)
+            # 静态资源：预压缩，带版本号时长期缓存
+            asset = self._assets.get(path)
+            if asset is not None:
+                response = asset_response(asset, params, encoding)
+                if etag_matches(if_none_match, asset.etag):
+                    return self._not_modified_response(asset.etag, response.headers["Cache-Control"])
+                return response
         
         # 匹配路由
         route = self.match(path, method)
         
         if route is None:
             # 404 Not Found
-            self._send_not_found(request_handler, path)
-            return
+            return compress_response(self._not_found_response(path), encoding)
+        
+        # 数据版本未变化：不渲染页面，直接返回 304
+        etag = None
+        if method == "GET" and route.version is not None:
+            try:
+                etag = f'W/"{route.version()}-{self._boot_id}"'
+            except Exception as e:
+                logger.warning(f"[Router] 计算数据版本失败: {path} - {e}")
+            if etag and etag_matches(if_none_match, etag):
+                return self._not_modified_response(etag)
         
         try:
             # 调用处理器
-            response = route.handler(query)
-            response.send(request_handler)
-            
+            response = route.handler(params)
         except Exception as e:
             logger.error(f"[Router] 处理请求失败: {method} {path} - {e}")
-            self._send_error(request_handler, str(e))
+            return compress_response(self._error_response(str(e)), encoding)
+        
+        if method == "GET" and response.status == HTTPStatus.OK:
+            # 协商缓存：未指定数据版本时按内容生成 ETag
+            etag = response.headers.setdefault("ETag", etag or make_etag(response.body))
+            response.headers.setdefault("Cache-Control", REVALIDATE_CACHE_CONTROL)
+            if etag_matches(if_none_match, etag):
+                return self._not_modified_response(etag)
+        
+        return compress_response(response, encoding)
+    
+    def dispatch(
+        self,
+        request_handler: 'BaseHTTPRequestHandler',
+        method: str
+    ) -> None:
+        """
+        分发请求（ThreadingHTTPServer 模式）
+        
+        Args:
+            request_handler: HTTP 请求处理器
+            method: HTTP 方法
+        """
+        headers = {key: value for key, value in request_handler.headers.items()}
+        response = self.handle(method, request_handler.path, headers)
+        response.send(request_handler)
     
     def dispatch_post(
         self,
@@ -170,73 +255,46 @@ class Router:
         Args:
             request_handler: HTTP 请求处理器
         """
-        parsed = urlparse(request_handler.path)
-        path = parsed.path
-        
-        # 读取 POST body（保留原始字节用于 Bot Webhook）
         content_length = int(request_handler.headers.get("Content-Length", "0") or "0")
-        raw_body_bytes = request_handler.rfile.read(content_length)
-        raw_body = raw_body_bytes.decode("utf-8", errors="replace")
-        
-        # 检查是否是 Bot Webhook 路由
-        if path.startswith("/bot/"):
-            self._dispatch_bot_webhook(request_handler, path, raw_body_bytes)
+        if content_length > self.max_body_bytes:
+            logger.warning(f"[Router] 请求体过大: {content_length} 字节，上限 {self.max_body_bytes}")
+            request_handler.close_connection = True
+            self.body_too_large_response().send(request_handler)
             return
         
-        # 普通 POST 请求
-        form_data = parse_qs(raw_body)
-        
-        # 匹配路由
-        route = self.match(path, "POST")
-        
-        if route is None:
-            self._send_not_found(request_handler, path)
-            return
-        
-        try:
-            # 调用处理器（传入 form_data）
-            response = route.handler(form_data)
-            response.send(request_handler)
-            
-        except Exception as e:
-            logger.error(f"[Router] 处理 POST 请求失败: {path} - {e}")
-            self._send_error(request_handler, str(e))
+        # 读取 POST body（保留原始字节用于 Bot Webhook）
+        body = request_handler.rfile.read(content_length)
+        headers = {key: value for key, value in request_handler.headers.items()}
+        response = self.handle("POST", request_handler.path, headers, body)
+        response.send(request_handler)
     
-    def _dispatch_bot_webhook(
+    def _handle_bot_webhook(
         self,
-        request_handler: 'BaseHTTPRequestHandler',
         path: str,
+        headers: Dict[str, str],
         body: bytes
-    ) -> None:
+    ) -> Response:
         """
-        分发 Bot Webhook 请求
-        
-        Bot Webhook 需要原始 body 和 headers，与普通路由处理不同。
+        处理 Bot Webhook 请求
         
         Args:
-            request_handler: HTTP 请求处理器
             path: 请求路径
+            headers: 请求头
             body: 原始请求体字节
         """
         # 提取平台名称：/bot/feishu -> feishu
         parts = path.strip('/').split('/')
         if len(parts) < 2:
-            self._send_not_found(request_handler, path)
-            return
+            return self._not_found_response(path)
         
         platform = parts[1]
         
-        # 获取请求头
-        headers = {key: value for key, value in request_handler.headers.items()}
-        
         try:
             bot_handler = get_bot_handler()
-            response = bot_handler.handle_webhook(platform, {}, headers, body)
-            response.send(request_handler)
-            
+            return bot_handler.handle_webhook(platform, {}, headers, body)
         except Exception as e:
             logger.error(f"[Router] 处理 Bot Webhook 失败: {path} - {e}")
-            self._send_error(request_handler, str(e))
+            return self._error_response(str(e))
     
     def list_routes(self) -> List[Tuple[str, str, str]]:
         """
@@ -251,25 +309,36 @@ class Router:
                 routes.append((method, path, route.description))
         return sorted(routes, key=lambda x: (x[1], x[0]))
     
-    def _send_not_found(
-        self,
-        request_handler: 'BaseHTTPRequestHandler',
-        path: str
-    ) -> None:
-        """发送 404 响应"""
+    def _not_modified_response(self, etag: str, cache_control: str = REVALIDATE_CACHE_CONTROL) -> Response:
+        """304 响应（客户端缓存仍然有效）"""
+        return Response(
+            b"",
+            status=HTTPStatus.NOT_MODIFIED,
+            headers={"ETag": etag, "Cache-Control": cache_control}
+        )
+    
+    def register_static_assets(self) -> None:
+        """挂载已注册的静态资源（模板模块中的 CSS/JS）"""
+        for asset in list_assets():
+            self._assets[asset.path] = asset
+            logger.debug(f"[Router] 注册静态资源: {asset.url}")
+    
+    def _not_found_response(self, path: str) -> Response:
+        """404 响应"""
         body = render_error_page(404, "页面未找到", f"路径 {path} 不存在")
-        response = HtmlResponse(body, status=HTTPStatus.NOT_FOUND)
-        response.send(request_handler)
+        return HtmlResponse(body, status=HTTPStatus.NOT_FOUND)
     
-    def _send_error(
-        self,
-        request_handler: 'BaseHTTPRequestHandler',
-        message: str
-    ) -> None:
-        """发送 500 响应"""
+    def _error_response(self, message: str) -> Response:
+        """500 响应"""
         body = render_error_page(500, "服务器内部错误", message)
-        response = HtmlResponse(body, status=HTTPStatus.INTERNAL_SERVER_ERROR)
-        response.send(request_handler)
+        return HtmlResponse(body, status=HTTPStatus.INTERNAL_SERVER_ERROR)
+    
+    def body_too_large_response(self) -> Response:
+        """413 响应（请求体超过上限）"""
+        return JsonResponse(
+            {"error": f"Request body too large (limit {self.max_body_bytes} bytes)"},
+            status=HTTPStatus.REQUEST_ENTITY_TOO_LARGE
+        )
 
 
 # ============================================================
@@ -278,7 +347,8 @@ class Router:
 
 def create_default_router() -> Router:
     """创建并配置默认路由"""
-    router = Router()
+    from src.config import get_config
+    router = Router(max_body_bytes=get_config().webui_max_body_bytes)
     
     # 获取处理器
     page_handler = get_page_handler()
@@ -331,37 +401,43 @@ def create_default_router() -> Router:
     router.register(
         "/portfolio", "GET",
         lambda q: HtmlResponse(render_portfolio_dashboard(portfolio_api.get_dashboard_data()).encode('utf-8')),
-        "模拟盘仪表盘"
+        "模拟盘仪表盘",
+        version=portfolio_api.data_version
     )
     
     router.register(
         "/portfolio/trades", "GET",
         lambda q: HtmlResponse(render_trades_page(portfolio_api.get_trade_history()).encode('utf-8')),
-        "交易记录"
+        "交易记录",
+        version=portfolio_api.data_version
     )
     
     router.register(
         "/portfolio/accuracy", "GET",
         lambda q: HtmlResponse(render_accuracy_page(portfolio_api.get_ai_accuracy()).encode('utf-8')),
-        "AI准确度分析"
+        "AI准确度分析",
+        version=portfolio_api.data_version
     )
     
     router.register(
         "/api/portfolio/dashboard", "GET",
         lambda q: JsonResponse(portfolio_api.get_dashboard_data()),
-        "模拟盘仪表盘API"
+        "模拟盘仪表盘API",
+        version=portfolio_api.data_version
     )
     
     router.register(
         "/api/portfolio/trades", "GET",
         lambda q: JsonResponse({"trades": portfolio_api.get_trade_history()}),
-        "交易记录API"
+        "交易记录API",
+        version=portfolio_api.data_version
     )
     
     router.register(
         "/api/portfolio/accuracy", "GET",
         lambda q: JsonResponse(portfolio_api.get_ai_accuracy()),
-        "AI准确度API"
+        "AI准确度API",
+        version=portfolio_api.data_version
     )
     
     # === Bot Webhook 路由 ===
@@ -397,6 +473,9 @@ def create_default_router() -> Router:
     #     "Telegram 机器人 Webhook"
     # )
     
+    # === 静态资源（页面 CSS/JS）===
+    router.register_static_assets()
+    
     return router
 
 
@@ -8,6 +8,7 @@ Web 服务器核心
 1. 启动 HTTP 服务器
 2. 处理请求分发
 3. 提供后台运行接口
+4. 按配置选择线程模式（本文件）或 asyncio 模式（async_server.py）
 """
 
 from __future__ import annotations
@@ -15,10 +16,13 @@ from __future__ import annotations
 import logging
 import threading
 from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
-from typing import Optional, Type
+from typing import TYPE_CHECKING, Optional, Type, Union
 
 from web.router import Router, get_router
 
+if TYPE_CHECKING:
+    from web.async_server import AsyncWebServer
+
 logger = logging.getLogger(__name__)
 
 
@@ -179,6 +183,34 @@ class WebServer:
 # 便捷函数
 # ============================================================
 
+def create_web_server(
+    host: str = "127.0.0.1",
+    port: int = 8000,
+    router: Optional[Router] = None
+) -> Union[WebServer, 'AsyncWebServer']:
+    """
+    按配置创建 Web 服务器（WEBUI_SERVER=threading 线程模式 / asyncio 事件循环模式）
+    
+    Args:
+        host: 监听地址
+        port: 监听端口
+        router: 路由器实例（可选）
+    """
+    from src.config import get_config
+    config = get_config()
+    
+    if config.webui_server == "asyncio":
+        from web.async_server import AsyncWebServer
+        return AsyncWebServer(
+            host=host,
+            port=port,
+            router=router,
+            handler_threads=config.webui_handler_threads,
+            keepalive_timeout=config.webui_keepalive_timeout,
+        )
+    return WebServer(host=host, port=port, router=router)
+
+
 def run_server_in_thread(
     host: str = "127.0.0.1",
     port: int = 8000,
@@ -195,7 +227,7 @@ def run_server_in_thread(
     Returns:
         服务器线程
     """
-    server = WebServer(host=host, port=port, router=router)
+    server = create_web_server(host=host, port=port, router=router)
     return server.start_background()
 
 
@@ -212,5 +244,5 @@ def run_server(
         port: 监听端口
         router: 路由器实例（可选）
     """
-    server = WebServer(host=host, port=port, router=router)
+    server = create_web_server(host=host, port=port, router=router)
     server.run()
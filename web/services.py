@@ -11,16 +11,19 @@ Web 服务层 - 业务逻辑
 
 from __future__ import annotations
 
+import functools
 import os
 import re
 import logging
 import threading
-from concurrent.futures import ThreadPoolExecutor
-from datetime import datetime
-from typing import Optional, Dict, Any, List, Union
+import time
+from collections import OrderedDict
+from datetime import datetime, timedelta, timezone
+from typing import Optional, Dict, Any, List, Tuple, Union
 
 from src.enums import ReportType
 from bot.models import BotMessage
+from src.job_scheduler import JobPriority, JobRejected, get_job_scheduler
 
 logger = logging.getLogger(__name__)
 
@@ -131,6 +134,13 @@ class ConfigService:
 # 分析任务服务
 # ============================================================
 
+# A 股交易日按北京时间划分
+_CN_TZ = timezone(timedelta(hours=8))
+
+# 合并键：(股票代码, 报告类型, 交易日)
+CoalesceKey = Tuple[str, str, str]
+
+
 class AnalysisService:
     """
     分析任务服务
@@ -139,16 +149,41 @@ class AnalysisService:
     1. 管理异步分析任务
     2. 执行股票分析
     3. 触发通知推送
+    4. 合并重复请求：同一交易日内相同股票、相同报告类型的任务只执行一次，
+       进行中的任务直接合并，最近完成的结果在有效期内直接复用
     """
     
     _instance: Optional['AnalysisService'] = None
     _lock = threading.Lock()
     
-    def __init__(self, max_workers: int = 3):
-        self._executor: Optional[ThreadPoolExecutor] = None
-        self._max_workers = max_workers
-        self._tasks: Dict[str, Dict[str, Any]] = {}
+    def __init__(self, result_reuse_minutes: Optional[int] = None, task_history: Optional[int] = None):
+        """
+        分析任务在进程内任务调度器中以交互式优先级执行（并发数由 JOB_WORKERS 控制）
+        
+        Args:
+            result_reuse_minutes: 最近完成的结果复用有效期（分钟，0 表示不复用，默认读取配置）
+            task_history: 内存中保留的最近任务数（更早的任务从数据库查询，默认读取配置）
+        """
+        from src.config import get_config
+        config = get_config()
+        if result_reuse_minutes is None:
+            result_reuse_minutes = config.analysis_result_reuse_minutes
+        if task_history is None:
+            task_history = config.analysis_task_history
+        
+        self._result_reuse_seconds = max(0, result_reuse_minutes) * 60
+        # 最近的任务（按提交顺序），超出上限时淘汰最早的已结束任务；已结束的任务同时写入数据库
+        self._tasks: 'OrderedDict[str, Dict[str, Any]]' = OrderedDict()
+        self._max_tasks = max(1, task_history)
         self._tasks_lock = threading.Lock()
+        # 淘汰水位：已移出内存的任务中最晚的提交时间（初始为启动时间，之前的任务都只在数据库中）
+        self._evicted_watermark = datetime.now()
+        # 进行中的任务 {合并键: task_id}
+        self._inflight: Dict[CoalesceKey, str] = {}
+        # 合并到进行中任务的机器人请求 {task_id: [触发消息]}，完成后逐一回复
+        self._subscribers: Dict[str, List[BotMessage]] = {}
+        # 最近完成的结果 {合并键: (task_id, 完成时间, AnalysisResult)}
+        self._recent: Dict[CoalesceKey, Tuple[str, float, Any]] = {}
     
     @classmethod
     def get_instance(cls) -> 'AnalysisService':
@@ -159,16 +194,6 @@ class AnalysisService:
                     cls._instance = cls()
         return cls._instance
     
-    @property
-    def executor(self) -> ThreadPoolExecutor:
-        """获取或创建线程池"""
-        if self._executor is None:
-            self._executor = ThreadPoolExecutor(
-                max_workers=self._max_workers,
-                thread_name_prefix="analysis_"
-            )
-        return self._executor
-    
     def submit_analysis(
         self, 
         code: str, 
@@ -178,21 +203,102 @@ class AnalysisService:
         """
         提交异步分析任务
         
+        相同股票、相同报告类型在同一交易日内已有进行中的任务时，合并到该任务（返回同一个 task_id）；
+        有效期内已有完成的结果时直接返回。机器人请求在结果就绪后回复到各自的来源会话。
+        
         Args:
             code: 股票代码
             report_type: 报告类型枚举
+            source_message: 触发消息（机器人命令）
             
         Returns:
-            任务信息字典
+            任务信息字典（合并时 coalesced=True，复用结果时 cached=True）
         """
         # 确保 report_type 是枚举类型
         if isinstance(report_type, str):
             report_type = ReportType.from_str(report_type)
         
-        task_id = f"{code}_{datetime.now().strftime('%Y%m%d_%H%M%S_%f')}"
+        key = self._coalesce_key(code, report_type)
         
-        # 提交到线程池
-        self.executor.submit(self._run_analysis, code, task_id, report_type, source_message)
+        with self._tasks_lock:
+            self._prune_recent()
+            
+            # 1. 合并到进行中的任务
+            inflight_id = self._inflight.get(key)
+            if inflight_id is not None:
+                self._tasks[inflight_id]["coalesced"] += 1
+                if source_message is not None:
+                    self._subscribers[inflight_id].append(source_message)
+                logger.info(f"[AnalysisService] 股票 {code} 已有进行中的分析任务，合并请求, task_id={inflight_id}")
+                return {
+                    "success": True,
+                    "message": "相同的分析任务正在进行，已合并，完成后推送结果",
+                    "code": code,
+                    "task_id": inflight_id,
+                    "report_type": report_type.value,
+                    "coalesced": True
+                }
+            
+            # 2. 复用最近完成的结果
+            recent = self._recent.get(key)
+            if recent is None:
+                # 3. 提交新任务到任务调度器（交互式优先级，队列已满时直接拒绝）
+                # 持锁提交：只有调度器接受后才登记为进行中，被拒绝的任务不会被其他请求合并
+                task_id = f"{code}_{datetime.now().strftime('%Y%m%d_%H%M%S_%f')}"
+                try:
+                    get_job_scheduler().submit(
+                        self._run_analysis, code, task_id, report_type, source_message, key,
+                        priority=JobPriority.INTERACTIVE,
+                        user=source_message.user_id if source_message is not None else "web",
+                        name=f"analyze:{code}"
+                    )
+                except JobRejected as e:
+                    return {
+                        "success": False,
+                        "error": f"系统繁忙，请稍后再试（{e}）",
+                        "code": code
+                    }
+                
+                # 任务线程需要先获取 _tasks_lock，登记完成前不会开始执行
+                submit_time = datetime.now().isoformat()
+                self._tasks[task_id] = {
+                    "task_id": task_id,
+                    "code": code,
+                    "status": "pending",
+                    "submit_time": submit_time,
+                    "start_time": submit_time,
+                    "result": None,
+                    "error": None,
+                    "report_type": report_type.value,
+                    "coalesced": 0
+                }
+                self._inflight[key] = task_id
+                self._subscribers[task_id] = []
+        
+        if recent is not None:
+            task_id, finished_at, analysis_result = recent
+            logger.info(
+                f"[AnalysisService] 股票 {code} 复用 {time.time() - finished_at:.0f}s 前的分析结果, task_id={task_id}"
+            )
+            if source_message is not None:
+                try:
+                    get_job_scheduler().submit(
+                        self._reply_to_subscribers, analysis_result, report_type, [source_message],
+                        priority=JobPriority.INTERACTIVE,
+                        user=source_message.user_id,
+                        name=f"reply:{code}"
+                    )
+                except JobRejected as e:
+                    logger.warning(f"[AnalysisService] {code} 回复复用结果失败: {e}")
+            return {
+                "success": True,
+                "message": "最近已完成相同的分析，直接返回结果",
+                "code": code,
+                "task_id": task_id,
+                "report_type": report_type.value,
+                "cached": True,
+                "result": self._summarize_result(analysis_result)
+            }
         
         logger.info(f"[AnalysisService] 已提交股票 {code} 的分析任务, task_id={task_id}, report_type={report_type.value}")
         
@@ -204,25 +310,114 @@ class AnalysisService:
             "report_type": report_type.value
         }
     
+    @staticmethod
+    def _coalesce_key(code: str, report_type: ReportType) -> CoalesceKey:
+        """合并键：股票代码 + 报告类型 + 交易日（北京时间日期）"""
+        trading_day = datetime.now(_CN_TZ).strftime('%Y-%m-%d')
+        return (code.strip().lower(), report_type.value, trading_day)
+    
+    def _prune_recent(self) -> None:
+        """清理过期的复用结果（调用方持有 _tasks_lock）"""
+        today = datetime.now(_CN_TZ).strftime('%Y-%m-%d')
+        deadline = time.time() - self._result_reuse_seconds
+        expired = [
+            key for key, (_, finished_at, _) in self._recent.items()
+            if finished_at < deadline or key[2] != today
+        ]
+        for key in expired:
+            del self._recent[key]
+    
     def get_task_status(self, task_id: str) -> Optional[Dict[str, Any]]:
-        """获取任务状态"""
+        """获取任务状态（内存中没有时查询数据库）"""
         with self._tasks_lock:
-            return self._tasks.get(task_id)
+            task = self._tasks.get(task_id)
+            if task is not None:
+                return dict(task)
+        
+        try:
+            from src.storage import get_db
+            return get_db().get_analysis_task(task_id)
+        except Exception as e:
+            logger.warning(f"[AnalysisService] 查询历史任务失败: {e}")
+            return None
     
-    def list_tasks(self, limit: int = 20) -> List[Dict[str, Any]]:
-        """列出最近的任务"""
+    def list_tasks(
+        self,
+        limit: int = 20,
+        code: Optional[str] = None,
+        status: Optional[str] = None
+    ) -> List[Dict[str, Any]]:
+        """
+        列出最近的任务（按提交时间倒序）
+        
+        内存中比淘汰水位更晚的任务足够 limit 条时直接返回；否则按索引查询数据库中最近的任务，
+        与内存中的任务按 task_id 去重后合并（排队/执行中的任务可能早于已淘汰的任务）
+        
+        Args:
+            limit: 返回条数
+            code: 股票代码过滤
+            status: 状态过滤（pending / running / completed / failed）
+        """
         with self._tasks_lock:
-            tasks = list(self._tasks.values())
-        # 按开始时间倒序
-        tasks.sort(key=lambda x: x.get('start_time', ''), reverse=True)
+            tasks = [
+                dict(task) for task in self._tasks.values()
+                if (code is None or task["code"] == code) and (status is None or task["status"] == status)
+            ]
+            watermark = self._evicted_watermark
+        tasks.sort(key=self._submit_time, reverse=True)
+        
+        # 排队/执行中的任务只在内存中；比水位更晚的任务都还在内存中，足够时无需查询数据库
+        if status in ("pending", "running") or (
+            len(tasks) >= limit and self._submit_time(tasks[limit - 1]) > watermark
+        ):
+            return tasks[:limit]
+        
+        try:
+            from src.storage import get_db
+            seen = {task["task_id"] for task in tasks}
+            history = get_db().list_analysis_tasks(limit=limit, code=code, status=status)
+            tasks.extend(task for task in history if task["task_id"] not in seen)
+            tasks.sort(key=self._submit_time, reverse=True)
+        except Exception as e:
+            logger.warning(f"[AnalysisService] 查询历史任务失败: {e}")
+        
         return tasks[:limit]
     
+    @staticmethod
+    def _submit_time(task: Dict[str, Any]) -> datetime:
+        """任务的提交时间（排序用）"""
+        value = task.get("submit_time") or task.get("start_time")
+        return datetime.fromisoformat(value) if value else datetime.min
+    
+    def _persist_task(self, task_id: str) -> None:
+        """已结束的任务写入数据库，并淘汰超出上限的最早任务"""
+        with self._tasks_lock:
+            task = self._tasks.get(task_id)
+            snapshot = dict(task) if task is not None else None
+        
+        if snapshot is not None and snapshot["status"] in ("completed", "failed"):
+            try:
+                from src.storage import get_db
+                get_db().save_analysis_task(snapshot)
+            except Exception as e:
+                logger.warning(f"[AnalysisService] 保存任务记录失败: {e}")
+        
+        with self._tasks_lock:
+            # 只淘汰已结束的任务，排队/执行中的任务始终保留在内存
+            for old_id in list(self._tasks):
+                if len(self._tasks) <= self._max_tasks:
+                    break
+                if self._tasks[old_id]["status"] in ("completed", "failed"):
+                    evicted = self._tasks.pop(old_id)
+                    self._evicted_watermark = max(self._evicted_watermark, self._submit_time(evicted))
+    
     def _run_analysis(
         self, 
         code: str, 
         task_id: str, 
         report_type: ReportType = ReportType.SIMPLE,
-        source_message: Optional[BotMessage] = None
+        source_message: Optional[BotMessage] = None,
+        key: Optional[CoalesceKey] = None
     ) -> Dict[str, Any]:
         """
         执行单只股票分析
@@ -233,51 +428,58 @@ class AnalysisService:
             code: 股票代码
             task_id: 任务ID
             report_type: 报告类型枚举
+            source_message: 触发消息（机器人命令）
+            key: 合并键（任务结束后移出进行中列表）
         """
-        # 初始化任务状态
+        # 更新任务状态
         with self._tasks_lock:
-            self._tasks[task_id] = {
+            self._tasks.setdefault(task_id, {
                 "task_id": task_id,
                 "code": code,
-                "status": "running",
-                "start_time": datetime.now().isoformat(),
+                "submit_time": datetime.now().isoformat(),
                 "result": None,
                 "error": None,
-                "report_type": report_type.value
-            }
+                "report_type": report_type.value,
+                "coalesced": 0
+            }).update({
+                "status": "running",
+                "start_time": datetime.now().isoformat()
+            })
         
+        result = None
         try:
             # 延迟导入避免循环依赖
             from src.config import get_config
             from main import StockAnalysisPipeline
+            from src.core.services import get_service_container
             
             logger.info(f"[AnalysisService] 开始分析股票: {code}")
             
-            # 创建分析管道
+            # 创建分析管道：重量级组件来自共享容器，只有 source_message 按请求绑定
             config = get_config()
             pipeline = StockAnalysisPipeline(
                 config=config,
                 max_workers=1,
-                source_message=source_message
+                source_message=source_message,
+                services=get_service_container()
             )
             
+            # 机器人触发的任务：流式生成中先把核心结论回复到来源会话
+            on_conclusion = None
+            if source_message is not None:
+                on_conclusion = functools.partial(self._send_early_conclusion, pipeline)
+            
             # 执行单只股票分析（启用单股推送）
             result = pipeline.process_single_stock(
                 code=code,
                 skip_analysis=False,
                 single_stock_notify=True,
-                report_type=report_type
+                report_type=report_type,
+                on_conclusion=on_conclusion
             )
             
             if result:
-                result_data = {
-                    "code": result.code,
-                    "name": result.name,
-                    "sentiment_score": result.sentiment_score,
-                    "operation_advice": result.operation_advice,
-                    "trend_prediction": result.trend_prediction,
-                    "analysis_summary": result.analysis_summary,
-                }
+                result_data = self._summarize_result(result)
                 
                 with self._tasks_lock:
                     self._tasks[task_id].update({
@@ -311,6 +513,80 @@ class AnalysisService:
                 })
             
             return {"success": False, "task_id": task_id, "error": error_msg}
+        
+        finally:
+            self._finish_coalesced(task_id, key, result, report_type)
+            self._persist_task(task_id)
+    
+    def _finish_coalesced(
+        self,
+        task_id: str,
+        key: Optional[CoalesceKey],
+        result: Any,
+        report_type: ReportType
+    ) -> None:
+        """任务结束：移出进行中列表，记录可复用结果，并回复合并进来的机器人请求"""
+        with self._tasks_lock:
+            if key is not None and self._inflight.get(key) == task_id:
+                del self._inflight[key]
+                if result and self._result_reuse_seconds > 0:
+                    self._recent[key] = (task_id, time.time(), result)
+            subscribers = self._subscribers.pop(task_id, [])
+        
+        if result and subscribers:
+            self._reply_to_subscribers(result, report_type, subscribers)
+    
+    @staticmethod
+    def _reply_to_subscribers(result: Any, report_type: ReportType, messages: List[BotMessage]) -> None:
+        """把分析结果回复到各个触发消息的来源会话"""
+        from src.notification import NotificationService
+        
+        for message in messages:
+            try:
+                notifier = NotificationService(source_message=message)
+                if report_type == ReportType.FULL:
+                    content = notifier.generate_dashboard_report([result])
+                else:
+                    content = notifier.generate_single_stock_report(result)
+                if notifier.send_to_context(content):
+                    logger.info(f"[AnalysisService] {result.code} 分析结果已回复到合并的请求")
+            except Exception as e:
+                logger.warning(f"[AnalysisService] {result.code} 回复合并的请求失败: {e}")
+    
+    @staticmethod
+    def _summarize_result(result: Any) -> Dict[str, Any]:
+        """任务状态中保存的结果摘要"""
+        return {
+            "code": result.code,
+            "name": result.name,
+            "sentiment_score": result.sentiment_score,
+            "operation_advice": result.operation_advice,
+            "trend_prediction": result.trend_prediction,
+            "analysis_summary": result.analysis_summary,
+        }
+    
+    @staticmethod
+    def _send_early_conclusion(pipeline: Any, partial: Any) -> None:
+        """
+        提前推送核心结论到来源会话（完整报告稍后推送）
+        
+        Args:
+            pipeline: 当前任务的 StockAnalysisPipeline
+            partial: 只包含核心字段的 AnalysisResult
+        """
+        content = (
+            f"{partial.get_emoji()} **{partial.name}({partial.code}) 核心结论**\n\n"
+            f"> {partial.get_core_conclusion()}\n\n"
+            f"• 操作建议: {partial.operation_advice}\n"
+            f"• 趋势预测: {partial.trend_prediction}\n"
+            f"• 综合评分: {partial.sentiment_score}\n\n"
+            f"完整报告生成中..."
+        )
+        try:
+            if pipeline.notifier.send_to_context(content):
+                logger.info(f"[AnalysisService] {partial.code} 核心结论已提前推送")
+        except Exception as e:
+            logger.warning(f"[AnalysisService] {partial.code} 核心结论推送失败: {e}")
 
 
 # ============================================================
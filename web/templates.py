@@ -6,7 +6,7 @@ Web 模板层 - HTML 页面生成
 
 职责：
 1. 生成 HTML 页面
-2. 管理 CSS 样式
+2. 管理 CSS 样式与脚本（注册为静态资源，页面通过带版本号的 URL 引用）
 3. 提供可复用的页面组件
 """
 
@@ -15,6 +15,8 @@ from __future__ import annotations
 import html
 from typing import Optional
 
+from web.assets import asset_url, register_asset
+
 
 # ============================================================
 # CSS 样式定义
@@ -551,86 +553,11 @@ button:active {
 
 
 # ============================================================
-# 页面模板
+# JavaScript 定义
 # ============================================================
 
-def render_base(
-    title: str,
-    content: str,
-    extra_css: str = "",
-    extra_js: str = ""
-) -> str:
-    """
-    渲染基础 HTML 模板
-    
-    Args:
-        title: 页面标题
-        content: 页面内容 HTML
-        extra_css: 额外的 CSS 样式
-        extra_js: 额外的 JavaScript
-    """
-    return f"""<!doctype html>
-<html lang="zh-CN">
-<head>
-  <meta charset="utf-8" />
-  <meta name="viewport" content="width=device-width, initial-scale=1" />
-  <title>{html.escape(title)}</title>
-  <style>{BASE_CSS}{extra_css}</style>
-</head>
-<body>
-  {content}
-  {extra_js}
-</body>
-</html>"""
-
-
-def render_toast(message: str, toast_type: str = "success") -> str:
-    """
-    渲染 Toast 通知
-    
-    Args:
-        message: 通知消息
-        toast_type: 类型 (success, error, warning)
-    """
-    icon_map = {
-        "success": "✅",
-        "error": "❌",
-        "warning": "⚠️"
-    }
-    icon = icon_map.get(toast_type, "ℹ️")
-    type_class = f" {toast_type}" if toast_type != "success" else ""
-    
-    return f"""
-    <div id="toast" class="toast show{type_class}">
-        <span class="icon">{icon}</span> {html.escape(message)}
-    </div>
-    <script>
-        setTimeout(() => {{
-            document.getElementById('toast').classList.remove('show');
-        }}, 3000);
-    </script>
-    """
-
-
-def render_config_page(
-    stock_list: str,
-    env_filename: str,
-    message: Optional[str] = None
-) -> bytes:
-    """
-    渲染配置页面
-    
-    Args:
-        stock_list: 当前自选股列表
-        env_filename: 环境文件名
-        message: 可选的提示消息
-    """
-    safe_value = html.escape(stock_list)
-    toast_html = render_toast(message) if message else ""
-    
-    # 分析组件的 JavaScript - 支持多任务
-    analysis_js = """
-<script>
+# 分析组件的 JavaScript - 支持多任务
+ANALYSIS_JS = """
 (function() {
     const codeInput = document.getElementById('analysis_code');
     const submitBtn = document.getElementById('analysis_btn');
@@ -691,6 +618,11 @@ def render_config_page(
         return minutes + 'm' + remainSec + 's';
     }
     
+    // 任务提交时间（列表排序用，开始执行后 start_time 会更新）
+    function submitTime(task) {
+        return (task && (task.submit_time || task.start_time)) || '';
+    }
+    
     // 获取建议样式类
     function getAdviceClass(advice) {
         if (!advice) return '';
@@ -761,7 +693,7 @@ def render_config_page(
         
         let html = '';
         const sortedTasks = Array.from(tasks.entries())
-            .sort((a, b) => (b[1].task?.start_time || '').localeCompare(a[1].task?.start_time || ''));
+            .sort((a, b) => submitTime(b[1].task).localeCompare(submitTime(a[1].task)));
         
         sortedTasks.slice(0, MAX_TASKS_DISPLAY).forEach(([taskId, taskData]) => {
             html += renderTaskCard(taskId, taskData);
@@ -869,6 +801,7 @@ def render_config_page(
                         task: {
                             code: code,
                             status: 'running',
+                            submit_time: new Date().toISOString(),
                             start_time: new Date().toISOString(),
                             report_type: reportType
                         },
@@ -908,8 +841,91 @@ def render_config_page(
     updateButtonState();
     renderAllTasks();
 })();
-</script>
 """
+
+register_asset("base.css", BASE_CSS, "text/css; charset=utf-8")
+register_asset("analysis.js", ANALYSIS_JS, "application/javascript; charset=utf-8")
+
+
+# ============================================================
+# 页面模板
+# ============================================================
+
+def render_base(
+    title: str,
+    content: str,
+    extra_css: str = "",
+    extra_js: str = ""
+) -> str:
+    """
+    渲染基础 HTML 模板
+    
+    Args:
+        title: 页面标题
+        content: 页面内容 HTML
+        extra_css: 额外的 CSS 样式
+        extra_js: 额外的 JavaScript
+    """
+    extra_style = f"<style>{extra_css}</style>" if extra_css else ""
+    return f"""<!doctype html>
+<html lang="zh-CN">
+<head>
+  <meta charset="utf-8" />
+  <meta name="viewport" content="width=device-width, initial-scale=1" />
+  <title>{html.escape(title)}</title>
+  <link rel="stylesheet" href="{asset_url('base.css')}" />
+  {extra_style}
+</head>
+<body>
+  {content}
+  {extra_js}
+</body>
+</html>"""
+
+
+def render_toast(message: str, toast_type: str = "success") -> str:
+    """
+    渲染 Toast 通知
+    
+    Args:
+        message: 通知消息
+        toast_type: 类型 (success, error, warning)
+    """
+    icon_map = {
+        "success": "✅",
+        "error": "❌",
+        "warning": "⚠️"
+    }
+    icon = icon_map.get(toast_type, "ℹ️")
+    type_class = f" {toast_type}" if toast_type != "success" else ""
+    
+    return f"""
+    <div id="toast" class="toast show{type_class}">
+        <span class="icon">{icon}</span> {html.escape(message)}
+    </div>
+    <script>
+        setTimeout(() => {{
+            document.getElementById('toast').classList.remove('show');
+        }}, 3000);
+    </script>
+    """
+
+
+def render_config_page(
+    stock_list: str,
+    env_filename: str,
+    message: Optional[str] = None
+) -> bytes:
+    """
+    渲染配置页面
+    
+    Args:
+        stock_list: 当前自选股列表
+        env_filename: 环境文件名
+        message: 可选的提示消息
+    """
+    safe_value = html.escape(stock_list)
+    toast_html = render_toast(message) if message else ""
     
     content = f"""
   <div class="container">
@@ -963,7 +979,7 @@ def render_config_page(
   </div>
   
   {toast_html}
-  {analysis_js}
+  <script src="{asset_url('analysis.js')}"></script>
 """
     
     page = render_base(